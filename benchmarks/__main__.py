@@ -0,0 +1,199 @@
+"""
+Durchsatz-Benchmark für den Coin-Store und den Chat-Hot-Path
+
+Läuft komplett offline gegen eine temporäre Datenbank mit synthetischen Usern
+und gemockten twitchio-Objekten. Ergebnisse (Perzentile und Durchsatz) werden
+als JSON gespeichert und können mit einem früheren Lauf verglichen werden.
+
+Aufruf: python -m benchmarks [--users 100000] [--ops 20000] [--rate 0] [--compare alt.json]
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+from .common import (
+    LatencyRecorder, MockBot, MockContext, compare_results, git_commit, use_temp_database, write_results,
+)
+
+SEED_CHUNK = 50000
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=10000, help="Anzahl synthetischer User (1k-1M)")
+    parser.add_argument("--ops", type=int, default=10000, help="Operationen pro Szenario")
+    parser.add_argument("--rate", type=float, default=0, help="Chat-Nachrichten pro Sekunde (0 = so schnell wie möglich)")
+    parser.add_argument("--command-ratio", type=float, default=0.05, help="Anteil der Nachrichten, die Commands sind")
+    parser.add_argument("--write-behind", action="store_true", help="Write-Behind-Puffer aktivieren (wie im Bot-Prozess)")
+    parser.add_argument("--seed", type=int, default=1, help="Zufalls-Seed für reproduzierbare Läufe")
+    parser.add_argument("--output", default=None, help="JSON-Ergebnisdatei (Standard: benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", default=None, help="Ältere JSON-Ergebnisdatei zum Vergleich")
+    parser.add_argument("--only", default=None, help="Nur diese Szenarien (kommagetrennt)")
+    return parser.parse_args()
+
+
+def timed_loop(name, ops, func):
+    recorder = LatencyRecorder(name)
+    perf = time.perf_counter
+    with recorder:
+        for i in range(ops):
+            start = perf()
+            func(i)
+            recorder.record(perf() - start)
+    return recorder
+
+async def timed_async_loop(name, ops, func, rate=0):
+    recorder = LatencyRecorder(name)
+    perf = time.perf_counter
+    interval = 1.0 / rate if rate else 0
+    with recorder:
+        next_at = perf()
+        for i in range(ops):
+            if interval:
+                next_at += interval
+                delay = next_at - perf()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            start = perf()
+            await func(i)
+            recorder.record(perf() - start)
+    return recorder
+
+
+def seed_users(coinmanager, users, rng):
+    names = [f"user{i}" for i in range(users)]
+    for start in range(0, users, SEED_CHUNK):
+        chunk = names[start:start + SEED_CHUNK]
+        coinmanager.give_many_user_points({name: rng.randint(1, 20000) for name in chunk})
+    return names
+
+
+def run_store_scenarios(args, coinmanager, names, rng, selected):
+    recorders = []
+    pick = lambda: names[rng.randrange(len(names))]
+
+    if "give" in selected:
+        recorders.append(timed_loop("give_user_points", args.ops, lambda i: coinmanager.give_user_points(pick(), 10)))
+    if "get" in selected:
+        recorders.append(timed_loop("get_user_points", args.ops, lambda i: coinmanager.get_user_points(pick())))
+    if "top" in selected:
+        recorders.append(timed_loop("get_top_users", args.ops, lambda i: coinmanager.get_top_users(3)))
+    if "tick" in selected:
+        # Ein Auto-Reward-Tick für bis zu 5000 aktive User
+        active = min(len(names), 5000)
+        ticks = max(args.ops // 1000, 5)
+        recorders.append(timed_loop(
+            "reward_tick_5k", ticks,
+            lambda i: coinmanager.give_many_user_points({name: 10 for name in rng.sample(names, active)}),
+        ))
+    return recorders
+
+
+async def run_chat_scenarios(args, names, rng, selected):
+    from modules import points
+
+    bot = MockBot()
+    points.setup_command(bot, bot.log_queue)
+    handlers = {"coins": bot.commands["coins"], "top": bot.commands["top"]}
+    try:
+        from modules import rank
+        rank.setup_command(bot, bot.log_queue)
+        handlers["rank"] = bot.commands["rank"]
+    except ImportError as e:
+        print(f"Skipping rank handler: {e}")
+
+    try:
+        from modules import auto_points
+        record_activity = auto_points.add_active_user
+        clear_activity = auto_points.activity.clear
+    except ImportError as e:
+        # auto_points braucht die Config (colorama), der Tracker selbst nicht
+        print(f"Using a bare ActivityTracker instead of auto_points: {e}")
+        from modules.elchcoins.activity import ActivityTracker
+        tracker = ActivityTracker()
+        record_activity = lambda username, log_queue, channel="": tracker.record(channel, username)
+        clear_activity = tracker.clear
+
+    channel = bot.connected_channels[0]
+    pick = lambda: names[rng.randrange(len(names))]
+    recorders = []
+
+    if "active" in selected:
+        recorders.append(timed_loop(
+            "add_active_user", args.ops, lambda i: record_activity(pick(), bot.log_queue, channel.name)
+        ))
+        clear_activity()
+
+    for name, handler in handlers.items():
+        if f"cmd_{name}" not in selected:
+            continue
+        async def invoke(i, handler=handler):
+            await handler(MockContext(bot, pick(), channel))
+        recorders.append(await timed_async_loop(f"cmd_{name}", args.ops, invoke))
+
+    if "chat" in selected:
+        commands = list(handlers.values())
+
+        async def message(i):
+            username = pick()
+            record_activity(username, bot.log_queue, channel.name)
+            if rng.random() < args.command_ratio:
+                await commands[rng.randrange(len(commands))](MockContext(bot, username, channel))
+        recorders.append(await timed_async_loop("chat_messages", args.ops, message, args.rate))
+        clear_activity()
+
+    return recorders
+
+
+def main():
+    args = parse_args()
+    rng = random.Random(args.seed)
+    scenarios = ["give", "get", "top", "tick", "active", "cmd_coins", "cmd_top", "cmd_rank", "chat"]
+    selected = set(args.only.split(",")) if args.only else set(scenarios)
+
+    # Standard-Dateiname enthält den Commit, damit Läufe verschiedener Stände nebeneinander liegen
+    output = args.output or os.path.join("benchmarks", "results", f"{git_commit()}-{args.users}u.json")
+    tmp = use_temp_database()
+    # Configs etc. der Module landen im Temp-Verzeichnis, nicht im Repository
+    repo_dir = os.getcwd()
+    os.chdir(tmp)
+
+    from modules.elchcoins import async_coinmanager, coinmanager
+    coinmanager.init()
+
+    if args.write_behind:
+        coinmanager.enable_write_behind(journal_path=os.path.join(tmp, "bench.journal"))
+
+    print(f"Seeding {args.users} users...")
+    start = time.perf_counter()
+    names = seed_users(coinmanager, args.users, rng)
+    print(f"Seeded in {time.perf_counter() - start:.2f}s\n")
+
+    recorders = run_store_scenarios(args, coinmanager, names, rng, selected)
+    recorders += asyncio.run(run_chat_scenarios(args, names, rng, selected))
+
+    async_coinmanager.shutdown()
+    coinmanager.disable_write_behind()
+
+    results = {}
+    print(f"{'scenario':<18} {'ops':>8} {'ops/sec':>12} {'p50 us':>10} {'p90 us':>10} {'p99 us':>10} {'max us':>10}")
+    for recorder in recorders:
+        summary = recorder.summary()
+        results[recorder.name] = summary
+        print(f"{recorder.name:<18} {summary['ops']:>8} {summary['throughput']:>12.1f} {summary['p50_us']:>10.1f} "
+              f"{summary['p90_us']:>10.1f} {summary['p99_us']:>10.1f} {summary['max_us']:>10.1f}")
+
+    os.chdir(repo_dir)
+    config = {key: value for key, value in vars(args).items() if key not in ("output", "compare")}
+    data = write_results(output, config, results)
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        compare_results(args.compare, data)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,155 @@
+"""
+Gemeinsame Hilfen für die Benchmarks: Latenz-Messung, isolierte Test-Datenbank,
+Mock-Objekte für twitchio und JSON-Ergebnisse
+"""
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from array import array
+from queue import Queue
+
+from modules.elchcoins import database
+from modules.elchcoins.connection import ConnectionManager
+
+
+class LatencyRecorder:
+    """Sammelt Einzel-Latenzen (Sekunden) und berechnet Perzentile und Durchsatz"""
+
+    def __init__(self, name):
+        self.name = name
+        self.samples = array("d")
+        self.started = None
+        self.elapsed = 0.0
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.started
+
+    def record(self, seconds):
+        self.samples.append(seconds)
+
+    def percentile(self, sorted_samples, p):
+        if not sorted_samples:
+            return 0.0
+        index = min(int(len(sorted_samples) * p / 100), len(sorted_samples) - 1)
+        return sorted_samples[index]
+
+    def summary(self):
+        ordered = sorted(self.samples)
+        ops = len(ordered)
+        return {
+            "ops": ops,
+            "seconds": round(self.elapsed, 6),
+            "throughput": round(ops / self.elapsed, 1) if self.elapsed else 0.0,
+            "p50_us": round(self.percentile(ordered, 50) * 1e6, 2),
+            "p90_us": round(self.percentile(ordered, 90) * 1e6, 2),
+            "p99_us": round(self.percentile(ordered, 99) * 1e6, 2),
+            "max_us": round(ordered[-1] * 1e6, 2) if ordered else 0.0,
+        }
+
+
+def use_temp_database():
+    """Leitet alle Elchcoins-Zugriffe auf eine temporäre Datenbank um (vor dem Import von coinmanager aufrufen)"""
+    tmp = tempfile.mkdtemp(prefix="elchbench-")
+    database.db = ConnectionManager(os.path.join(tmp, "bench.db"))
+    database.init_db()
+    return tmp
+
+
+# --- Mock-Objekte für twitchio ---
+
+class MockUser:
+    def __init__(self, name):
+        self.name = name
+
+
+class MockChannel:
+    def __init__(self, name):
+        self.name = name
+        self.sent = 0
+
+    async def send(self, message):
+        self.sent += 1
+
+
+class MockBot:
+    """Minimaler Ersatz für commands.Bot: sammelt registrierte Commands"""
+
+    def __init__(self):
+        self.log_queue = Queue()
+        self.commands = {}
+        self.connected_channels = [MockChannel("benchmark")]
+
+    def command(self, name=None, aliases=None):
+        def decorator(func):
+            self.commands[name or func.__name__] = func
+            for alias in aliases or []:
+                self.commands[alias] = func
+            return func
+        return decorator
+
+    def event(self, *args, **kwargs):
+        def decorator(func):
+            return func
+        return decorator
+
+    def remove_command(self, name):
+        self.commands.pop(name, None)
+
+
+class MockContext:
+    def __init__(self, bot, username, channel):
+        self.bot = bot
+        self.author = MockUser(username)
+        self.channel = channel
+
+    async def send(self, message):
+        await self.channel.send(message)
+
+
+# --- Ergebnisse ---
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def write_results(path, config, results):
+    """Schreibt Ergebnisse als JSON (zum Vergleich zwischen Commits)"""
+    data = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "config": config,
+        "results": results,
+    }
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    return data
+
+def compare_results(old_path, new_data):
+    """Gibt die Veränderung des Durchsatzes und der p99-Latenz gegenüber einer älteren Datei aus"""
+    with open(old_path, "r", encoding="utf-8") as f:
+        old = json.load(f)
+    print(f"\nCompared to {old.get('commit', '?')} ({old.get('timestamp', '?')}):")
+    for name, new in new_data["results"].items():
+        before = old.get("results", {}).get(name)
+        if not before:
+            continue
+        tput = (new["throughput"] / before["throughput"] - 1) * 100 if before["throughput"] else 0.0
+        p99 = (new["p99_us"] / before["p99_us"] - 1) * 100 if before["p99_us"] else 0.0
+        print(f"  {name:<18} throughput {tput:+7.1f}%   p99 {p99:+7.1f}%")
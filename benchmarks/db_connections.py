@@ -0,0 +1,73 @@
+"""
+Benchmark: eine Verbindung pro Aufruf (alt) gegen gepoolte Verbindungen (neu)
+
+Aufruf: python -m benchmarks.db_connections [ops]
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+from modules.elchcoins.connection import ConnectionManager
+
+CREATE_TABLE = '''
+    CREATE TABLE IF NOT EXISTS user_points (
+        username TEXT PRIMARY KEY,
+        points INTEGER DEFAULT 0
+    )
+'''
+UPSERT = '''
+    INSERT INTO user_points (username, points)
+    VALUES (?, ?)
+    ON CONFLICT(username) DO UPDATE SET points = points + ?
+'''
+SELECT = 'SELECT points FROM user_points WHERE username = ?'
+
+def legacy_ops(db_path, ops):
+    """Alte Variante: connect/execute/commit/close pro Operation"""
+    for i in range(ops):
+        username = f"user{i % 1000}"
+        conn = sqlite3.connect(db_path)
+        conn.execute(UPSERT, (username, 10, 10))
+        conn.commit()
+        conn.close()
+
+        conn = sqlite3.connect(db_path)
+        conn.execute(SELECT, (username,)).fetchone()
+        conn.close()
+
+def pooled_ops(db_path, ops):
+    """Neue Variante: langlebige Verbindung mit WAL und Statement-Cache"""
+    db = ConnectionManager(db_path)
+    for i in range(ops):
+        username = f"user{i % 1000}"
+        db.execute(UPSERT, (username, 10, 10))
+        db.query_one(SELECT, (username,))
+    db.close_all()
+
+def run(name, func, ops):
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        conn = sqlite3.connect(db_path)
+        conn.execute(CREATE_TABLE)
+        conn.commit()
+        conn.close()
+
+        start = time.perf_counter()
+        func(db_path, ops)
+        elapsed = time.perf_counter() - start
+
+    # Jede Iteration = ein Write + ein Read
+    ops_per_sec = (ops * 2) / elapsed
+    print(f"{name:<8} {ops * 2:>8} ops  {elapsed:8.3f}s  {ops_per_sec:12.0f} ops/sec")
+    return ops_per_sec
+
+def main():
+    ops = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    before = run("legacy", legacy_ops, ops)
+    after = run("pooled", pooled_ops, ops)
+    print(f"Speedup: {after / before:.1f}x")
+
+if __name__ == "__main__":
+    main()
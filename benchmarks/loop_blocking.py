@@ -0,0 +1,98 @@
+"""
+Benchmark: Event-Loop-Blockierung durch synchrone vs. asynchrone Coin-Aufrufe
+
+Ein Heartbeat-Task misst, wie stark sich sein Aufwachen verspätet, während
+Command-Handler parallel Punkte lesen und schreiben.
+
+Optional wird pro Schreibzugriff ein Disk-Stall simuliert (Millisekunden).
+
+Aufruf: python -m benchmarks.loop_blocking [calls] [stall_ms]
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+from modules.elchcoins import database
+from modules.elchcoins.connection import ConnectionManager
+
+HEARTBEAT_INTERVAL = 0.001
+CONCURRENCY = 20
+
+class StallingConnectionManager(ConnectionManager):
+    """Simuliert langsames Storage durch eine feste Verzögerung pro Commit"""
+
+    def __init__(self, db_path, stall):
+        super().__init__(db_path)
+        self.stall = stall
+
+    def execute(self, sql, params=()):
+        cursor = super().execute(sql, params)
+        if self.stall:
+            time.sleep(self.stall)
+        return cursor
+
+async def heartbeat(lags, stop):
+    """Misst die Verspätung jedes Aufwachens gegenüber dem geplanten Zeitpunkt"""
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        expected = loop.time() + HEARTBEAT_INTERVAL
+        await asyncio.sleep(HEARTBEAT_INTERVAL)
+        lags.append(max(loop.time() - expected, 0.0))
+
+async def sync_handler(coinmanager, i):
+    username = f"user{i % 500}"
+    coinmanager.give_user_points(username, 10)
+    coinmanager.get_user_points(username)
+    await asyncio.sleep(0)
+
+async def async_handler(async_coinmanager, i):
+    username = f"user{i % 500}"
+    await async_coinmanager.give_user_points(username, 10)
+    await async_coinmanager.get_user_points(username)
+
+async def measure(name, handler, api, calls):
+    lags = []
+    stop = asyncio.Event()
+    beat = asyncio.create_task(heartbeat(lags, stop))
+    await asyncio.sleep(0.01)
+
+    # Begrenzte Parallelität wie bei echten Chat-Bursts
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+
+    async def limited(i):
+        async with semaphore:
+            await handler(api, i)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(limited(i) for i in range(calls)))
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    await beat
+
+    lags.sort()
+    total = sum(lags)
+    p99 = lags[int(len(lags) * 0.99) - 1] if lags else 0.0
+    worst = lags[-1] if lags else 0.0
+    print(f"{name:<6} {calls:>6} calls  {elapsed:7.3f}s  "
+          f"loop blocked: total {total * 1000:8.1f}ms  p99 {p99 * 1000:6.2f}ms  max {worst * 1000:6.2f}ms")
+
+def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    stall = (float(sys.argv[2]) if len(sys.argv) > 2 else 1.0) / 1000
+    with tempfile.TemporaryDirectory() as tmp:
+        # Benchmark gegen eine temporäre Datenbank, nicht gegen die echte
+        database.db = StallingConnectionManager(os.path.join(tmp, "bench.db"), stall)
+        from modules.elchcoins import coinmanager, async_coinmanager
+        coinmanager.init()
+
+        asyncio.run(measure("sync", sync_handler, coinmanager, calls))
+        asyncio.run(measure("async", async_handler, async_coinmanager, calls))
+
+        async_coinmanager.shutdown()
+        database.db.close_all()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,344 @@
+"""
+Strukturiertes Logging für den Bot-Prozess
+
+Baut auf dem logging-Modul auf: Logger heißen "elchbot.<modul>", Level sind
+global (env log_level) und pro Modul (env log_levels, z.B.
+"auto_points=DEBUG,points=WARNING") einstellbar. Nachrichten werden erst
+formatiert, wenn ein Sink sie wirklich ausgibt, unterdrückte Debug-Zeilen
+kosten also nur den Level-Vergleich.
+
+Zwei Sinks:
+- ConsoleSink: farbige Zeilen über die log_queue (LogWriter) an die Console
+- BatchedFileSink: JSON-Zeilen, von einem Hintergrund-Thread gebündelt in eine
+  rotierende Datei geschrieben
+
+Gleichförmige Meldungen (gleiches Template, bei alten log_queue-Zeilen gleiches
+Tag und gleicher Anfang) werden pro Intervall begrenzt, die Anzahl unterdrückter
+Zeilen hängt an der nächsten durchgelassenen.
+
+Alte log_queue.put(...)-Aufrufe der Module laufen über LogQueue weiter und
+landen so ebenfalls in beiden Sinks.
+"""
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import deque
+
+ROOT = "elchbot"
+LOG_DIR = "logs"
+LOG_FILE = os.path.join(LOG_DIR, "elchbot.log")
+MAX_BYTES = 5 * 1024 * 1024
+BACKUP_COUNT = 5
+FLUSH_INTERVAL = 0.5     # Sekunden
+MAX_BATCH = 1000         # Records pro Schreibvorgang
+MAX_PENDING = 50000      # Records im Puffer, darüber wird verworfen
+RATE_LIMIT = 20          # gleiche Templates pro Intervall und Logger
+RATE_INTERVAL = 10.0     # Sekunden
+TEMPLATE_WORDS = 3       # Wörter nach dem Tag, die eine alte log_queue-Zeile kennzeichnen
+
+ANSI = re.compile(r"\x1b\[[0-9;]*m")
+TAG = re.compile(r"\[([A-Za-z][A-Za-z0-9 _-]*)\]")
+DIGITS = re.compile(r"\d+")
+LEVEL_COLORS = {
+    logging.DEBUG: "\x1b[90m",
+    logging.INFO: "",
+    logging.WARNING: "\x1b[33m",
+    logging.ERROR: "\x1b[31m",
+    logging.CRITICAL: "\x1b[41m",
+}
+RESET = "\x1b[0m"
+
+
+def get_logger(module):
+    """Logger für ein Modul, z.B. get_logger("auto_points")"""
+    return logging.getLogger(f"{ROOT}.{module}")
+
+
+class RateLimitFilter(logging.Filter):
+    """Lässt pro (Logger, Template) höchstens `limit` Records je Intervall durch"""
+
+    def __init__(self, limit=RATE_LIMIT, interval=RATE_INTERVAL):
+        super().__init__()
+        self.limit = limit
+        self.interval = interval
+        self.windows = {}
+        self.lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno >= logging.ERROR:
+            return True
+        # Beide Sinks teilen sich den Filter, jeder Record wird nur einmal gezählt
+        allowed = getattr(record, "rate_allowed", None)
+        if allowed is None:
+            allowed = record.rate_allowed = self._allow(record)
+        return allowed
+
+    def _allow(self, record):
+        if getattr(record, "raw", False):
+            key = (record.name, record.levelno, legacy_template(record.args[0]))
+        else:
+            key = (record.name, record.msg if isinstance(record.msg, str) else id(record.msg))
+        now = record.created
+        with self.lock:
+            window = self.windows.get(key)
+            if window is None or now - window[0] >= self.interval:
+                suppressed = window[2] if window else 0
+                self.windows[key] = [now, 1, 0]
+                if len(self.windows) > 10000:
+                    # Alte Fenster aufräumen, damit die Tabelle nicht wächst
+                    self.windows = {k: w for k, w in self.windows.items() if now - w[0] < self.interval}
+                if suppressed:
+                    record.suppressed = suppressed
+                return True
+            if window[1] < self.limit:
+                window[1] += 1
+                return True
+            window[2] += 1
+            return False
+
+
+def legacy_template(message):
+    """Rate-Limit-Schlüssel einer alten log_queue-Zeile
+
+    Die Zeilen sind fertig formatiert, ein Schlüssel auf den ganzen Text würde
+    bei Usernamen und Beträgen nie greifen. Verschiedene Meldungen eines Tags
+    unterscheiden sich fast immer in den ersten Wörtern, Usernamen stehen
+    weiter hinten. Schlüssel ist daher das Tag plus die ersten TEMPLATE_WORDS
+    Wörter mit ausgeblendeten Zahlen ("[AUTO-REWARD] Gave # points").
+    """
+    text = DIGITS.sub("#", ANSI.sub("", str(message)))
+    match = TAG.search(text, 0, 40)
+    if match is None:
+        return text
+    words = text[match.end():].split()[:TEMPLATE_WORDS]
+    return " ".join([match.group(0)] + words)
+
+
+def render(record):
+    """Nachricht eines Records (inkl. Hinweis auf unterdrückte Wiederholungen)"""
+    message = record.getMessage()
+    suppressed = getattr(record, "suppressed", 0)
+    if suppressed:
+        message += f" (+{suppressed} similar suppressed)"
+    return message
+
+
+class ConsoleSink(logging.Handler):
+    """Gibt Records farbig über die log_queue an die Console weiter"""
+
+    def __init__(self, writer, level=logging.NOTSET):
+        super().__init__(level)
+        self.writer = writer
+
+    def emit(self, record):
+        try:
+            message = render(record)
+            if getattr(record, "raw", False):
+                # Alte log_queue-Zeilen sind schon fertig formatiert (inkl. Farben)
+                self.writer.put(message)
+                return
+            module = record.name[len(ROOT) + 1:].upper() or ROOT.upper()
+            color = LEVEL_COLORS.get(record.levelno, "")
+            line = f"{color}[{module}]{RESET if color else ''} {message}"
+            if record.exc_info:
+                line += "\n" + self.format_exception(record)
+            self.writer.put(line)
+        except Exception:
+            self.handleError(record)
+
+    def format_exception(self, record):
+        return logging.Formatter().formatException(record.exc_info)
+
+
+class BatchedFileSink(logging.Handler):
+    """Sammelt Records als fertige JSON-Zeilen und schreibt sie gebündelt in eine rotierende Datei"""
+
+    def __init__(self, path=LOG_FILE, max_bytes=MAX_BYTES, backup_count=BACKUP_COUNT,
+                 flush_interval=FLUSH_INTERVAL, max_pending=MAX_PENDING, level=logging.NOTSET):
+        super().__init__(level)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.pending = deque()
+        self.dropped = 0
+        self.written = 0
+        self._wakeup = threading.Event()
+        self._closed = False
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+        self._size = self._file.tell()
+        self._thread = threading.Thread(target=self._run, name="log-file", daemon=True)
+        self._thread.start()
+
+    def emit(self, record):
+        if len(self.pending) >= self.max_pending:
+            self.dropped += 1
+            return
+        # Sofort formatieren: record.args können sich bis zum Schreiben noch ändern
+        try:
+            line = self.to_json(record)
+        except Exception:
+            self.handleError(record)
+            return
+        self.pending.append(line)
+        if len(self.pending) >= MAX_BATCH:
+            self._wakeup.set()
+
+    def _run(self):
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self._write_pending()
+        self._write_pending()
+
+    def _write_pending(self):
+        while self.pending:
+            lines = []
+            while self.pending and len(lines) < MAX_BATCH:
+                lines.append(self.pending.popleft())
+            count = len(lines)
+            if self.dropped:
+                lines.append(json.dumps({"ts": time.time(), "level": "WARNING", "logger": ROOT,
+                                         "msg": f"Dropped {self.dropped} log records (writer too slow)"}))
+                self.dropped = 0
+            data = "\n".join(lines) + "\n"
+            # max_bytes gilt für die Datei, also UTF-8-Bytes statt Zeichen zählen
+            size = len(data.encode("utf-8"))
+            try:
+                if self._size + size > self.max_bytes and self._size > 0:
+                    self._rotate()
+                self._file.write(data)
+                self._file.flush()
+                self._size += size
+                self.written += count
+            except OSError:
+                self.dropped += count
+                return
+
+    def to_json(self, record):
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": ANSI.sub("", render(record)),
+        }
+        fields = getattr(record, "fields", None)
+        if fields:
+            entry.update(fields)
+        if record.exc_info:
+            entry["exc"] = logging.Formatter().formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+    def _rotate(self):
+        self._file.close()
+        for index in range(self.backup_count - 1, 0, -1):
+            source = f"{self.path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index + 1}")
+        if self.backup_count > 0:
+            os.replace(self.path, f"{self.path}.1")
+        self._file = open(self.path, "w" if self.backup_count > 0 else "a", encoding="utf-8")
+        self._size = self._file.tell()
+
+    def close(self):
+        self._closed = True
+        self._wakeup.set()
+        self._thread.join(5)
+        self._file.close()
+        super().close()
+
+
+class LogQueue:
+    """Ersatz für log_queue: put() loggt die fertige Zeile über den Logger des Modul-Tags"""
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.loggers = {}
+
+    def put(self, message):
+        text = ANSI.sub("", str(message))
+        match = TAG.search(text, 0, 40)
+        module = match.group(1).lower().replace(" ", "_") if match else "bot"
+        logger = self.loggers.get(module)
+        if logger is None:
+            logger = self.loggers[module] = get_logger(module)
+        level = legacy_level(text, module)
+        if logger.isEnabledFor(level):
+            logger.log(level, "%s", message, extra={"raw": True})
+
+    put_nowait = put
+
+    def stats(self):
+        stats = dict(self.writer.stats())
+        for handler in logging.getLogger(ROOT).handlers:
+            if isinstance(handler, BatchedFileSink):
+                stats.update(file_pending=len(handler.pending), file_written=handler.written,
+                             file_dropped=handler.dropped)
+        return stats
+
+
+def legacy_level(text, module):
+    """Level einer alten, frei formatierten log_queue-Zeile anhand typischer Marker"""
+    if module == "debug":
+        return logging.DEBUG
+    lowered = text.lower()
+    if "❌" in text or "error" in lowered or "failed" in lowered:
+        return logging.ERROR
+    if "warning" in lowered:
+        return logging.WARNING
+    return logging.INFO
+
+
+def parse_levels(spec):
+    """'auto_points=DEBUG,points=WARNING' -> {"auto_points": 10, "points": 30}"""
+    levels = {}
+    for part in (spec or "").split(","):
+        if "=" not in part:
+            continue
+        module, level = part.split("=", 1)
+        value = logging.getLevelName(level.strip().upper())
+        if isinstance(value, int):
+            levels[module.strip().lower()] = value
+    return levels
+
+
+def setup_logging(writer, level=None, module_levels=None, path=LOG_FILE):
+    """Richtet Sinks und Level ein, gibt die LogQueue für Module und Bot zurück"""
+    root = logging.getLogger(ROOT)
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+        handler.close()
+    root.propagate = False
+
+    level = level or os.getenv("log_level", "INFO")
+    root.setLevel(logging.getLevelName(level.upper()) if isinstance(level, str) else level)
+    module_levels = parse_levels(os.getenv("log_levels")) if module_levels is None else module_levels
+    for module, module_level in module_levels.items():
+        get_logger(module).setLevel(module_level)
+
+    rate_limit = RateLimitFilter()
+    console = ConsoleSink(writer)
+    console.addFilter(rate_limit)
+    root.addHandler(console)
+    try:
+        file_sink = BatchedFileSink(path)
+        file_sink.addFilter(rate_limit)
+        root.addHandler(file_sink)
+    except OSError as e:
+        writer.put(f"[LOG] Could not open log file {path}: {str(e)}")
+    return LogQueue(writer)
+
+
+def shutdown_logging():
+    """Schreibt ausstehende Records und schließt alle Sinks"""
+    root = logging.getLogger(ROOT)
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+        handler.close()
@@ -0,0 +1,104 @@
+"""
+Sammelt Bursts gleicher Lese-Commands
+
+Tippen hunderte User gleichzeitig z.B. !coins, werden alle Aufrufe eines
+Kanals innerhalb eines kurzen Fensters gesammelt, mit einer Batch-Abfrage
+beantwortet und zu wenigen Chat-Nachrichten zusammengefasst
+("user1: 120 | user2: 45 | ..."). Aktiviert pro Command über
+CommandConfig.coalesce_window (Sekunden, 0 = aus).
+"""
+import asyncio
+
+from metrics import metrics
+from outbound import MAX_MESSAGE_LENGTH, SEPARATOR, reply
+
+
+def split_parts(parts, size):
+    """Teile, die allein nicht in eine Nachricht passen, hart in Stücke fester Länge trennen"""
+    for part in parts:
+        if len(part) <= size:
+            yield part
+        else:
+            yield from (part[start:start + size] for start in range(0, len(part), size))
+
+
+def pack(parts, prefix=""):
+    """Verteilt Teile auf möglichst wenige Nachrichten bis zur Längengrenze"""
+    messages = []
+    current = prefix
+    for part in split_parts(parts, max(MAX_MESSAGE_LENGTH - len(prefix), 1)):
+        if current != prefix and len(current) + len(SEPARATOR) + len(part) > MAX_MESSAGE_LENGTH:
+            messages.append(current)
+            current = prefix
+        current += part if current == prefix else SEPARATOR + part
+    if current != prefix:
+        messages.append(current)
+    return messages
+
+
+class CommandBatcher:
+    """Sammelt Aufrufe eines Commands pro Kanal und Argumenten und beantwortet sie gemeinsam
+
+    handler(ctxs, *args) bekommt alle gesammelten Aufrufe (erster zuerst) und
+    liefert (prefix, parts) für die zusammengefassten Antworten. Das Fenster wird
+    bei jedem neuen Batch aus dem aktuellen Config-Snapshot gelesen, Änderungen
+    an coalesce_window wirken also ohne Neustart. Bei 0 geht der Aufruf direkt an
+    single.
+    """
+
+    def __init__(self, module_name, name, single, handler, snapshot=None):
+        self.module_name = module_name
+        self.name = name
+        self.single = single
+        self.handler = handler
+        self.snapshot = snapshot
+        self.pending = {}
+
+    def window(self):
+        if self.snapshot is None:
+            try:
+                from configs import current_snapshot
+            except Exception:
+                return 0.0
+            self.snapshot = current_snapshot
+        config = self.snapshot().command(self.module_name, self.name)
+        return config.coalesce_window if config else 0.0
+
+    async def submit(self, ctx, *args):
+        key = (ctx.channel.name, args)
+        batch = self.pending.get(key)
+        if batch is None:
+            window = self.window()
+            if not window or window <= 0:
+                return await self.single(ctx, *args)
+            batch = self.pending[key] = []
+            asyncio.get_running_loop().call_later(window, self._flush, key)
+        batch.append(ctx)
+
+    def _flush(self, key):
+        batch = self.pending.pop(key, None)
+        if batch:
+            asyncio.create_task(self._answer(batch, key[1]))
+
+    async def _answer(self, ctxs, args):
+        metrics.inc("coalesced_batches", self.name, label_name="command")
+        metrics.inc("coalesced_invocations", self.name, len(ctxs), label_name="command")
+        try:
+            prefix, parts = await self.handler(ctxs, *args)
+        except Exception as e:
+            log_queue = getattr(ctxs[0].bot, 'log_queue', None)
+            if log_queue is not None:
+                log_queue.put(f"❌ [COALESCE] {self.name} batch of {len(ctxs)} failed: {str(e)}")
+            return
+        for message in pack(parts, prefix):
+            await reply(ctxs[0], message)
+
+
+def command(module_name, command_name, single, batch):
+    """Liefert den Handler für einen Command: gesammelt, solange coalesce_window gesetzt ist, sonst single"""
+    return CommandBatcher(module_name, command_name, single, batch).submit
+
+
+def unique_authors(ctxs):
+    """Namen der aufrufenden User ohne Doppelte, in Aufruf-Reihenfolge"""
+    return list(dict.fromkeys(ctx.author.name for ctx in ctxs))
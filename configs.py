@@ -1,12 +1,16 @@
 import os
+import copy
 import json
-import importlib
-import inspect
+import threading
 from pathlib import Path
 from datetime import datetime
+from types import MappingProxyType
 from typing import Dict, Any, Optional, List
 from dataclasses import dataclass, asdict
 from colorama import Fore, Style
+from introspect import ModuleManifest
+
+WATCH_INTERVAL = 2.0  # Sekunden zwischen zwei Prüfungen des Config-Watchers
 
 @dataclass
 class CommandConfig:
@@ -17,6 +21,7 @@ class CommandConfig:
     max_uses_per_user: int = 0  # 0 = unlimited
     channels: List[str] = None  # None = alle Kanäle
     aliases: List[str] = None  # Alternative Namen für den Command
+    coalesce_window: float = 0.0  # Sekunden, in denen gleiche Aufrufe gesammelt beantwortet werden (0 = aus)
     
     def __post_init__(self):
         if self.channels is None:
@@ -99,6 +104,60 @@ class PointsModuleConfig(ModuleConfig):
         if self.multiplier_events is None:
             self.multiplier_events = {"raid": 2.0, "host": 1.5}
 
+# (CommandConfig oder None, Modul aktiv, erlaubte Kanäle in Kleinbuchstaben oder None)
+DEFAULT_RULE = (None, True, None)
+
+class ConfigSnapshot:
+    """Unveränderlicher, vorkompilierter Stand aller Configs
+    
+    Wird bei jeder Änderung komplett neu gebaut und als Ganzes ausgetauscht,
+    Abfragen sind reine Dict-Lookups ohne Dateizugriff. Die enthaltenen Configs
+    sind Kopien und dürfen nicht verändert werden.
+    """
+    __slots__ = ("version", "modules", "commands", "rules", "module_rules", "defaults", "default_factory")
+    
+    def __init__(self, module_configs, version=0, default_factory=None):
+        modules = {}
+        commands = {}
+        rules = {}
+        module_rules = {}
+        for module_name, config in module_configs.items():
+            config = copy.deepcopy(config)
+            modules[module_name] = config
+            module_rules[module_name] = (None, config.enabled, None)
+            for command_name, cmd_config in config.commands.items():
+                channels = frozenset(c.lower() for c in cmd_config.channels) if cmd_config.channels else None
+                commands[(module_name, command_name)] = cmd_config
+                rules[(module_name, command_name)] = (cmd_config, config.enabled, channels)
+        
+        self.version = version
+        self.modules = MappingProxyType(modules)
+        self.commands = MappingProxyType(commands)
+        self.rules = MappingProxyType(rules)
+        self.module_rules = MappingProxyType(module_rules)
+        # Standard-Configs für Module ohne Datei, einmal pro Snapshot erzeugt
+        self.defaults = {}
+        self.default_factory = default_factory or (lambda module_name: ModuleConfig())
+    
+    def config(self, module_name: str) -> ModuleConfig:
+        """Config eines Moduls, ohne Datei die (zwischengespeicherte) Standard-Config"""
+        config = self.modules.get(module_name)
+        if config is None:
+            config = self.defaults.get(module_name)
+            if config is None:
+                config = self.defaults.setdefault(module_name, self.default_factory(module_name))
+        return config
+    
+    def command(self, module_name: str, command_name: str) -> Optional[CommandConfig]:
+        return self.commands.get((module_name, command_name))
+    
+    def rule(self, module_name: str, command_name: str):
+        """(CommandConfig oder None, Modul aktiv, Kanäle) für die Prüfung vor einem Command"""
+        rule = self.rules.get((module_name, command_name))
+        if rule is None:
+            return self.module_rules.get(module_name, DEFAULT_RULE)
+        return rule
+
 class ConfigManager:
     """Verwaltet alle Modul-Konfigurationen"""
     
@@ -120,6 +179,14 @@ class ConfigManager:
         
         self.loaded_configs = {}
         self.last_modified = {}
+        # Modul-Typ und Commands aus statischer Analyse, nach Dateiinhalt zwischengespeichert
+        self.manifest = ModuleManifest()
+        
+        # Aktueller Snapshot, wird nur als Ganzes ersetzt (None = noch nicht gebaut)
+        self.snapshot = None
+        self.lock = threading.RLock()
+        self.watcher = None
+        self.watcher_stop = threading.Event()
         
     def log(self, message):
         """Hilfsfunktion für Logging"""
@@ -129,38 +196,12 @@ class ConfigManager:
             print(f"[CONFIG] {message}")
     
     def detect_module_type(self, module_name: str) -> str:
-        """Erkennt den Typ eines Moduls basierend auf Code-Analyse"""
+        """Erkennt den Typ eines Moduls basierend auf Code-Analyse (ohne es auszuführen)"""
         try:
             module_path = self.modules_path / f"{module_name}.py"
             if not module_path.exists():
                 return "default"
-            
-            # Lade das Modul
-            spec = importlib.util.spec_from_file_location(module_name, module_path)
-            module = importlib.util.module_from_spec(spec)
-            spec.loader.exec_module(module)
-            
-            # Prüfe auf MODULE_TYPE Attribut
-            if hasattr(module, 'MODULE_TYPE'):
-                return module.MODULE_TYPE.lower()
-            
-            # Analysiere den Code für Hinweise
-            with open(module_path, 'r', encoding='utf-8') as f:
-                content = f.read().lower()
-            
-            # Heuristische Erkennung basierend auf Schlüsselwörtern
-            if any(word in content for word in ['game', 'player', 'score', 'leaderboard']):
-                return "game"
-            elif any(word in content for word in ['timeout', 'ban', 'moderate', 'filter']):
-                return "moderation"
-            elif any(word in content for word in ['points', 'coins', 'currency', 'reward']):
-                return "points"
-            elif any(word in content for word in ['api', 'request', 'weather', 'quote']):
-                return "utility"
-            elif any(word in content for word in ['chat', 'response', 'ai', 'reply']):
-                return "chatbot"
-            
-            return "default"
+            return self.manifest.info(module_path).module_type
             
         except Exception as e:
             self.log(f"Error detecting module type for {module_name}: {str(e)}")
@@ -168,35 +209,22 @@ class ConfigManager:
     
     def extract_commands_from_module(self, module_name: str) -> List[str]:
         """Extrahiert Command-Namen aus einem Modul"""
-        commands = []
         try:
             module_path = self.modules_path / f"{module_name}.py"
             if not module_path.exists():
-                return commands
-            
-            with open(module_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            # Suche nach @bot.command() Dekorationen
-            import re
-            command_pattern = r'@bot\.command\(\s*name\s*=\s*[\'"]([^\'"]+)[\'"]'
-            matches = re.findall(command_pattern, content)
-            commands.extend(matches)
-            
-            # Suche nach @bot.command() ohne expliziten Namen
-            function_pattern = r'@bot\.command\(\s*\)\s*async\s+def\s+(\w+)'
-            matches = re.findall(function_pattern, content)
-            commands.extend(matches)
-            
-            # Suche nach bot.add_command() Aufrufen
-            add_command_pattern = r'bot\.add_command\(\s*commands\.Command\(\s*name\s*=\s*[\'"]([^\'"]+)[\'"]'
-            matches = re.findall(add_command_pattern, content)
-            commands.extend(matches)
+                return []
+            return self.manifest.info(module_path).commands
             
         except Exception as e:
             self.log(f"Error extracting commands from {module_name}: {str(e)}")
-        
-        return list(set(commands))  # Entferne Duplikate
+            return []
+    
+    def save_manifest(self):
+        """Schreibt neue Analyse-Ergebnisse ins Modul-Manifest"""
+        try:
+            self.manifest.save()
+        except OSError as e:
+            self.log(f"Error saving module manifest: {str(e)}")
     
     def create_default_config(self, module_name: str) -> ModuleConfig:
         """Erstellt eine Standard-Konfiguration für ein Modul"""
@@ -290,53 +318,121 @@ class ConfigManager:
         """Speichert Konfiguration für ein Modul"""
         config_file = self.config_path / f"{module_name}.json"
         
-        try:
-            config_dict = self.config_to_dict(config)
-            
-            with open(config_file, 'w', encoding='utf-8') as f:
-                json.dump(config_dict, f, indent=2, ensure_ascii=False)
-            
-            self.loaded_configs[module_name] = config
-            self.last_modified[module_name] = config_file.stat().st_mtime
-            
-            self.log(f"Saved config for module: {module_name}")
-            
-        except Exception as e:
-            self.log(f"Error saving config for {module_name}: {str(e)}")
-    
-    def load_config(self, module_name: str) -> ModuleConfig:
-        """Lädt Konfiguration für ein Modul"""
-        config_file = self.config_path / f"{module_name}.json"
-        
-        # Prüfe ob bereits geladen und nicht verändert
-        if module_name in self.loaded_configs:
-            if config_file.exists():
-                current_mtime = config_file.stat().st_mtime
-                if current_mtime == self.last_modified.get(module_name, 0):
-                    return self.loaded_configs[module_name]
-        
-        # Lade oder erstelle Config
-        if config_file.exists():
+        with self.lock:
             try:
-                with open(config_file, 'r', encoding='utf-8') as f:
-                    config_dict = json.load(f)
+                config_dict = self.config_to_dict(config)
+                
+                with open(config_file, 'w', encoding='utf-8') as f:
+                    json.dump(config_dict, f, indent=2, ensure_ascii=False)
                 
-                config = self.dict_to_config(config_dict, module_name)
                 self.loaded_configs[module_name] = config
                 self.last_modified[module_name] = config_file.stat().st_mtime
+                self.publish()
                 
-                self.log(f"Loaded config for module: {module_name}")
-                return config
+                self.log(f"Saved config for module: {module_name}")
                 
             except Exception as e:
-                self.log(f"Error loading config for {module_name}: {str(e)}")
-                self.log("Creating default config...")
+                self.log(f"Error saving config for {module_name}: {str(e)}")
+    
+    def read_config(self, module_name: str, config_file: Path) -> ModuleConfig:
+        """Liest eine Config-Datei ein (ohne den Snapshot zu erneuern)"""
+        mtime = config_file.stat().st_mtime
+        with open(config_file, 'r', encoding='utf-8') as f:
+            config_dict = json.load(f)
         
-        # Erstelle Standard-Config
-        config = self.create_default_config(module_name)
-        self.save_config(module_name, config)
+        config = self.dict_to_config(config_dict, module_name)
+        self.loaded_configs[module_name] = config
+        self.last_modified[module_name] = mtime
+        
+        self.log(f"Loaded config for module: {module_name}")
         return config
     
+    def load_config(self, module_name: str) -> ModuleConfig:
+        """Lädt Konfiguration für ein Modul"""
+        config_file = self.config_path / f"{module_name}.json"
+        
+        with self.lock:
+            # Prüfe ob bereits geladen und nicht verändert
+            if module_name in self.loaded_configs:
+                if config_file.exists():
+                    current_mtime = config_file.stat().st_mtime
+                    if current_mtime == self.last_modified.get(module_name, 0):
+                        return self.loaded_configs[module_name]
+            
+            # Lade oder erstelle Config
+            if config_file.exists():
+                try:
+                    config = self.read_config(module_name, config_file)
+                    self.publish()
+                    return config
+                    
+                except Exception as e:
+                    self.log(f"Error loading config for {module_name}: {str(e)}")
+                    self.log("Creating default config...")
+            
+            # Erstelle Standard-Config
+            config = self.create_default_config(module_name)
+            self.save_config(module_name, config)
+            return config
+    
+    def publish(self):
+        """Baut aus den geladenen Configs einen neuen Snapshot und tauscht ihn aus"""
+        with self.lock:
+            version = self.snapshot.version + 1 if self.snapshot is not None else 1
+            self.snapshot = ConfigSnapshot(self.loaded_configs, version, self.create_default_config)
+            return self.snapshot
+    
+    def refresh(self) -> bool:
+        """Lädt neue und geänderte Config-Dateien und veröffentlicht sie als einen Snapshot
+        
+        Fehlerhafte Dateien (z.B. halb geschrieben) behalten den bisherigen Stand
+        und werden erst nach der nächsten Änderung wieder gelesen.
+        """
+        with self.lock:
+            changed = False
+            for config_file in self.config_path.glob("*.json"):
+                module_name = config_file.stem
+                try:
+                    mtime = config_file.stat().st_mtime
+                except OSError:
+                    continue
+                if mtime == self.last_modified.get(module_name):
+                    continue
+                try:
+                    self.read_config(module_name, config_file)
+                    changed = True
+                except Exception as e:
+                    self.last_modified[module_name] = mtime
+                    self.log(f"Error loading config for {module_name}, keeping previous config: {str(e)}")
+            
+            if changed or self.snapshot is None:
+                self.publish()
+                self.save_manifest()
+            return changed
+    
+    def start_watcher(self, interval: float = WATCH_INTERVAL):
+        """Startet den Hintergrund-Thread, der configs/ auf Änderungen prüft"""
+        if self.watcher is not None:
+            return
+        self.refresh()
+        self.watcher_stop.clear()
+        self.watcher = threading.Thread(target=self._watch, args=(interval,), name="config-watcher", daemon=True)
+        self.watcher.start()
+    
+    def stop_watcher(self):
+        if self.watcher is None:
+            return
+        self.watcher_stop.set()
+        self.watcher.join(timeout=5)
+        self.watcher = None
+    
+    def _watch(self, interval):
+        while not self.watcher_stop.wait(interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                self.log(f"Error watching configs: {str(e)}")
+    
     def get_command_config(self, module_name: str, command_name: str) -> Optional[CommandConfig]:
         """Holt Command-Konfiguration"""
         config = self.load_config(module_name)
@@ -363,10 +459,9 @@ class ConfigManager:
             return
         
         updated_count = 0
+        module_files = [f for f in self.modules_path.glob("*.py") if f.name != "__init__.py"]
         
-        for module_file in self.modules_path.glob("*.py"):
-            if module_file.name == "__init__.py":
-                continue
+        for module_file in module_files:
             
             module_name = module_file.stem
             config = self.load_config(module_name)
@@ -395,6 +490,11 @@ class ConfigManager:
             self.log(f"Updated {updated_count} module configs")
         else:
             self.log("All module configs are up to date")
+        
+        # Einträge gelöschter Module verwerfen, neue Analysen für den nächsten Start sichern
+        self.manifest.prune(module_files)
+        self.save_manifest()
+        self.log(f"Analyzed {self.manifest.analyzed} of {len(module_files)} modules (others unchanged)")
     
     def list_all_configs(self):
         """Listet alle verfügbaren Konfigurationen auf"""
@@ -413,29 +513,41 @@ class ConfigManager:
 # Globale Instanz
 config_manager = ConfigManager()
 
-# Convenience-Funktionen
+# Convenience-Funktionen (lesen nur aus dem Snapshot, ohne Dateizugriff)
+def current_snapshot() -> ConfigSnapshot:
+    """Aktueller Config-Snapshot, beim ersten Zugriff einmal aus configs/ gebaut"""
+    snapshot = config_manager.snapshot
+    if snapshot is None:
+        config_manager.refresh()
+        snapshot = config_manager.snapshot
+    return snapshot
+
 def get_config(module_name: str) -> ModuleConfig:
-    """Holt Konfiguration für ein Modul"""
-    return config_manager.load_config(module_name)
+    """Holt Konfiguration für ein Modul (ohne Datei die Standard-Config, Dateien legt scan_and_update_configs an)"""
+    return current_snapshot().config(module_name)
 
 def get_command_config(module_name: str, command_name: str) -> Optional[CommandConfig]:
     """Holt Command-Konfiguration"""
-    return config_manager.get_command_config(module_name, command_name)
+    return current_snapshot().command(module_name, command_name)
 
 def is_command_enabled(module_name: str, command_name: str) -> bool:
     """Prüft ob Command aktiviert ist"""
-    cmd_config = get_command_config(module_name, command_name)
+    cmd_config, module_enabled, _ = current_snapshot().rule(module_name, command_name)
     if not cmd_config:
         return True  # Default: aktiviert
     
-    module_config = get_config(module_name)
-    return module_config.enabled and cmd_config.enabled
+    return module_enabled and cmd_config.enabled
 
 def get_command_cooldown(module_name: str, command_name: str) -> int:
     """Holt Cooldown für Command"""
     cmd_config = get_command_config(module_name, command_name)
     return cmd_config.cooldown if cmd_config else 5
 
+def get_coalesce_window(module_name: str, command_name: str) -> float:
+    """Holt das Sammel-Fenster für Command-Bursts (0 = jeder Aufruf einzeln)"""
+    cmd_config = get_command_config(module_name, command_name)
+    return cmd_config.coalesce_window if cmd_config else 0.0
+
 def check_permission(module_name: str, command_name: str, user_level: str) -> bool:
     """Prüft Berechtigung für Command"""
     cmd_config = get_command_config(module_name, command_name)
@@ -459,6 +571,7 @@ def check_permission(module_name: str, command_name: str, user_level: str) -> bo
 def initialize_config_system(log_queue=None):
     """Initialisiert das Konfigurationssystem"""
     global config_manager
+    config_manager.stop_watcher()
     config_manager = ConfigManager(log_queue)
     config_manager.scan_and_update_configs()
     
@@ -0,0 +1,171 @@
+"""
+Zentrale Prüfung vor jedem Command
+
+Setzt die Einstellungen aus CommandConfig durch: enabled, channels,
+permission_level, cooldown (pro User und Command) und max_uses_per_user
+(pro Tag). Abgelehnte Aufrufe werden still verworfen und in den Metriken
+gezählt (command_rejected_<grund>).
+
+Cooldowns und Tageszähler liegen in Maps mit Ablaufzeit, abgelaufene Einträge
+räumt ein Zeitrad mit Sekunden-Slots weg. Lookup und Eintrag sind O(1) und der
+Speicher wächst auch bei Raids nur mit den User, die gerade im Cooldown sind
+bzw. heute ein Limit angebrochen haben (Zähler laufen um Mitternacht ab).
+"""
+import functools
+import os
+import time
+from datetime import datetime, timedelta
+
+from metrics import metrics
+
+WHEEL_SLOTS = 3600     # Sekunden, die das Zeitrad abdeckt (längere Cooldowns laufen mehrere Runden)
+PERMISSION_LEVELS = {"everyone": 0, "subscriber": 1, "vip": 2, "mod": 3, "owner": 4}
+BYPASS_LEVEL = PERMISSION_LEVELS["mod"]  # Mods und Owner haben keine Cooldowns/Limits
+
+
+class ExpiringMap:
+    """key -> (Ablaufzeit, Wert), abgelaufene Einträge werden über ein Zeitrad entfernt"""
+
+    def __init__(self, slots=WHEEL_SLOTS, now=None):
+        self.slots = slots
+        self.expiry = {}
+        self.values = {}
+        self.wheel = [[] for _ in range(slots)]
+        self.cursor = int(time.monotonic() if now is None else now)
+
+    def __len__(self):
+        return len(self.expiry)
+
+    def remaining(self, key, now):
+        """Restzeit in Sekunden (0 = nicht/nicht mehr vorhanden)"""
+        expires = self.expiry.get(key)
+        return expires - now if expires is not None and expires > now else 0.0
+
+    def get(self, key, now, default=None):
+        """Gespeicherter Wert, solange der Eintrag nicht abgelaufen ist"""
+        expires = self.expiry.get(key)
+        return self.values.get(key) if expires is not None and expires > now else default
+
+    def set(self, key, ttl, now, value=None):
+        self._advance(now)
+        expires = now + ttl
+        old = self.expiry.get(key)
+        self.expiry[key] = expires
+        self.values[key] = value
+        index = int(expires) % self.slots
+        # Ein lebender Eintrag steht schon im Slot seiner Ablaufzeit, nicht doppelt einhängen
+        if old is None or old <= now or int(old) % self.slots != index:
+            self.wheel[index].append(key)
+
+    def _advance(self, now):
+        # Nur vollständig vergangene Sekunden abarbeiten, deren Einträge sind sicher abgelaufen
+        second = int(now) - 1
+        if second <= self.cursor:
+            return
+        # Nach langer Pause reicht eine Runde über alle Slots
+        for tick in range(max(self.cursor + 1, second - self.slots + 1), second + 1):
+            index = tick % self.slots
+            slot = self.wheel[index]
+            if not slot:
+                continue
+            self.wheel[index] = []
+            # dict.fromkeys: ein Key kann nach mehrfachem Umsetzen doppelt im Slot stehen
+            for key in dict.fromkeys(slot):
+                expires = self.expiry.get(key)
+                if expires is None or int(expires) % self.slots != index:
+                    continue  # schon entfernt oder neu gesetzt (liegt in einem anderen Slot)
+                if expires <= now:
+                    del self.expiry[key]
+                    del self.values[key]
+                else:
+                    self.wheel[index].append(key)  # erst in einer späteren Runde fällig
+        self.cursor = second
+
+
+def seconds_until_midnight(ts=None):
+    """Sekunden bis zum nächsten lokalen Tageswechsel"""
+    ts = time.time() if ts is None else ts
+    tomorrow = datetime.fromtimestamp(ts).date() + timedelta(days=1)
+    return datetime.combine(tomorrow, datetime.min.time()).timestamp() - ts
+
+
+def user_level(ctx):
+    """Berechtigungsstufe des Aufrufers aus den Twitch-Badges"""
+    author = ctx.author
+    owner_id = os.getenv("owner_id")
+    if getattr(author, "is_broadcaster", False) or (owner_id and str(getattr(author, "id", "")) == owner_id):
+        return "owner"
+    if getattr(author, "is_mod", False):
+        return "mod"
+    if getattr(author, "is_vip", False):
+        return "vip"
+    if getattr(author, "is_subscriber", False):
+        return "subscriber"
+    return "everyone"
+
+
+class CommandGate:
+    """Entscheidet vor jedem Command, ob er ausgeführt wird"""
+
+    def __init__(self, snapshot=None, now=None):
+        # Liefert den aktuellen ConfigSnapshot (Standard: configs.current_snapshot)
+        self.snapshot = snapshot
+        self.cooldowns = ExpiringMap(now=now)
+        # Aufrufe pro User und Command, jeder Zähler läuft am Ende des Tages ab
+        self.uses = ExpiringMap(now=now)
+
+    def rule(self, module_name, command_name):
+        if self.snapshot is None:
+            try:
+                from configs import current_snapshot
+            except Exception:
+                return None, True, None
+            self.snapshot = current_snapshot
+        return self.snapshot().rule(module_name, command_name)
+
+    def check(self, module_name, command_name, ctx, now=None):
+        """None wenn erlaubt, sonst der Ablehnungsgrund"""
+        if module_name is None:
+            return None
+        now = time.monotonic() if now is None else now
+        config, module_enabled, channels = self.rule(module_name, command_name)
+        if not module_enabled:
+            return "disabled"
+        if config is None:
+            return None
+        if not config.enabled:
+            return "disabled"
+        if channels and ctx.channel.name.lower() not in channels:
+            return "channel"
+
+        level = PERMISSION_LEVELS.get(user_level(ctx), 0)
+        if level < PERMISSION_LEVELS.get(config.permission_level, 0):
+            return "permission"
+        if level >= BYPASS_LEVEL:
+            return None
+
+        user_key = (command_name, ctx.author.name.lower())
+        if config.cooldown > 0 and self.cooldowns.remaining(user_key, now):
+            return "cooldown"
+        if config.max_uses_per_user > 0:
+            used = self.uses.get(user_key, now, 0)
+            if used >= config.max_uses_per_user:
+                return "limit"
+            self.uses.set(user_key, seconds_until_midnight(), now, used + 1)
+        if config.cooldown > 0:
+            self.cooldowns.set(user_key, config.cooldown, now)
+        return None
+
+    def wrap(self, module_name, command_name, func):
+        """Umhüllt einen Command-Handler, abgelehnte Aufrufe kehren sofort zurück"""
+        @functools.wraps(func)
+        async def gated(ctx, *args, **kwargs):
+            reason = self.check(module_name, command_name, ctx)
+            if reason is not None:
+                metrics.inc(f"command_rejected_{reason}", command_name, label_name="command")
+                return None
+            return await func(ctx, *args, **kwargs)
+        return gated
+
+    def stats(self):
+        return {"cooldowns": len(self.cooldowns), "capped_users": len(self.uses)}
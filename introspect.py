@@ -0,0 +1,163 @@
+"""
+Statische Analyse der Bot-Module
+
+Ermittelt Modul-Typ und Command-Namen aus dem Syntaxbaum, ohne den Code
+auszuführen (Module mit Seiteneffekten beim Import, z.B. Datenbank-Setup,
+laufen so nicht doppelt). Ergebnisse landen in einem Manifest mit dem SHA-256
+des Dateiinhalts als Schlüssel, beim Start werden nur geänderte Dateien neu
+analysiert.
+"""
+import ast
+import hashlib
+import json
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List
+
+MANIFEST_FILE = Path(".cache") / "modules.json"
+MANIFEST_VERSION = 1  # Erhöhen, wenn sich das Ergebnis der Analyse ändert
+
+# Heuristik für Module ohne MODULE_TYPE (Reihenfolge = Vorrang)
+TYPE_KEYWORDS = (
+    ("game", ("game", "player", "score", "leaderboard")),
+    ("moderation", ("timeout", "ban", "moderate", "filter")),
+    ("points", ("points", "coins", "currency", "reward")),
+    ("utility", ("api", "request", "weather", "quote")),
+    ("chatbot", ("chat", "response", "ai", "reply")),
+)
+
+
+@dataclass(frozen=True)
+class ModuleInfo:
+    """Ergebnis der Analyse einer Modul-Datei"""
+    module_type: str
+    commands: List[str]
+
+
+def _string(node):
+    return node.value if isinstance(node, ast.Constant) and isinstance(node.value, str) else None
+
+
+def _keyword(call, name):
+    for keyword in call.keywords:
+        if keyword.arg == name:
+            return _string(keyword.value)
+    return None
+
+
+def _is_bot_call(node, attr):
+    """bot.<attr>(...)"""
+    return (isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute)
+            and node.func.attr == attr and isinstance(node.func.value, ast.Name) and node.func.value.id == "bot")
+
+
+def declared_type(tree):
+    """Wert einer MODULE_TYPE = "..." Zuweisung auf Modulebene"""
+    for node in tree.body:
+        if isinstance(node, ast.Assign):
+            targets = node.targets
+        elif isinstance(node, ast.AnnAssign) and node.value is not None:
+            targets = [node.target]
+        else:
+            continue
+        if any(isinstance(target, ast.Name) and target.id == "MODULE_TYPE" for target in targets):
+            value = _string(node.value)
+            if value:
+                return value.lower()
+    return None
+
+
+def find_commands(tree):
+    """Namen aus @bot.command(...) und bot.add_command(commands.Command(name=...))"""
+    found = []
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            for decorator in node.decorator_list:
+                if _is_bot_call(decorator, "command"):
+                    found.append(_keyword(decorator, "name") or node.name)
+        elif _is_bot_call(node, "add_command") and node.args and isinstance(node.args[0], ast.Call):
+            name = _keyword(node.args[0], "name")
+            if name:
+                found.append(name)
+    return list(dict.fromkeys(found))  # Entferne Duplikate, Reihenfolge bleibt
+
+
+def guess_type(source):
+    content = source.lower()
+    for module_type, words in TYPE_KEYWORDS:
+        if any(word in content for word in words):
+            return module_type
+    return "default"
+
+
+def analyze_source(source):
+    """ModuleInfo aus Quelltext, wirft SyntaxError bei ungültigem Code"""
+    tree = ast.parse(source)
+    return ModuleInfo(declared_type(tree) or guess_type(source), find_commands(tree))
+
+
+class ModuleManifest:
+    """Cache der Analyse-Ergebnisse: Pfad -> (Inhalts-Hash, Typ, Commands)"""
+
+    def __init__(self, path=MANIFEST_FILE):
+        self.path = Path(path)
+        self.entries = {}
+        self.dirty = False
+        self.analyzed = 0
+        self.lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("version") == MANIFEST_VERSION:
+            self.entries = data.get("modules", {})
+
+    def info(self, module_path):
+        """ModuleInfo einer Datei, analysiert nur bei neuem oder geändertem Inhalt"""
+        module_path = Path(module_path)
+        raw = module_path.read_bytes()
+        digest = hashlib.sha256(raw).hexdigest()
+        key = module_path.as_posix()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry["hash"] == digest:
+                return ModuleInfo(entry["type"], list(entry["commands"]))
+
+        info = analyze_source(raw.decode("utf-8"))
+        with self.lock:
+            self.entries[key] = {"hash": digest, "type": info.module_type, "commands": info.commands}
+            self.dirty = True
+            self.analyzed += 1
+        return info
+
+    def prune(self, module_paths):
+        """Entfernt Einträge für Dateien, die es nicht mehr gibt"""
+        keep = {Path(path).as_posix() for path in module_paths}
+        with self.lock:
+            for key in [key for key in self.entries if key not in keep]:
+                del self.entries[key]
+                self.dirty = True
+
+    def save(self):
+        """Schreibt das Manifest, falls sich etwas geändert hat (atomar über eine Temp-Datei)"""
+        with self.lock:
+            if not self.dirty:
+                return False
+            data = {"version": MANIFEST_VERSION, "modules": dict(sorted(self.entries.items()))}
+            self.dirty = False
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=2)
+            os.replace(tmp, self.path)
+        except OSError:
+            self.dirty = True
+            raise
+        return True
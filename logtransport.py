@@ -0,0 +1,116 @@
+"""
+Log-Transport vom Bot-Prozess zur Console
+
+Der Bot-Prozess sammelt Log-Zeilen in einem begrenzten Puffer und ein
+Hintergrund-Thread schickt sie gebündelt über eine Pipe. Die Console blockiert
+auf der Pipe statt zu pollen. Ist der Puffer voll (Console kommt nicht
+hinterher), werden neue Zeilen verworfen und gezählt.
+"""
+import threading
+import time
+from collections import deque
+
+BATCH_SIZE = 200        # Zeilen pro Sendung
+BATCH_DELAY = 0.02      # Sekunden, die eine Zeile höchstens auf ihre Sendung wartet
+MAX_BUFFERED = 10000    # Zeilen im Puffer, darüber wird verworfen
+
+
+class LogWriter:
+    """Ersatz für log_queue im Bot-Prozess: put() puffert nur, gesendet wird im Hintergrund"""
+
+    def __init__(self, conn, batch_size=BATCH_SIZE, batch_delay=BATCH_DELAY, max_buffered=MAX_BUFFERED):
+        self.conn = conn
+        self.batch_size = batch_size
+        self.batch_delay = batch_delay
+        self.max_buffered = max_buffered
+        self.buffer = deque()
+        self.dropped = 0
+        self.sent = 0
+        self.batches = 0
+        self._reported_dropped = 0
+        self._wakeup = threading.Condition(threading.Lock())
+        self._closed = False
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+        return self
+
+    def put(self, message):
+        """Reiht eine Log-Zeile ein, gibt False zurück wenn sie verworfen wurde"""
+        with self._wakeup:
+            if len(self.buffer) >= self.max_buffered:
+                self.dropped += 1
+                return False
+            self.buffer.append(message)
+            # Erste Zeile weckt den Sender (der dann kurz sammelt), ein voller Batch sowieso
+            if len(self.buffer) == 1 or len(self.buffer) >= self.batch_size:
+                self._wakeup.notify()
+        return True
+
+    put_nowait = put
+
+    def _take_batch(self):
+        with self._wakeup:
+            if not self.buffer and not self._closed:
+                self._wakeup.wait()
+            batch = [self.buffer.popleft() for _ in range(min(len(self.buffer), self.batch_size))]
+            if self.dropped != self._reported_dropped:
+                batch.append(f"[LOG] Dropped {self.dropped - self._reported_dropped} log lines (console too slow)")
+                self._reported_dropped = self.dropped
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._take_batch()
+            if not batch:
+                if self._closed:
+                    break
+                continue
+            # Kurz sammeln, damit einzelne Zeilen nicht je eine Sendung kosten
+            if len(batch) < self.batch_size and not self._closed:
+                time.sleep(self.batch_delay)
+                with self._wakeup:
+                    while self.buffer and len(batch) < self.batch_size:
+                        batch.append(self.buffer.popleft())
+            try:
+                self.conn.send(batch)
+            except (OSError, EOFError, BrokenPipeError):
+                break  # Console beendet
+            self.sent += len(batch)
+            self.batches += 1
+
+    def close(self, timeout=2):
+        """Sendet restliche Zeilen und beendet den Hintergrund-Thread"""
+        with self._wakeup:
+            self._closed = True
+            self._wakeup.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        try:
+            self.conn.close()
+        except OSError:
+            pass
+
+    def stats(self):
+        return {"buffered": len(self.buffer), "sent": self.sent, "batches": self.batches, "dropped": self.dropped}
+
+
+def start_reader(conn, log_queue, prefix=""):
+    """Console-Seite: blockiert auf der Pipe und reicht Zeilen an die lokale log_queue weiter
+
+    prefix kennzeichnet die Zeilen, wenn mehrere Prozesse in dieselbe Console loggen (Shards).
+    """
+    def run():
+        while True:
+            try:
+                batch = conn.recv()
+            except (EOFError, OSError):
+                break  # Bot-Prozess beendet
+            for message in batch:
+                log_queue.put(prefix + message if prefix else message)
+
+    thread = threading.Thread(target=run, name="log-reader", daemon=True)
+    thread.start()
+    return thread
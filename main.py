@@ -10,10 +10,16 @@ from dotenv import load_dotenv
 from colorama import *
 from twitchio.ext import commands
 import multiprocessing
-from queue import Queue
+from queue import Queue, Empty
 import signal
 import asyncio
-from modules.elchcoins import coinmanager
+from logtransport import LogWriter, start_reader
+from botlog import setup_logging, shutdown_logging
+from rpc import RpcClient, RpcError, RpcServer
+from metrics import metrics, start_http_server
+from sharding import ShardSupervisor, ShardedRpc
+from outbound import NORMAL, SendScheduler
+from gate import CommandGate
 
 init()
 
@@ -72,11 +78,53 @@ required_env_vars = [
     "prefix"
 ]
 
+SLOW_HOOK_SECONDS = 0.005
+SHUTDOWN_TIMEOUT = 10  # Sekunden, die der Bot-Prozess nach 'exit' zum Aufräumen bekommt
+TRANSFER_TIMEOUT = 3600  # Sekunden, nach denen die Console nicht mehr auf Import/Export wartet
+
+class MessageHook:
+    """Ein registrierter on_message-Hook mit Laufzeit- und Fehlerstatistik"""
+    __slots__ = ("name", "func", "is_async", "calls", "errors", "total", "max", "slow", "histogram")
+
+    def __init__(self, name, func):
+        self.name = name
+        self.func = func
+        self.is_async = inspect.iscoroutinefunction(func)
+        self.histogram = metrics.histogram("hook_seconds", name, label_name="hook")
+        self.calls = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.slow = 0
+
+    def record(self, seconds):
+        self.histogram.observe(seconds)
+        self.calls += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        if seconds > SLOW_HOOK_SECONDS:
+            self.slow += 1
+
+    def stats(self):
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "slow": self.slow,
+            "avg_us": round(self.total / self.calls * 1e6, 1) if self.calls else 0.0,
+            "max_us": round(self.max * 1e6, 1),
+        }
+
 class ModuleManager:
     def __init__(self, bot, log_queue):
         self.bot = bot
         self.log_queue = log_queue
+        self.loading = None  # Modul, dessen setup_command gerade läuft (ordnet Commands ihrem Modul zu)
         self.modules = {}
+        # on_message-Hooks der Module; message_hooks ist ein vorberechnetes Tupel für den Dispatch
+        self.hooks_by_name = {}
+        self.message_hooks = ()
+        self.hook_tasks = set()
         self.modules_path = Path("modules")
         
         # Erstelle modules Ordner falls nicht vorhanden
@@ -111,7 +159,11 @@ class ModuleManager:
                     setup_func = getattr(module, 'setup_command')
                     
                     # Rufe setup_command auf
-                    setup_func(self.bot, self.log_queue)
+                    self.loading = module_name
+                    try:
+                        setup_func(self.bot, self.log_queue)
+                    finally:
+                        self.loading = None
                     
                     self.modules[module_name] = module
                     loaded_count += 1
@@ -135,13 +187,19 @@ class ModuleManager:
             # Entferne alte Commands
             if hasattr(self.modules[module_name], 'cleanup_command'):
                 self.modules[module_name].cleanup_command(self.bot)
+            # Hooks der alten Modul-Version nicht weiterlaufen lassen
+            self.remove_message_hook(module_name)
             
             # Lade Modul neu
             importlib.reload(self.modules[module_name])
             
             # Setup neue Commands
             if hasattr(self.modules[module_name], 'setup_command'):
-                self.modules[module_name].setup_command(self.bot, self.log_queue)
+                self.loading = module_name
+                try:
+                    self.modules[module_name].setup_command(self.bot, self.log_queue)
+                finally:
+                    self.loading = None
                 self.log_queue.put(f"{Fore.GREEN}[MODULE]{Style.RESET_ALL} Reloaded {module_name}")
                 return True
             
@@ -159,9 +217,57 @@ class ModuleManager:
         self.log_queue.put(f"{Fore.CYAN}[MODULE]{Style.RESET_ALL} Loaded modules:")
         for module_name in self.modules:
             self.log_queue.put(f"  - {module_name}")
+        
+        if self.message_hooks:
+            self.log_queue.put(f"{Fore.CYAN}[MODULE]{Style.RESET_ALL} Message hooks:")
+            for name, stats in self.hook_stats().items():
+                self.log_queue.put(
+                    f"  - {name}: {stats['calls']} calls, avg {stats['avg_us']}us, max {stats['max_us']}us, "
+                    f"{stats['slow']} slow, {stats['errors']} errors"
+                )
+    
+    def add_message_hook(self, name, func):
+        """Registriert einen on_message-Hook (sync oder async), ersetzt einen vorhandenen gleichen Namens"""
+        self.hooks_by_name[name] = MessageHook(name, func)
+        self.message_hooks = tuple(self.hooks_by_name.values())
+    
+    def remove_message_hook(self, name):
+        if self.hooks_by_name.pop(name, None) is not None:
+            self.message_hooks = tuple(self.hooks_by_name.values())
+    
+    def hook_stats(self):
+        """Laufzeit- und Fehlerstatistik pro Hook"""
+        return {hook.name: hook.stats() for hook in self.message_hooks}
+    
+    def dispatch_message(self, message):
+        """Ruft alle Hooks auf; async-Hooks laufen als eigener Task, damit sie Commands nicht aufhalten"""
+        perf = time.perf_counter
+        for hook in self.message_hooks:
+            start = perf()
+            try:
+                if hook.is_async:
+                    task = asyncio.create_task(hook.func(message))
+                    self.hook_tasks.add(task)
+                    task.add_done_callback(lambda t, hook=hook: self._hook_done(hook, t))
+                else:
+                    hook.func(message)
+            except Exception as e:
+                self._hook_error(hook, e)
+            hook.record(perf() - start)
+    
+    def _hook_done(self, hook, task):
+        self.hook_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            self._hook_error(hook, task.exception())
+    
+    def _hook_error(self, hook, error):
+        hook.errors += 1
+        # Ein dauerhaft fehlerhafter Hook soll das Log nicht fluten
+        if hook.errors == 1 or hook.errors % 100 == 0:
+            self.log_queue.put(f"{Fore.RED}[MODULE]{Style.RESET_ALL} Message hook {hook.name} failed ({hook.errors}x): {str(error)}")
 
 class Bot(commands.Bot):
-    def __init__(self, log_queue, command_queue):
+    def __init__(self, log_queue, command_conn, channels=None, shard_id=None):
         super().__init__(
             token=os.getenv("access_token"),
             client_id=os.getenv("client_id"),
@@ -169,94 +275,247 @@ class Bot(commands.Bot):
             bot_id=os.getenv("bot_id"),
             owner_id=os.getenv("owner_id"),
             prefix=os.getenv("prefix"),
-            initial_channels=[c.strip() for c in os.getenv("channel").split(",") if c.strip()]
+            initial_channels=channels or parse_channels()
         )
+        self.shard_id = shard_id
         self.log_queue = log_queue
-        self.command_queue = command_queue
+        self.rpc = RpcServer(command_conn)
         self.module_manager = ModuleManager(self, log_queue)
-        self.running = True
+        self.started_at = time.time()
+        self.message_meter = metrics.meter("messages", label_name="channel")
+        self.metrics_started = False
+        # Alle Chat-Nachrichten laufen über den Send-Scheduler (Twitch-Limits, Prioritäten)
+        self.sender = SendScheduler(log_queue, moderator_channels=parse_channels("mod_channels"))
+        # Cooldowns, Berechtigungen und Limits aus der CommandConfig
+        self.gate = CommandGate()
+    
+    def command(self, *args, name=None, **kwargs):
+        """Wie commands.Bot.command, prüft aber jeden Aufruf (gate.py) und misst ihn (command_seconds)"""
+        register = super().command(*args, name=name, **kwargs)
+        def decorator(func):
+            command_name = name or func.__name__
+            timed = metrics.timed("command_seconds", command_name, func, label_name="command")
+            return register(self.gate.wrap(self.module_manager.loading, command_name, timed))
+        return decorator
+    
+    def start_metrics(self):
+        """Loop-Lag-Messung, Queue-Gauges und optional der HTTP-Endpunkt (env metrics_port)"""
+        from modules.elchcoins import async_coinmanager
+        
+        self.metrics_started = True
+        asyncio.create_task(metrics.monitor_loop_lag())
+        metrics.gauge("loop_lag_seconds_last", lambda: metrics.loop_lag)
+        metrics.gauge("db_queue_depth", async_coinmanager.pending)
+        if self.shard_id is None:
+            # Der Write-Behind-Puffer liegt nur im Prozess, der die Datenbank besitzt
+            from modules.elchcoins import coinmanager
+            metrics.gauge("write_behind_pending", lambda: coinmanager.write_behind.pending_count() if coinmanager.write_behind else 0)
+        metrics.gauge("log_buffer", lambda: len(self.log_queue.writer.buffer))
+        metrics.gauge("log_dropped", lambda: self.log_queue.writer.dropped)
+        metrics.gauge("log_file_pending", lambda: self.log_queue.stats().get("file_pending", 0))
+        metrics.gauge("hook_tasks", lambda: len(self.module_manager.hook_tasks))
+        metrics.gauge("outbound_pending", self.sender.pending)
+        metrics.gauge("command_cooldowns", lambda: len(self.gate.cooldowns))
+        
+        port = os.getenv("metrics_port")
+        if port:
+            try:
+                start_http_server(int(port))
+                self.log_queue.put(f"{Fore.GREEN}[METRICS]{Style.RESET_ALL} Serving Prometheus metrics on http://127.0.0.1:{port}/metrics")
+            except (OSError, ValueError) as e:
+                self.log_queue.put(f"{Fore.RED}[METRICS]{Style.RESET_ALL} Could not start metrics endpoint: {str(e)}")
 
     async def event_ready(self):
         channels = ", ".join([channel.name for channel in self.connected_channels])
         self.log_queue.put(f"{Fore.GREEN}[BOT]{Style.RESET_ALL} Connected as {Fore.CYAN}{self.nick}{Style.RESET_ALL} to channels: {Fore.YELLOW}{channels}{Style.RESET_ALL}")
         
+        # Im eigenen Kanal ist der Bot immer Moderator
+        self.sender.set_moderator(self.nick, True)
+        
+        # Metriken nur einmal starten (event_ready kommt bei jedem Reconnect)
+        if not self.metrics_started:
+            self.start_metrics()
+        
         # Lade Module nach Bot-Start
         self.module_manager.load_modules()
         
         # Starte Command Handler
         asyncio.create_task(self.handle_console_commands())
 
+    async def event_userstate(self, user):
+        """Moderator-Status des Bots pro Kanal (bestimmt die Sende-Limits)"""
+        channel = getattr(user, "channel", None)
+        is_mod = getattr(user, "is_mod", None)
+        if channel is not None and is_mod is not None:
+            self.sender.set_moderator(channel.name, bool(is_mod))
+    
     async def event_message(self, message):
         if message.echo:
             return
         
-        # Auto-Reward: Füge aktive User hinzu
-        try:
-            from modules.auto_points import add_active_user
-            add_active_user(message.author.name, self.log_queue)
-        except ImportError:
-            pass  # Modul nicht geladen
-        except Exception as e:
-            self.log_queue.put(f"[AUTO-REWARD] Error adding active user: {str(e)}")
+        self.message_meter.mark(message.channel.name)
+        
+        # on_message-Hooks der Module (z.B. Auto-Reward)
+        self.module_manager.dispatch_message(message)
         
         await self.handle_commands(message)
     
     async def handle_console_commands(self):
-        """Behandelt Befehle aus der Console"""
-        import asyncio
+        """Beantwortet Befehle aus der Console (RPC, siehe rpc.py)"""
+        try:
+            await self.rpc.serve(self.resolve_console_command, self.log_queue)
+        except Exception as e:
+            self.log_queue.put(f"{Fore.RED}[BOT]{Style.RESET_ALL} Command handler error: {str(e)}")
+    
+    def resolve_console_command(self, command):
+        """Console-Befehl -> async-Methode rpc_<command>"""
+        if not isinstance(command, str) or not command.isidentifier():
+            return None
+        return getattr(self, f"rpc_{command}", None)
+    
+    async def rpc_status(self):
+        from modules.elchcoins import async_coinmanager
+        return {
+            "nick": self.nick,
+            "channels": [channel.name for channel in self.connected_channels],
+            "uptime": int(time.time() - self.started_at),
+            "modules": len(self.module_manager.modules),
+            "db_pending": async_coinmanager.pending(),
+            "log": self.log_queue.stats(),
+        }
+    
+    async def rpc_stats(self):
+        return metrics.snapshot()
+    
+    async def rpc_modules(self):
+        return {
+            "modules": list(self.module_manager.modules),
+            "hooks": self.module_manager.hook_stats(),
+        }
+    
+    async def rpc_reload(self, module_name):
+        if module_name not in self.module_manager.modules:
+            raise ValueError(f"Module {module_name} not found")
+        if not self.module_manager.reload_module(module_name):
+            raise RuntimeError(f"Failed to reload {module_name} (see log)")
+        return {"module": module_name}
+    
+    async def rpc_send(self, message, target_channel=None):
+        if not message:
+            raise ValueError("No message provided")
+        if target_channel:
+            # Sende an bestimmten Kanal
+            channel = self.get_channel(target_channel)
+            if not channel:
+                raise ValueError(f"Channel #{target_channel} not found")
+            channels = [channel]
+        else:
+            # Sende an alle verbundenen Kanäle
+            channels = list(self.connected_channels)
+        for channel in channels:
+            self.sender.send(channel, message, NORMAL)
+        return {"channels": [channel.name for channel in channels]}
+    
+    async def rpc_points(self, action, *args):
+        """Punkte-Aktionen der Console, alle Schreibzugriffe laufen über den Coin-Store dieses Prozesses"""
+        from modules.elchcoins import async_coinmanager
         
-        while self.running:
-            try:
-                if not self.command_queue.empty():
-                    command_data = self.command_queue.get_nowait()
-                    command = command_data.get('command')
-                    args = command_data.get('args', [])
-                    
-                    if command == 'modules':
-                        self.module_manager.list_modules()
-                    elif command == 'reload':
-                        if args:
-                            module_name = args[0]
-                            self.module_manager.reload_module(module_name)
-                        else:
-                            self.log_queue.put(f"{Fore.RED}[MODULE]{Style.RESET_ALL} Usage: reload <module_name>")
-                    elif command == 'send':
-                        if args:
-                            message = args[0]
-                            target_channel = args[1] if len(args) > 1 else None
-                            
-                            if target_channel:
-                                # Sende an bestimmten Kanal
-                                channel = self.get_channel(target_channel)
-                                if channel:
-                                    await channel.send(message)
-                                    self.log_queue.put(f"{Fore.GREEN}[SEND]{Style.RESET_ALL} Message sent to #{target_channel}")
-                                else:
-                                    self.log_queue.put(f"{Fore.RED}[SEND]{Style.RESET_ALL} Channel #{target_channel} not found")
-                            else:
-                                # Sende an alle verbundenen Kanäle
-                                for channel in self.connected_channels:
-                                    await channel.send(message)
-                                self.log_queue.put(f"{Fore.GREEN}[SEND]{Style.RESET_ALL} Message sent to all channels")
-                        else:
-                            self.log_queue.put(f"{Fore.RED}[SEND]{Style.RESET_ALL} No message provided")
-                    elif command == 'exit':
-                        self.running = False
-                        break
-                        
-                await asyncio.sleep(0.1)
-            except Exception as e:
-                self.log_queue.put(f"{Fore.RED}[BOT]{Style.RESET_ALL} Command handler error: {str(e)}")
-                await asyncio.sleep(0.1)
+        if action == "see":
+            return {"points": await async_coinmanager.get_user_points(args[0])}
+        elif action == "add":
+            await async_coinmanager.give_user_points(args[0], args[1], source="console")
+            return {}
+        elif action == "remove":
+            await async_coinmanager.take_user_points(args[0], args[1], source="console")
+            return {}
+        elif action == "reset":
+            return {"removed": await async_coinmanager.reset_user_points(args[0], source="console")}
+        elif action == "top":
+            count, page = args
+            return {
+                "users": await async_coinmanager.get_leaderboard_page(page, count),
+                "total": await async_coinmanager.get_user_count(),
+            }
+        elif action == "history":
+            return {"entries": await async_coinmanager.get_history(args[0], args[1])}
+        elif action == "export":
+            return {"count": await async_coinmanager.export_points(args[0], args[1])}
+        elif action == "import":
+            path, mode, fmt = args
+            progress = lambda n: self.log_queue.put(f"{Fore.YELLOW}[INFO]{Style.RESET_ALL} Import progress: {n} rows read...")
+            read, changed, skipped = await async_coinmanager.import_points(path, mode, fmt, progress)
+            return {"read": read, "changed": changed, "skipped": skipped}
+        raise ValueError(f"Unknown points action: {action}")
+    
+    async def rpc_store(self, address, authkey):
+        """Shard: nach einem Neustart des Coin-Stores mit dessen neuer Adresse verbinden"""
+        from modules.elchcoins import async_coinmanager
+        
+        if self.shard_id is None:
+            raise ValueError("Not running as shard")
+        async_coinmanager.connect_store(address, authkey)
+        return {}
+    
+    async def rpc_exit(self):
+        """Schließt den Bot, asyncio.run in run_bot kehrt zurück und räumt im finally auf"""
+        from modules.elchcoins import async_coinmanager
+        # Noch gesammelte Anwesenheiten vor dem Beenden abgeben
+        async_coinmanager.flush_presence()
+        self.closing = asyncio.create_task(self.close())
+        return {}
+
+def parse_channels(var="channel"):
+    """Kommagetrennte Kanalliste aus einer env-Variable"""
+    return [c.strip() for c in os.getenv(var, "").split(",") if c.strip()]
 
-def run_bot(log_queue, command_queue):
+def run_bot(log_conn, command_conn, shard=None):
+    """Bot-Prozess; mit shard ({"id", "channels", "store"}) als einer von mehreren Shards"""
     import asyncio
+    # Die Signal-Handler der Console nicht übernehmen: SIGTERM beendet den Prozess,
+    # Ctrl+C bricht asyncio.run ab und die finally-Blöcke laufen noch
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.default_int_handler)
+    # Ohne Shards öffnet nur der Bot-Prozess die Coin-Datenbank (einziger Schreiber),
+    # mit Shards der Coin-Store-Prozess (siehe sharding.py), Shards importieren coinmanager nicht
+    from modules.elchcoins import async_coinmanager
+    if shard is None:
+        from modules.elchcoins import coinmanager
+    import configs
     
+    # Log-Zeilen gebündelt über die Pipe an die Console schicken, Level/Filter und Log-Datei über botlog
+    writer = LogWriter(log_conn).start()
+    if shard is None:
+        log_queue = setup_logging(writer)
+    else:
+        log_queue = setup_logging(writer, path=os.path.join("logs", f"elchbot-shard{shard['id']}.log"))
     try:
-        bot = Bot(log_queue, command_queue)
+        # Config-Änderungen erkennt ein Hintergrund-Thread, Commands lesen nur den Snapshot
+        configs.config_manager.log_queue = log_queue
+        configs.config_manager.start_watcher()
+        if shard is None:
+            coinmanager.init()
+            # Punkte-Änderungen puffern (Journal überlebt Abstürze)
+            replayed = coinmanager.enable_write_behind()
+            if replayed:
+                log_queue.put(f"{Fore.YELLOW}[COINS]{Style.RESET_ALL} Replayed {replayed} unflushed journal entries")
+            coinmanager.start_ledger_maintenance()
+            bot = Bot(log_queue, command_conn)
+        else:
+            async_coinmanager.connect_store(*shard["store"])
+            bot = Bot(log_queue, command_conn, channels=shard["channels"], shard_id=shard["id"])
         asyncio.run(bot.run())
     except Exception as e:
         log_queue.put(f"{Fore.RED}[BOT ERROR]{Style.RESET_ALL} {str(e)}")
+    finally:
+        configs.config_manager.stop_watcher()
+        if shard is None:
+            coinmanager.stop_ledger_maintenance()
+            # DB-Worker erst leeren (gesammelte Anwesenheiten), dann speichern
+            async_coinmanager.shutdown()
+            coinmanager.save_streaks()
+            coinmanager.disable_write_behind()
+        shutdown_logging()
+        writer.close()
 
 def log_handler():
     """Behandelt Log-Nachrichten aus der Queue"""
@@ -264,18 +523,19 @@ def log_handler():
     
     while not should_exit:
         try:
-            if not log_queue.empty():
-                message = log_queue.get_nowait()
-                
-                if input_active:
-                    clear_current_line()
-                
-                print(message)
-                
-                if input_active:
-                    print_prompt()
-                    
-            time.sleep(0.05)
+            # Blockiert bis eine Zeile ankommt (Timeout nur, um should_exit zu prüfen)
+            try:
+                message = log_queue.get(timeout=0.5)
+            except Empty:
+                continue
+            
+            if input_active:
+                clear_current_line()
+            
+            print(message)
+            
+            if input_active:
+                print_prompt()
         except:
             break
 
@@ -291,6 +551,7 @@ def print_help():
 ║ {Fore.YELLOW}status{Fore.CYAN}   - Show bot status           ║
 ║ {Fore.YELLOW}channels{Fore.CYAN} - List connected channels   ║
 ║ {Fore.YELLOW}modules{Fore.CYAN}  - List loaded modules       ║
+║ {Fore.YELLOW}stats{Fore.CYAN}    - Show runtime metrics      ║
 ║ {Fore.YELLOW}reload{Fore.CYAN}   - Reload a module           ║
 ║ {Fore.YELLOW}clear{Fore.CYAN}    - Clear console             ║
 ║ {Fore.YELLOW}exit{Fore.CYAN}     - Stop bot and exit         ║
@@ -300,7 +561,161 @@ def print_help():
 """
     print(help_text)
 
-def safe_input(command_queue):
+def start_points_transfer(rpc, action, path, mode="overwrite", fmt=None):
+    """Startet Import/Export im Bot-Prozess und wartet im Hintergrund, damit die Console bedienbar bleibt"""
+    def run():
+        try:
+            start = time.time()
+            if action == "export":
+                result = rpc.call('points', 'export', path, fmt, timeout=TRANSFER_TIMEOUT)
+                success(f"Exported {result['count']} users to {path} in {time.time() - start:.1f}s")
+            else:
+                result = rpc.call('points', 'import', path, mode, fmt, timeout=TRANSFER_TIMEOUT)
+                success(f"Imported {result['read']} rows from {path} ({mode}): {result['changed']} balances changed, "
+                        f"{result['skipped']} invalid rows skipped in {time.time() - start:.1f}s")
+        except RpcError as e:
+            error(f"Points {action} failed: {str(e)}")
+    
+    info(f"Points {action} started: {path}")
+    threading.Thread(target=run, daemon=True).start()
+
+def points_command(rpc, parts):
+    """points-Befehle der Console, ausgeführt vom Coin-Store im Bot-Prozess"""
+    if len(parts) < 2:
+        error("Usage: points <see/add/remove/reset/top/history/export/import> [username] [amount] | points top [count] [page]")
+        return
+
+    action = parts[1].lower()
+    
+    if action == "top":
+        # points top [anzahl] [seite]
+        try:
+            count = int(parts[2]) if len(parts) > 2 else 3
+            page = int(parts[3]) if len(parts) > 3 else 1
+        except ValueError:
+            error("Usage: points top [count] [page]")
+            return
+        if count < 1 or page < 1:
+            error("Count and page must be at least 1.")
+            return
+        
+        result = rpc.call('points', 'top', count, page)
+        if not result['users']:
+            info("Noch keine Punkte vergeben.")
+        else:
+            print(f"🏆 Top Users (page {page}, {result['total']} total):")
+            for i, (name, pts) in enumerate(result['users'], start=(page - 1) * count + 1):
+                print(f"{i}. {name} – {pts} Punkte")
+    
+    elif action == "export":
+        if len(parts) < 3:
+            error("Usage: points export <file> [csv/jsonl]")
+            return
+        fmt = parts[3] if len(parts) > 3 else None
+        start_points_transfer(rpc, "export", parts[2], fmt=fmt)
+    
+    elif action == "import":
+        if len(parts) < 3:
+            error("Usage: points import <file> [overwrite/add/max] [csv/jsonl]")
+            return
+        mode = parts[3].lower() if len(parts) > 3 else "overwrite"
+        fmt = parts[4] if len(parts) > 4 else None
+        start_points_transfer(rpc, "import", parts[2], mode=mode, fmt=fmt)
+    
+    elif action == "history":
+        if len(parts) < 3:
+            error("Usage: points history <username> [limit]")
+            return
+        username = parts[2]
+        try:
+            limit = int(parts[3]) if len(parts) > 3 else 10
+        except ValueError:
+            error("Limit must be a number.")
+            return
+        entries = rpc.call('points', 'history', username, limit)['entries']
+        if not entries:
+            info(f"No ledger entries for {username}.")
+        else:
+            print(f"📜 Last {len(entries)} entries for {username}:")
+            for ts, delta, source in entries:
+                when = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(ts))
+                print(f"{when}  {delta:+d}  ({source})")
+    
+    elif action in ["see", "add", "remove", "reset"]:
+        if len(parts) < 3:
+            error(f"Usage: points {action} <username> [amount]")
+            return
+        
+        username = parts[2]
+
+        if action == "see":
+            points = rpc.call('points', 'see', username)['points']
+            info(f"{username} has {points} points.")
+        elif action in ["add", "remove"]:
+            if len(parts) < 4:
+                error(f"Usage: points {action} <username> <amount>")
+                return
+            try:
+                amount = int(parts[3])
+            except ValueError:
+                error("Amount must be a number.")
+                return
+            rpc.call('points', action, username, amount)
+            if action == "add":
+                success(f"Gave {amount} points to {username}.")
+            else:
+                success(f"Removed {amount} points from {username}.")
+        elif action == "reset":
+            rpc.call('points', 'reset', username)
+            success(f"{username}'s points have been reset to 0.")
+    
+    else:
+        error("Unknown points action. Use: see, add, remove, reset, top, history, export, import")
+
+def print_stats(stats):
+    """Gibt die Metriken des Bot-Prozesses lesbar aus"""
+    def table(title, rows):
+        if not rows:
+            return
+        print(f"{Fore.CYAN}{title}{Style.RESET_ALL}")
+        print(f"  {'name':<24} {'count':>8} {'avg ms':>9} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+        for label, summary in sorted(rows.items(), key=lambda item: -item[1]['count']):
+            print(f"  {label or '-':<24} {summary['count']:>8} {summary['avg_ms']:>9.2f} {summary['p50_ms']:>9.2f} "
+                  f"{summary['p99_ms']:>9.2f} {summary['max_ms']:>9.2f}")
+    
+    histograms = stats['histograms']
+    table("Commands", histograms.get('command_seconds', {}))
+    table("Database", histograms.get('db_seconds', {}))
+    table("DB queue wait", histograms.get('db_queue_wait_seconds', {}))
+    table("Message hooks", histograms.get('hook_seconds', {}))
+    table("Event loop lag", histograms.get('loop_lag_seconds', {}))
+    table("Outbound queue delay", histograms.get('outbound_queue_seconds', {}))
+    
+    errors = stats['counters'].get('command_seconds_errors', {})
+    if errors:
+        print(f"{Fore.CYAN}Command errors{Style.RESET_ALL}: " + ", ".join(f"{name}: {count}" for name, count in errors.items()))
+
+    rejected = {name[len('command_rejected_'):]: sum(values.values())
+                for name, values in stats['counters'].items() if name.startswith('command_rejected_')}
+    if rejected:
+        print(f"{Fore.CYAN}Rejected commands{Style.RESET_ALL}: " + ", ".join(f"{reason}: {count}" for reason, count in rejected.items()))
+    
+    channels = stats['rates'].get('messages', {})
+    if channels:
+        print(f"{Fore.CYAN}Messages{Style.RESET_ALL}")
+        for channel, rate in sorted(channels.items()):
+            print(f"  #{channel:<23} {rate['per_sec']:>8.2f}/s  ({rate['total']} total)")
+    
+    gauges = ", ".join(f"{name}={value:g}" if isinstance(value, (int, float)) else f"{name}={value}"
+                       for name, value in stats['gauges'].items())
+    if gauges:
+        print(f"{Fore.CYAN}Gauges{Style.RESET_ALL}: {gauges}")
+
+def format_uptime(seconds):
+    hours, rest = divmod(int(seconds), 3600)
+    return f"{hours}h {rest // 60:02d}m"
+
+def safe_input(rpc):
     """Sicherer Input Handler"""
     global should_exit, input_active
     
@@ -331,7 +746,7 @@ def safe_input(command_queue):
             
             if command == "exit":
                 info("Stopping bot...")
-                command_queue.put({'command': 'exit'})
+                rpc.notify('exit')
                 should_exit = True
                 return "exit"
                 
@@ -339,74 +754,68 @@ def safe_input(command_queue):
                 print_help()
                 
             elif command == "status":
-                info("Bot is running and connected")
+                try:
+                    status = rpc.call('status')
+                except RpcError as e:
+                    error(f"Bot not responding: {e}")
+                    continue
+                info(f"Bot is running as {status['nick']} in {', '.join(status['channels']) or 'no channels'} "
+                     f"(uptime {format_uptime(status['uptime'])}, {status['modules']} modules)")
+                info(f"DB queue: {status['db_pending']} pending | Log: {status['log']['sent']} lines sent, "
+                     f"{status['log']['dropped']} dropped")
+                for shard in status.get('shards', []):
+                    state = "running" if shard['alive'] else "down"
+                    info(f"Shard {shard['id']}: {state}, {shard['restarts']} restarts, {len(shard['channels'])} channels")
+                for message in status.get('errors', []):
+                    warning(message)
                 
             elif command == "channels":
-                channels = os.getenv("channel", "").split(",")
-                channels_clean = [c.strip() for c in channels if c.strip()]
-                info(f"Connected to channels: {', '.join(channels_clean)}")
+                if isinstance(rpc, ShardedRpc):
+                    for shard in rpc.supervisor.shards:
+                        info(f"Shard {shard.id}: {', '.join(shard.channels)}")
+                else:
+                    info(f"Connected to channels: {', '.join(parse_channels())}")
                 
             elif command == "modules":
-                command_queue.put({'command': 'modules'})
+                try:
+                    result = rpc.call('modules')
+                except RpcError as e:
+                    error(str(e))
+                    continue
+                if not result['modules']:
+                    warning("No modules loaded")
+                else:
+                    info(f"Loaded modules: {', '.join(result['modules'])}")
+                for name, stats in result['hooks'].items():
+                    info(f"Message hook {name}: {stats['calls']} calls, avg {stats['avg_us']}us, "
+                         f"max {stats['max_us']}us, {stats['slow']} slow, {stats['errors']} errors")
+                
+            elif command == "stats":
+                try:
+                    print_stats(rpc.call('stats'))
+                except RpcError as e:
+                    error(str(e))
                 
             elif command == "reload":
                 if len(parts) < 2:
                     error("Usage: reload <module_name>")
                 else:
                     module_name = parts[1]
-                    command_queue.put({'command': 'reload', 'args': [module_name]})
+                    try:
+                        rpc.call('reload', module_name)
+                        success(f"Reloaded {module_name}")
+                    except RpcError as e:
+                        error(str(e))
                 
             elif command == "clear":
                 os.system('cls' if os.name == 'nt' else 'clear')
                 success("Console cleared")
             
             elif command == "points":
-                if len(parts) < 2:
-                    error("Usage: points <see/add/remove/reset/top> [username] [amount]")
-                    continue
-
-                action = parts[1].lower()
-                
-                if action == "top":
-                    top_users = coinmanager.get_top_users(3)
-                    if not top_users:
-                        info("Noch keine Punkte vergeben.")
-                    else:
-                        print("🏆 Top 3 Users:")
-                        for i, (name, pts) in enumerate(top_users, start=1):
-                            print(f"{i}. {name} – {pts} Punkte")
-                
-                elif action in ["see", "add", "remove", "reset"]:
-                    if len(parts) < 3:
-                        error(f"Usage: points {action} <username> [amount]")
-                        continue
-                    
-                    username = parts[2]
-
-                    if action == "see":
-                        points = coinmanager.get_user_points(username)
-                        info(f"{username} has {points} points.")
-                    elif action in ["add", "remove"]:
-                        if len(parts) < 4:
-                            error(f"Usage: points {action} <username> <amount>")
-                            continue
-                        try:
-                            amount = int(parts[3])
-                        except ValueError:
-                            error("Amount must be a number.")
-                            continue
-                        if action == "add":
-                            coinmanager.give_user_points(username, amount)
-                            success(f"Gave {amount} points to {username}.")
-                        else:
-                            coinmanager.take_user_points(username, amount)
-                            success(f"Removed {amount} points from {username}.")
-                    elif action == "reset":
-                        coinmanager.take_user_points(username, coinmanager.get_user_points(username))
-                        success(f"{username}'s points have been reset to 0.")
-                
-                else:
-                    error("Unknown points action. Use: see, add, remove, reset, top")
+                try:
+                    points_command(rpc, parts)
+                except RpcError as e:
+                    error(f"Points command failed: {e}")
                 
             elif command == "send":
                 if len(parts) < 2:
@@ -424,12 +833,13 @@ def safe_input(command_queue):
                     message = " ".join(parts[1:])
                 
                 # Sende Befehl an Bot
-                command_queue.put({'command': 'send', 'args': [message, channel]})
+                try:
+                    result = rpc.call('send', message, channel)
+                except RpcError as e:
+                    error(f"Send failed: {e}")
+                    continue
                 
-                if channel:
-                    success(f"Sent message to #{channel}: {message}")
-                else:
-                    success(f"Sent message to all channels: {message}")
+                success(f"Queued message for {', '.join('#' + c for c in result['channels'])}: {message}")
 
             else:
                 error(f"Unknown command: '{line}' (type 'help' for available commands)")
@@ -437,11 +847,11 @@ def safe_input(command_queue):
         except KeyboardInterrupt:
             print()
             warning("Received interrupt signal")
-            command_queue.put({'command': 'exit'})
+            rpc.notify('exit')
             should_exit = True
             return "exit"
         except EOFError:
-            command_queue.put({'command': 'exit'})
+            rpc.notify('exit')
             should_exit = True
             return "exit"
 
@@ -451,6 +861,21 @@ def signal_handler(signum, frame):
     warning("Received termination signal")
     should_exit = True
 
+def run_sharded(channels, shard_count):
+    """Console mit Supervisor: Coin-Store plus ein Bot-Prozess pro Shard"""
+    supervisor = ShardSupervisor(run_bot, channels, shard_count, log_queue)
+    supervisor.start()
+    info(f"Started {len(supervisor.shards)} shards for {len(channels)} channels")
+    
+    log_thread = threading.Thread(target=log_handler, daemon=True)
+    log_thread.start()
+    
+    safe_input(ShardedRpc(supervisor))
+    
+    info("Shutting down...")
+    supervisor.stop()
+    success("Bot stopped successfully")
+
 def main():
     global should_exit
     
@@ -461,40 +886,46 @@ def main():
     try:
         load_env(required_env_vars)
         
-        # Shared Queues für Inter-Process Communication
-        manager = multiprocessing.Manager()
-        shared_log_queue = manager.Queue()
-        shared_command_queue = manager.Queue()
+        # Mehrere Bot-Prozesse (env shards), Kanäle per Consistent Hashing verteilt
+        try:
+            shard_count = int(os.getenv("shards") or 1)
+        except ValueError:
+            fatal_error("shards must be a number", 1)
+        channels = parse_channels()
+        if shard_count > 1:
+            run_sharded(channels, min(shard_count, len(channels)))
+            return
+        
+        # Pipes für Console-Befehle (Request/Response) und gebündelte Logs
+        command_console, command_bot = multiprocessing.Pipe()
+        log_recv, log_send = multiprocessing.Pipe(duplex=False)
         
         # Starte Bot-Prozess
-        p = multiprocessing.Process(target=run_bot, args=(shared_log_queue, shared_command_queue))
+        p = multiprocessing.Process(target=run_bot, args=(log_send, command_bot))
         p.start()
+        # Die Enden des Bot-Prozesses hier schließen, sonst merken die Reader sein Ende nie
+        log_send.close()
+        command_bot.close()
+        rpc = RpcClient(command_console)
         
-        # Übertrage Messages von shared queue zu lokaler queue
-        def queue_transfer():
-            while not should_exit:
-                try:
-                    if not shared_log_queue.empty():
-                        message = shared_log_queue.get_nowait()
-                        log_queue.put(message)
-                except:
-                    pass
-                time.sleep(0.1)
+        # Übertrage Log-Zeilen von der Pipe zur lokalen queue
+        start_reader(log_recv, log_queue)
         
         # Starte Threads
-        transfer_thread = threading.Thread(target=queue_transfer, daemon=True)
-        transfer_thread.start()
         
         log_thread = threading.Thread(target=log_handler, daemon=True)
         log_thread.start()
         
         # Input Handler
-        safe_input(shared_command_queue)
+        safe_input(rpc)
         
-        # Cleanup
+        # Cleanup: der Bot beendet sich nach 'exit' selbst und speichert dabei noch
         info("Shutting down...")
-        p.terminate()
-        p.join(timeout=5)
+        p.join(timeout=SHUTDOWN_TIMEOUT)
+        if p.is_alive():
+            warning("Bot process did not exit, terminating...")
+            p.terminate()
+            p.join(timeout=5)
         
         if p.is_alive():
             warning("Force killing bot process...")
@@ -0,0 +1,253 @@
+"""
+Laufzeit-Metriken des Bot-Prozesses
+
+Histogramme mit festen Buckets (Command-Latenzen, DB-Operationen, Loop-Lag),
+Nachrichtenraten pro Kanal über die letzten 60 Sekunden und Gauges, die erst
+beim Auslesen abgefragt werden (Queue-Tiefen). Das Aufzeichnen kostet nur
+ein bisect und ein paar Additionen und kann dauerhaft aktiv bleiben.
+
+Ausgelesen wird über den Console-Befehl `stats` oder optional per HTTP im
+Prometheus-Textformat (start_http_server).
+"""
+import asyncio
+import functools
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+RATE_WINDOW = 60          # Sekunden
+LOOP_LAG_INTERVAL = 0.5   # Sekunden zwischen zwei Loop-Lag-Messungen
+PREFIX = "elchbot_"
+
+
+class Histogram:
+    """Latenz-Verteilung mit festen Buckets (Sekunden)"""
+    __slots__ = ("counts", "sum", "count", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect_left(BUCKETS, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+        if seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, q):
+        """Obergrenze des Buckets, in dem das Quantil q liegt"""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return min(BUCKETS[index], self.max) if index < len(BUCKETS) else self.max
+        return self.max
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "avg_ms": round(self.sum / self.count * 1000, 3) if self.count else 0.0,
+            "p50_ms": round(self.quantile(0.5) * 1000, 3),
+            "p99_ms": round(self.quantile(0.99) * 1000, 3),
+            "max_ms": round(self.max * 1000, 3),
+        }
+
+
+class RateMeter:
+    """Ereignisse pro Schlüssel (z.B. Kanal) in einem Ring aus Sekunden-Slots"""
+
+    def __init__(self, window=RATE_WINDOW):
+        self.window = window
+        self.totals = {}
+        self.rings = {}
+
+    def mark(self, key, now=None):
+        second = int(time.time() if now is None else now)
+        ring = self.rings.get(key)
+        if ring is None:
+            ring = self.rings[key] = ([0] * self.window, [0] * self.window)
+            self.totals[key] = 0
+        counts, stamps = ring
+        slot = second % self.window
+        if stamps[slot] != second:
+            stamps[slot] = second
+            counts[slot] = 0
+        counts[slot] += 1
+        self.totals[key] += 1
+
+    def rate(self, key, now=None):
+        """Durchschnitt pro Sekunde über das Fenster"""
+        ring = self.rings.get(key)
+        if ring is None:
+            return 0.0
+        second = int(time.time() if now is None else now)
+        counts, stamps = ring
+        total = sum(count for count, stamp in zip(counts, stamps) if second - self.window < stamp <= second)
+        return total / self.window
+
+
+class Metrics:
+    """Sammelstelle aller Metriken eines Prozesses"""
+
+    def __init__(self):
+        self.histograms = {}   # name -> (label_name, {label: Histogram})
+        self.counters = {}     # name -> (label_name, {label: int})
+        self.meters = {}       # name -> (label_name, RateMeter)
+        self.gauges = {}       # name -> callable, liefert eine Zahl
+        self.loop_lag = 0.0
+
+    def histogram(self, name, label="", label_name="name"):
+        entry = self.histograms.get(name)
+        if entry is None:
+            entry = self.histograms.setdefault(name, (label_name, {}))
+        histogram = entry[1].get(label)
+        if histogram is None:
+            histogram = entry[1].setdefault(label, Histogram())
+        return histogram
+
+    def observe(self, name, label, seconds, label_name="name"):
+        self.histogram(name, label, label_name).observe(seconds)
+
+    def inc(self, name, label="", amount=1, label_name="name"):
+        values = self.counters.setdefault(name, (label_name, {}))[1]
+        values[label] = values.get(label, 0) + amount
+
+    def meter(self, name, label_name="name"):
+        entry = self.meters.get(name)
+        if entry is None:
+            entry = self.meters.setdefault(name, (label_name, RateMeter()))
+        return entry[1]
+
+    def gauge(self, name, func):
+        """Registriert einen Wert, der erst beim Auslesen abgefragt wird"""
+        self.gauges[name] = func
+
+    def remove_gauge(self, name):
+        self.gauges.pop(name, None)
+
+    def timed(self, name, label, func, label_name="name"):
+        """Umhüllt eine async-Funktion und misst jede Ausführung"""
+        histogram = self.histogram(name, label, label_name)
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            except Exception:
+                self.inc(f"{name}_errors", label, label_name=label_name)
+                raise
+            finally:
+                histogram.observe(time.perf_counter() - start)
+        return wrapper
+
+    async def monitor_loop_lag(self, interval=LOOP_LAG_INTERVAL):
+        """Misst, wie viel später als geplant der Event-Loop aufwacht"""
+        histogram = self.histogram("loop_lag_seconds")
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(interval)
+            self.loop_lag = max(time.perf_counter() - start - interval, 0.0)
+            histogram.observe(self.loop_lag)
+
+    def _read_gauges(self):
+        values = {}
+        for name, func in list(self.gauges.items()):
+            try:
+                values[name] = func()
+            except Exception:
+                values[name] = None
+        return values
+
+    def snapshot(self):
+        """Alle Metriken als verschachteltes dict (für die Console)"""
+        return {
+            "histograms": {
+                name: {label: histogram.summary() for label, histogram in list(values.items())}
+                for name, (_, values) in list(self.histograms.items())
+            },
+            "counters": {name: dict(values) for name, (_, values) in list(self.counters.items())},
+            "rates": {
+                name: {key: {"per_sec": round(meter.rate(key), 2), "total": meter.totals[key]}
+                       for key in list(meter.rings)}
+                for name, (_, meter) in list(self.meters.items())
+            },
+            "gauges": self._read_gauges(),
+        }
+
+    def prometheus(self):
+        """Alle Metriken im Prometheus-Textformat"""
+        lines = []
+
+        def labels(label_name, label, extra=""):
+            parts = [f'{label_name}="{escape(label)}"'] if label else []
+            if extra:
+                parts.append(extra)
+            return "{" + ",".join(parts) + "}" if parts else ""
+
+        for name, (label_name, values) in list(self.histograms.items()):
+            lines.append(f"# TYPE {PREFIX}{name} histogram")
+            for label, histogram in list(values.items()):
+                cumulative = 0
+                for bound, count in zip(BUCKETS + ("+Inf",), histogram.counts):
+                    cumulative += count
+                    le = f'le="{bound}"'
+                    lines.append(f"{PREFIX}{name}_bucket{labels(label_name, label, le)} {cumulative}")
+                lines.append(f"{PREFIX}{name}_sum{labels(label_name, label)} {histogram.sum}")
+                lines.append(f"{PREFIX}{name}_count{labels(label_name, label)} {histogram.count}")
+        for name, (label_name, values) in list(self.counters.items()):
+            lines.append(f"# TYPE {PREFIX}{name}_total counter")
+            for label, value in list(values.items()):
+                lines.append(f"{PREFIX}{name}_total{labels(label_name, label)} {value}")
+        for name, (label_name, meter) in list(self.meters.items()):
+            lines.append(f"# TYPE {PREFIX}{name}_total counter")
+            for key in list(meter.rings):
+                lines.append(f"{PREFIX}{name}_total{labels(label_name, key)} {meter.totals[key]}")
+            lines.append(f"# TYPE {PREFIX}{name}_per_second gauge")
+            for key in list(meter.rings):
+                lines.append(f"{PREFIX}{name}_per_second{labels(label_name, key)} {meter.rate(key)}")
+        for name, value in self._read_gauges().items():
+            if value is not None:
+                lines.append(f"# TYPE {PREFIX}{name} gauge")
+                lines.append(f"{PREFIX}{name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def start_http_server(port, host="127.0.0.1", registry=None):
+    """Startet einen lokalen HTTP-Endpunkt (/metrics) in einem Hintergrund-Thread"""
+    registry = registry or metrics
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # Keine Zugriffs-Logs in der Console
+
+    server = HTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+
+# Globale Instanz für den Prozess
+metrics = Metrics()
@@ -1,38 +1,83 @@
 import asyncio
+import time
 import traceback
-from .elchcoins import coinmanager
+from datetime import datetime, timedelta
+from botlog import get_logger
+from outbound import announce, reply
+from configs import get_config
+from .elchcoins import async_coinmanager
+from .elchcoins.activity import ActivityTracker
+from .elchcoins.rewards import DEFAULT_EVENT_SECONDS, RewardScheduler
+
+MODULE_TYPE = "points"
+
+log = get_logger("auto_points")
+
+# Gewichtung nach Nachrichten im Belohnungs-Intervall: (ab Nachrichten, Multiplikator)
+ACTIVITY_WEIGHTS = [(1, 1.0)]
+
+STREAK_SAVE_INTERVAL = 60  # Sekunden zwischen dem Speichern der Streak-Bitmaps
 
 # Globale Variablen
 auto_reward_task = None
-active_users = set()
+daily_bonus_task = None
+streak_save_task = None
+activity = ActivityTracker(weights=ACTIVITY_WEIGHTS)
+scheduler = RewardScheduler(activity)
+
+def load_settings():
+    """Übernimmt die aktuellen Einstellungen aus configs/auto_points.json"""
+    config = get_config('auto_points')
+    settings = config.custom_settings
+    scheduler.configure(
+        base_reward=getattr(config, 'base_reward', None),
+        interval=getattr(config, 'reward_interval', None),
+        multiplier_events=getattr(config, 'multiplier_events', None),
+        reward_multiplier=settings.get('reward_multiplier'),
+        enabled=config.enabled and settings.get('auto_reward_active_users', True),
+    )
+    if settings.get('activity_weights'):
+        activity.set_weights(settings['activity_weights'])
 
 async def auto_reward_loop(bot, log_queue):
-    """Gibt alle 10 Minuten allen aktiven Usern 10 Punkte"""
+    """Zahlt aktiven Usern pro Intervall base_reward Punkte (Einstellungen aus der Modul-Config)"""
+    load_settings()
+    scheduler.start()
     while True:
         try:
-            await asyncio.sleep(600)  # 10 Minuten = 600 Sekunden
+            await asyncio.sleep(scheduler.seconds_until_due())
+            # Einstellungen live übernehmen
+            load_settings()
+            batch = scheduler.collect()
+            if batch is None:
+                continue
             
-            if active_users:
-                reward_count = 0
-                for username in active_users.copy():
-                    try:
-                        coinmanager.give_user_points(username, 10)
-                        reward_count += 1
-                    except Exception as e:
-                        log_queue.put(f"[AUTO-REWARD] Error giving points to {username}: {str(e)}")
-                
-                log_queue.put(f"[AUTO-REWARD] Gave 10 points to {reward_count} active users")
+            if batch.skipped:
+                log_queue.put(f"[AUTO-REWARD] Skipped {batch.skipped} missed ticks older than the activity window")
+            
+            if batch.rewards:
+                # Alle Punkte (auch nachgeholte Ticks) in einer Transaktion vergeben
+                started = time.perf_counter()
+                failures = await async_coinmanager.give_many_user_points(batch.rewards, source="auto-reward")
+                tick = scheduler.finish(batch, time.perf_counter() - started, failures)
+                for username, reason in failures.items():
+                    log_queue.put(f"[AUTO-REWARD] Error giving points to {username}: {reason}")
+
+                log_queue.put(
+                    f"[AUTO-REWARD] Gave {tick['points']} points to {tick['users']} active users "
+                    f"(ticks: {tick['ticks']}, x{tick['multiplier']:g}, lag: {tick['lag']:.1f}s, "
+                    f"compute: {tick['compute_ms']}ms, payout: {tick['payout_ms']}ms)"
+                )
                 
                 # Optional: Nachricht in den Chat senden
                 # try:
                 #     for channel in bot.connected_channels:
-                #         await channel.send(f"🎁 Auto-Reward: {reward_count} active users received 10 Coins!")
+                #         await announce(bot, channel, f"🎁 Auto-Reward: {tick['users']} active users received Coins!")
                 # except Exception as e:
                 #     log_queue.put(f"[AUTO-REWARD] Error sending chat message: {str(e)}")
                 
-                # Reset active users für nächste Runde (optional)
-                active_users.clear()
             else:
+                scheduler.finish(batch, 0.0)
                 log_queue.put("[AUTO-REWARD] No active users found")
                 
         except Exception as e:
@@ -40,11 +85,54 @@ async def auto_reward_loop(bot, log_queue):
             log_queue.put(f"[AUTO-REWARD] Full traceback: {traceback.format_exc()}")
             await asyncio.sleep(60)  # Warte 1 Minute bei Fehler
 
-def add_active_user(username, log_queue):
-    """Fügt User zur aktiven User-Liste hinzu"""
-    if username not in active_users:
-        active_users.add(username)
-        log_queue.put(f"[AUTO-REWARD] Added {username} to active users")
+def seconds_until_midnight():
+    now = datetime.now()
+    midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+    return (midnight - now).total_seconds() + 1
+
+async def daily_bonus_loop(bot, log_queue):
+    """Speichert Streaks regelmäßig und zahlt nach Mitternacht den Tagesbonus für den Vortag"""
+    loaded = await async_coinmanager.load_streaks()
+    log_queue.put(f"[AUTO-REWARD] Loaded streaks for {loaded} users")
+    while True:
+        try:
+            # Gesammelte Anwesenheiten vorher abgeben, damit sie mitgespeichert werden
+            async_coinmanager.flush_presence()
+            config = get_config('auto_points')
+            daily_bonus = getattr(config, 'daily_bonus', 0)
+            if config.enabled and daily_bonus > 0:
+                streak_bonus = config.custom_settings.get('daily_streak_bonus', True)
+                started = time.perf_counter()
+                days, bonuses, failures = await async_coinmanager.pay_daily_bonuses(daily_bonus, streak_bonus)
+                for username, reason in failures.items():
+                    log_queue.put(f"[AUTO-REWARD] Error giving daily bonus to {username}: {reason}")
+                if bonuses:
+                    log_queue.put(
+                        f"[AUTO-REWARD] Daily bonus: {sum(bonuses.values())} points to "
+                        f"{len(bonuses) - len(failures)} users for {days} day(s) "
+                        f"({(time.perf_counter() - started) * 1000:.1f}ms)"
+                    )
+            else:
+                await async_coinmanager.save_streaks()
+            
+            await asyncio.sleep(min(seconds_until_midnight(), STREAK_SAVE_INTERVAL))
+            
+        except Exception as e:
+            log_queue.put(f"[AUTO-REWARD] Error in daily_bonus_loop: {str(e)}")
+            log_queue.put(f"[AUTO-REWARD] Full traceback: {traceback.format_exc()}")
+            await asyncio.sleep(60)  # Warte 1 Minute bei Fehler
+
+def start_multiplier(event, log_queue, duration=DEFAULT_EVENT_SECONDS):
+    """Startet ein Multiplikator-Fenster (raid, host, ...) für die Auto-Rewards"""
+    multiplier = scheduler.start_event(event, duration)
+    log_queue.put(f"[AUTO-REWARD] {event} multiplier x{multiplier:g} active for {duration // 60} minutes")
+    return multiplier
+
+def add_active_user(username, log_queue, channel=""):
+    """Zählt eine Chat-Nachricht des Users im jeweiligen Kanal"""
+    if activity.record(channel, username):
+        log.debug("Added %s to active users", username)
+    async_coinmanager.mark_presence(username)
 
 async def handle_follow(follower, bot, log_queue):
     """Gibt neuen Followern 100 Punkte"""
@@ -54,18 +142,18 @@ async def handle_follow(follower, bot, log_queue):
         
         # Prüfe aktuelle Punkte vor der Belohnung
         try:
-            current_points = coinmanager.get_user_points(username)
+            current_points = await async_coinmanager.get_user_points(username)
             log_queue.put(f"[DEBUG] {username} had {current_points} points before follow reward")
         except Exception as e:
             log_queue.put(f"[DEBUG] Could not get current points for {username}: {str(e)}")
             current_points = 0
         
         # Gebe 100 Punkte
-        coinmanager.give_user_points(username, 100)
+        await async_coinmanager.give_user_points(username, 100, source="follow")
         
         # Verifiziere dass Punkte hinzugefügt wurden
         try:
-            new_points = coinmanager.get_user_points(username)
+            new_points = await async_coinmanager.get_user_points(username)
             log_queue.put(f"[DEBUG] {username} now has {new_points} points after follow reward")
         except Exception as e:
             log_queue.put(f"[DEBUG] Could not verify new points for {username}: {str(e)}")
@@ -75,7 +163,7 @@ async def handle_follow(follower, bot, log_queue):
         # Optional: Dankesnachricht im Chat
         try:
             for channel in bot.connected_channels:
-                await channel.send(f"🎉 Thanks for the follow, {username}! You received 100 Coins!")
+                await announce(bot, channel, f"🎉 Thanks for the follow, {username}! You received 100 Coins!")
         except Exception as e:
             log_queue.put(f"[AUTO-REWARD] Error sending follow message: {str(e)}")
             
@@ -83,35 +171,60 @@ async def handle_follow(follower, bot, log_queue):
         log_queue.put(f"[AUTO-REWARD] Follow reward error: {str(e)}")
         log_queue.put(f"[AUTO-REWARD] Full traceback: {traceback.format_exc()}")
 
+async def streak_command(ctx):
+    """Zeigt die tägliche Chat-Streak des Users"""
+    try:
+        current, longest = await async_coinmanager.get_streak(ctx.author.name)
+        await reply(ctx, f"🔥 {ctx.author.name} streak: {current} day(s) (longest: {longest})")
+    except Exception as e:
+        await reply(ctx, f"❌ Error getting streak: {str(e)}")
+        if hasattr(ctx.bot, 'log_queue'):
+            ctx.bot.log_queue.put(f"[AUTO-REWARD] Streak command error: {str(e)}")
+
 async def status_command(ctx):
     """Zeigt Status des Auto-Reward Systems"""
     try:
-        active_count = len(active_users)
-        active_list = list(active_users)[:10]  # Zeige nur erste 10 User
+        active = activity.active_users(600)
+        active_count = len(active)
+        # Zeige nur die 10 aktivsten User
+        active_list = sorted(active, key=active.get, reverse=True)[:10]
         
         status_msg = f"🎁 Auto-Reward Status: {active_count} active users tracked"
         if active_list:
             status_msg += f"\nRecent active users: {', '.join(active_list)}"
             if active_count > 10:
                 status_msg += f" (and {active_count - 10} more...)"
+        for event, multiplier, remaining in scheduler.active_events():
+            status_msg += f" | {event} x{multiplier:g} ({int(remaining // 60)} min left)"
+        last_tick = scheduler.stats().get("last")
+        if last_tick:
+            status_msg += f" | Last payout: {last_tick['users']} users in {last_tick['payout_ms']}ms"
         
-        await ctx.send(status_msg)
+        await reply(ctx, status_msg)
         
-        if hasattr(ctx.bot, 'log_queue'):
-            ctx.bot.log_queue.put(f"[AUTO-REWARD] Status command executed by {ctx.author.name}")
+        log.info("Status command executed by %s", ctx.author.name)
     except Exception as e:
-        await ctx.send(f"❌ Error getting status: {str(e)}")
+        await reply(ctx, f"❌ Error getting status: {str(e)}")
         if hasattr(ctx.bot, 'log_queue'):
             ctx.bot.log_queue.put(f"[AUTO-REWARD] Status command error: {str(e)}")
 
 def setup_command(bot, log_queue):
     """Initialisiert das Auto-Reward System"""
-    global auto_reward_task
+    global auto_reward_task, daily_bonus_task
     
     try:
         # Starte Auto-Reward Loop
         auto_reward_task = asyncio.create_task(auto_reward_loop(bot, log_queue))
         log_queue.put("[AUTO-REWARD] Auto-reward loop started")
+        daily_bonus_task = asyncio.create_task(daily_bonus_loop(bot, log_queue))
+        log_queue.put("[AUTO-REWARD] Daily bonus loop started")
+        
+        # Chat-Nachrichten zählen
+        if hasattr(bot, 'module_manager'):
+            def on_message(message):
+                add_active_user(message.author.name, log_queue, message.channel.name)
+            bot.module_manager.add_message_hook('auto_points', on_message)
+            log_queue.put("[AUTO-REWARD] Registered message hook")
         
         # Follow Event Handler - Mehrere Methoden für verschiedene Libraries
         log_queue.put("[AUTO-REWARD] Registering follow event handler...")
@@ -139,11 +252,25 @@ def setup_command(bot, log_queue):
             bot.event_follow = on_follow
             log_queue.put("[AUTO-REWARD] Registered follow handler via direct assignment")
         
+        # Raids aktivieren den Raid-Multiplikator
+        if hasattr(bot, 'event'):
+            @bot.event()
+            async def event_raw_usernotice(channel, tags):
+                if tags.get('msg-id') == 'raid':
+                    try:
+                        start_multiplier('raid', log_queue)
+                    except ValueError:
+                        pass  # Kein Raid-Multiplikator konfiguriert
+        
         # Registriere Status Command
         @bot.command(name='autoreward')
         async def autoreward(ctx):
             await status_command(ctx)
         
+        @bot.command(name='streak')
+        async def streak(ctx):
+            await streak_command(ctx)
+        
         log_queue.put("✅ [AUTO-REWARD] Module loaded successfully")
         
         # Test-Follow für Debugging (optional)
@@ -153,9 +280,13 @@ def setup_command(bot, log_queue):
         log_queue.put(f"❌ [AUTO-REWARD] Setup error: {str(e)}")
         log_queue.put(f"[AUTO-REWARD] Full traceback: {traceback.format_exc()}")
 
+def log_save_error(task):
+    if not task.cancelled() and task.exception() is not None:
+        log.error("Error saving streaks: %s", task.exception())
+
 def cleanup_command(bot, log_queue=None):
     """Beendet das Auto-Reward System sauber"""
-    global auto_reward_task
+    global auto_reward_task, daily_bonus_task, streak_save_task
     
     try:
         # Stoppe Auto-Reward Loop
@@ -164,15 +295,30 @@ def cleanup_command(bot, log_queue=None):
             auto_reward_task = None
             if log_queue:
                 log_queue.put("[AUTO-REWARD] Auto-reward loop stopped")
+        if daily_bonus_task:
+            daily_bonus_task.cancel()
+            daily_bonus_task = None
+            # Heutige Anwesenheit nicht verlieren (über den DB-Worker bzw. den Coin-Store)
+            async_coinmanager.flush_presence()
+            streak_save_task = asyncio.get_running_loop().create_task(async_coinmanager.save_streaks())
+            streak_save_task.add_done_callback(log_save_error)
+            if log_queue:
+                log_queue.put("[AUTO-REWARD] Daily bonus loop stopped")
         
-        # Entferne Commands
-        if hasattr(bot, 'commands') and 'autoreward' in bot.commands:
-            bot.remove_command('autoreward')
+        if hasattr(bot, 'module_manager'):
+            bot.module_manager.remove_message_hook('auto_points')
             if log_queue:
-                log_queue.put("[AUTO-REWARD] Removed autoreward command")
+                log_queue.put("[AUTO-REWARD] Removed message hook")
+        
+        # Entferne Commands
+        for command_name in ('autoreward', 'streak'):
+            if hasattr(bot, 'commands') and command_name in bot.commands:
+                bot.remove_command(command_name)
+                if log_queue:
+                    log_queue.put(f"[AUTO-REWARD] Removed {command_name} command")
         
         # Leere aktive User-Liste
-        active_users.clear()
+        activity.clear()
         if log_queue:
             log_queue.put("[AUTO-REWARD] Cleared active users list")
             log_queue.put("✅ [AUTO-REWARD] Module cleanup completed")
@@ -182,14 +328,14 @@ def cleanup_command(bot, log_queue=None):
             log_queue.put(f"❌ [AUTO-REWARD] Cleanup error: {str(e)}")
 
 # Zusätzliche Utility-Funktionen
-def get_active_users():
-    """Gibt die Liste der aktiven User zurück"""
-    return list(active_users)
+def get_active_users(window=600, channel=None):
+    """Gibt die Liste der in den letzten `window` Sekunden aktiven User zurück"""
+    return list(activity.active_users(window, channel))
 
 def clear_active_users(log_queue=None):
     """Leert die Liste der aktiven User"""
-    count = len(active_users)
-    active_users.clear()
+    count = activity.stats()["tracked_users"]
+    activity.clear()
     if log_queue:
         log_queue.put(f"[AUTO-REWARD] Cleared {count} active users")
 
@@ -213,7 +359,7 @@ async def admin_command(ctx, action, *args):
     """Admin-Command für Auto-Reward System"""
     try:
         if not hasattr(ctx.bot, 'log_queue'):
-            await ctx.send("❌ Log queue not available")
+            await reply(ctx, "❌ Log queue not available")
             return
         
         log_queue = ctx.bot.log_queue
@@ -222,18 +368,22 @@ async def admin_command(ctx, action, *args):
             await status_command(ctx)
         elif action == "clear":
             clear_active_users(log_queue)
-            await ctx.send(f"✅ Cleared active users list")
+            await reply(ctx, f"✅ Cleared active users list")
         elif action == "test" and args:
             username = args[0]
             await test_follow_reward(username, ctx.bot, log_queue)
-            await ctx.send(f"✅ Test follow reward sent to {username}")
+            await reply(ctx, f"✅ Test follow reward sent to {username}")
+        elif action == "event" and args:
+            minutes = int(args[1]) if len(args) > 1 else DEFAULT_EVENT_SECONDS // 60
+            multiplier = start_multiplier(args[0], log_queue, minutes * 60)
+            await reply(ctx, f"✅ {args[0]} multiplier x{multiplier:g} active for {minutes} minutes")
         elif action == "running":
             is_running = is_auto_reward_running()
-            await ctx.send(f"🔄 Auto-reward is {'running' if is_running else 'stopped'}")
+            await reply(ctx, f"🔄 Auto-reward is {'running' if is_running else 'stopped'}")
         else:
-            await ctx.send("❌ Unknown action. Use: status, clear, test <username>, running")
+            await reply(ctx, "❌ Unknown action. Use: status, clear, test <username>, event <name> [minutes], running")
             
     except Exception as e:
-        await ctx.send(f"❌ Admin command error: {str(e)}")
+        await reply(ctx, f"❌ Admin command error: {str(e)}")
         if hasattr(ctx.bot, 'log_queue'):
             ctx.bot.log_queue.put(f"[AUTO-REWARD] Admin command error: {str(e)}")
\ No newline at end of file
@@ -2,23 +2,26 @@
 Dice roll command module
 """
 import random
+from botlog import get_logger
+from outbound import reply
+
+log = get_logger("dice")
 
 async def dice_command(ctx, sides=6):
     """Roll a dice with specified sides"""
     try:
         sides = int(sides)
         if sides < 2 or sides > 100:
-            await ctx.send("🎲 Dice must have between 2 and 100 sides!")
+            await reply(ctx, "🎲 Dice must have between 2 and 100 sides!")
             return
         
         result = random.randint(1, sides)
-        await ctx.send(f"🎲 {ctx.author.name} rolled a {result} (1-{sides})")
+        await reply(ctx, f"🎲 {ctx.author.name} rolled a {result} (1-{sides})")
         
-        if hasattr(ctx.bot, 'log_queue'):
-            ctx.bot.log_queue.put(f"🎲 [DICE] {ctx.author.name} rolled {result} on d{sides}")
+        log.info("%s rolled %s on d%s", ctx.author.name, result, sides)
             
     except ValueError:
-        await ctx.send("🎲 Please provide a valid number of sides!")
+        await reply(ctx, "🎲 Please provide a valid number of sides!")
 
 def setup_command(bot, log_queue):
     """Setup function called by module manager"""
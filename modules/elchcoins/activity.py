@@ -0,0 +1,172 @@
+"""
+Aktivitäts-Tracker pro Kanal und User
+
+Usernamen werden pro Kanal auf kleine Integer-IDs abgebildet. Jede Minute
+(Bucket) hat ein array('B') mit einem Nachrichtenzähler pro ID, die Buckets
+liegen in einem Ring über das maximale Zeitfenster. Damit lassen sich
+"aktiv in den letzten N Minuten" und Nachrichten-Anzahlen für gewichtete
+Belohnungen abfragen, ohne pro Nachricht Objekte anzulegen.
+
+Der Speicher ist begrenzt: IDs ohne Aktivität im Fenster werden recycelt und
+pro Kanal werden höchstens max_users gleichzeitig verfolgt.
+"""
+import time
+from array import array
+from bisect import bisect_right
+
+BUCKET_SECONDS = 60
+MAX_WINDOW = 3600      # Sekunden, die maximal zurückgeschaut werden kann
+MAX_USERS = 100000     # pro Kanal
+MAX_COUNT = 255        # Zähler pro Bucket sättigen bei 255
+
+# (ab Nachrichten im Fenster, Multiplikator)
+DEFAULT_WEIGHTS = [(1, 1.0)]
+
+
+class ChannelActivity:
+    """Ring aus Minuten-Buckets für einen Kanal"""
+
+    def __init__(self, num_buckets, max_users):
+        self.num_buckets = num_buckets
+        self.max_users = max_users
+        self.ids = {}
+        self.names = []
+        self.free = []
+        self.last_seen = array("q")
+        self.buckets = [array("B") for _ in range(num_buckets)]
+        self.bucket_keys = [None] * num_buckets
+        self.dropped = 0
+
+    def _bucket(self, key):
+        slot = key % self.num_buckets
+        if self.bucket_keys[slot] != key:
+            # Slot enthält einen alten Bucket -> neu beginnen
+            self.buckets[slot] = array("B")
+            self.bucket_keys[slot] = key
+            self.prune(key - self.num_buckets + 1)
+        return self.buckets[slot]
+
+    def record(self, username, key):
+        """Zählt eine Nachricht, gibt True zurück wenn der User neu im Fenster ist"""
+        bucket = self._bucket(key)
+        uid = self.ids.get(username)
+        is_new = uid is None
+        if is_new:
+            if len(self.ids) >= self.max_users:
+                self.dropped += 1
+                return False
+            if self.free:
+                uid = self.free.pop()
+                self.names[uid] = username
+            else:
+                uid = len(self.names)
+                self.names.append(username)
+                self.last_seen.append(0)
+            self.ids[username] = uid
+
+        if uid >= len(bucket):
+            bucket.frombytes(bytes(uid + 1 - len(bucket)))
+        if bucket[uid] < MAX_COUNT:
+            bucket[uid] += 1
+        self.last_seen[uid] = key
+        return is_new
+
+    def prune(self, oldest_key):
+        """Gibt IDs frei, die seit oldest_key nichts geschrieben haben"""
+        last_seen = self.last_seen
+        for username, uid in list(self.ids.items()):
+            if last_seen[uid] < oldest_key:
+                del self.ids[username]
+                self.names[uid] = None
+                self.free.append(uid)
+
+    def counts(self, first_key, last_key):
+        """Nachrichten pro User in den Buckets first_key..last_key (inklusive)"""
+        candidates = [uid for uid in self.ids.values() if self.last_seen[uid] >= first_key]
+        if not candidates:
+            return {}
+        totals = dict.fromkeys(candidates, 0)
+        for key in range(max(first_key, last_key - self.num_buckets + 1), last_key + 1):
+            slot = key % self.num_buckets
+            if self.bucket_keys[slot] != key:
+                continue
+            bucket = self.buckets[slot]
+            size = len(bucket)
+            for uid in candidates:
+                if uid < size:
+                    totals[uid] += bucket[uid]
+        return {self.names[uid]: count for uid, count in totals.items() if count}
+
+    def memory_bytes(self):
+        """Grobe Größe der Zähler-Arrays"""
+        return sum(len(b) for b in self.buckets) + len(self.last_seen) * self.last_seen.itemsize
+
+
+class ActivityTracker:
+    """Aktivität über alle Kanäle mit Abfragen für Zeitfenster und gewichtete Belohnungen"""
+
+    def __init__(self, bucket_seconds=BUCKET_SECONDS, max_window=MAX_WINDOW, max_users=MAX_USERS,
+                 weights=None):
+        self.bucket_seconds = bucket_seconds
+        self.num_buckets = max_window // bucket_seconds + 1
+        self.max_users = max_users
+        self.channels = {}
+        self.set_weights(weights or DEFAULT_WEIGHTS)
+
+    def set_weights(self, weights):
+        """weights: Liste aus (ab Nachrichten, Multiplikator), z.B. [(1, 1.0), (10, 1.5), (30, 2.0)]"""
+        ordered = sorted((int(threshold), float(multiplier)) for threshold, multiplier in weights)
+        self.weight_thresholds = [threshold for threshold, _ in ordered]
+        self.weight_multipliers = [multiplier for _, multiplier in ordered]
+
+    def bucket_key(self, now=None):
+        return int((time.time() if now is None else now) // self.bucket_seconds)
+
+    def record(self, channel, username, now=None):
+        """Zählt eine Chat-Nachricht, gibt True zurück wenn der User neu im Fenster ist"""
+        activity = self.channels.get(channel)
+        if activity is None:
+            activity = self.channels[channel] = ChannelActivity(self.num_buckets, self.max_users)
+        return activity.record(username.lower(), self.bucket_key(now))
+
+    def counts_between(self, first_key, last_key, channel=None):
+        """Nachrichten pro User in den Buckets first_key..last_key, über alle oder einen Kanal"""
+        channels = [self.channels[channel]] if channel in self.channels else (
+            [] if channel is not None else list(self.channels.values())
+        )
+        totals = {}
+        for activity in channels:
+            for username, count in activity.counts(first_key, last_key).items():
+                totals[username] = totals.get(username, 0) + count
+        return totals
+
+    def active_users(self, window=600, channel=None, now=None):
+        """User mit Nachrichten in den letzten `window` Sekunden: {username: anzahl}"""
+        last_key = self.bucket_key(now)
+        first_key = last_key - max(window // self.bucket_seconds, 1) + 1
+        return self.counts_between(first_key, last_key, channel)
+
+    def weight(self, messages):
+        """Multiplikator für eine Anzahl Nachrichten (0 unterhalb der ersten Schwelle)"""
+        index = bisect_right(self.weight_thresholds, messages) - 1
+        return self.weight_multipliers[index] if index >= 0 else 0.0
+
+    def weighted_rewards(self, base, first_key, last_key):
+        """Belohnung pro User für die Buckets first_key..last_key: {username: punkte}"""
+        rewards = {}
+        for username, messages in self.counts_between(first_key, last_key).items():
+            amount = int(round(base * self.weight(messages)))
+            if amount > 0:
+                rewards[username] = amount
+        return rewards
+
+    def clear(self):
+        self.channels.clear()
+
+    def stats(self):
+        return {
+            "channels": len(self.channels),
+            "tracked_users": sum(len(a.ids) for a in self.channels.values()),
+            "dropped": sum(a.dropped for a in self.channels.values()),
+            "memory_bytes": sum(a.memory_bytes() for a in self.channels.values()),
+        }
@@ -0,0 +1,283 @@
+"""
+Async-Fassade über coinmanager
+
+Alle Datenbank-Aufrufe laufen in einem eigenen Worker-Thread, damit
+SQLite-Zugriffe (und Disk-Stalls) nie den twitchio Event-Loop blockieren.
+
+Im Shard-Modus (siehe sharding.py) gehen die Aufrufe stattdessen per RPC an
+den Coin-Store-Prozess, der als einziger in die Datenbank schreibt.
+"""
+import asyncio
+import functools
+import inspect
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from metrics import metrics
+from rpc import RpcClient
+from . import ranking
+
+QUEUE_SIZE = 1000
+QUEUE_FULL_RETRY = 0.005  # Sekunden
+PRESENCE_FLUSH = 1.0      # Sekunden, die Anwesenheiten gesammelt werden
+
+
+class DBWorker:
+    """Einzelner Thread, der Datenbank-Aufträge aus einer begrenzten Queue abarbeitet"""
+
+    def __init__(self, maxsize=QUEUE_SIZE):
+        self.requests = queue.Queue(maxsize=maxsize)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="elchcoins-db", daemon=True)
+                self._thread.start()
+
+    def stop(self, timeout=5):
+        """Beendet den Worker, nachdem alle bereits eingereihten Aufträge erledigt sind"""
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is not None and thread.is_alive():
+            self.requests.put(None)
+            thread.join(timeout)
+
+    def _run(self):
+        while True:
+            item = self.requests.get()
+            if item is None:
+                break
+            func, args, future, queued_at = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            started = time.perf_counter()
+            metrics.observe("db_queue_wait_seconds", "", started - queued_at)
+            try:
+                future.set_result(func(*args))
+            except BaseException as e:
+                future.set_exception(e)
+            metrics.observe("db_seconds", func.__name__, time.perf_counter() - started, label_name="op")
+
+    async def submit(self, func, *args):
+        """Reiht einen Auftrag ein und wartet asynchron auf das Ergebnis"""
+        self.start()
+        future = Future()
+        item = (func, args, future, time.perf_counter())
+        # Backpressure: bei voller Queue kurz abgeben statt den Loop zu blockieren
+        while True:
+            try:
+                self.requests.put_nowait(item)
+                break
+            except queue.Full:
+                await asyncio.sleep(QUEUE_FULL_RETRY)
+        return await asyncio.wrap_future(future)
+
+    def post(self, func, *args):
+        """Reiht einen Auftrag ein, ohne auf das Ergebnis zu warten (wirft queue.Full)"""
+        self.start()
+        future = Future()
+        self.requests.put_nowait((func, args, future, time.perf_counter()))
+        return future
+
+    def pending(self):
+        """Anzahl der wartenden Aufträge"""
+        return self.requests.qsize()
+
+
+worker = DBWorker()
+
+# Verbindung zum Coin-Store, nur in Shards gesetzt (connect_store)
+store = None
+remote_functions = {}
+_presence = set()
+
+def remote(func):
+    """Im Shard-Modus wird der Aufruf an den Coin-Store weitergereicht statt lokal ausgeführt
+
+    Callbacks (z.B. progress) lassen sich nicht übertragen und werden dabei weggelassen.
+    """
+    signature = inspect.signature(func)
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        if store is None:
+            return await func(*args, **kwargs)
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        args = [None if callable(value) else value for value in bound.args]
+        return await asyncio.wrap_future(store.submit(func.__name__, *args))
+
+    remote_functions[func.__name__] = wrapper
+    return wrapper
+
+def _local():
+    """coinmanager erst bei lokaler Ausführung importieren, Shards öffnen die Datenbank nie"""
+    from . import coinmanager
+    return coinmanager
+
+def connect_store(address, authkey):
+    """Leitet alle Aufrufe dieses Prozesses an den Coin-Store weiter (erneut nach einem Store-Neustart)"""
+    global store
+    from multiprocessing.connection import Client
+    previous = store
+    store = RpcClient(Client(address, authkey=authkey), peer="coin store")
+    if previous is not None:
+        previous.conn.close()
+
+def resolve_remote(command):
+    """Coin-Store-Seite: Funktion für einen weitergereichten Aufruf oder None"""
+    return remote_functions.get(command)
+
+def pending():
+    """Anzahl der wartenden Aufträge (lokal im DB-Worker oder beim Coin-Store)"""
+    return len(store.pending) if store is not None else worker.pending()
+
+@remote
+async def get_user_points(username: str) -> int:
+    return await worker.submit(_local().get_user_points, username)
+
+@remote
+async def get_many_user_points(usernames):
+    return await worker.submit(_local().get_many_user_points, list(usernames))
+
+@remote
+async def give_user_points(username: str, amount: int, source="command"):
+    await worker.submit(_local().give_user_points, username, amount, source)
+
+@remote
+async def take_user_points(username: str, amount: int, source="command"):
+    return await worker.submit(_local().take_user_points, username, amount, source)
+
+@remote
+async def reset_user_points(username: str, source="command"):
+    return await worker.submit(_local().reset_user_points, username, source)
+
+@remote
+async def get_top_users(limit=3):
+    return await worker.submit(_local().get_top_users, limit)
+
+@remote
+async def get_leaderboard_page(page, page_size=10):
+    return await worker.submit(_local().get_leaderboard_page, page, page_size)
+
+@remote
+async def get_user_rank(username):
+    return await worker.submit(_local().get_user_rank, username)
+
+@remote
+async def get_user_ranks(usernames):
+    return await worker.submit(_local().get_user_ranks, list(usernames))
+
+async def get_rank(username):
+    return (await get_ranks([username]))[username]
+
+async def get_ranks(usernames):
+    if store is not None:
+        # Rang-Stufen kommen aus der Config dieses Prozesses, nur die Platzierung aus dem Store
+        return ranking.describe(await get_user_ranks(usernames))
+    return await worker.submit(ranking.rank_many, list(usernames))
+
+@remote
+async def give_many_user_points(mapping, source="command"):
+    return await worker.submit(_local().give_many_user_points, mapping, source)
+
+@remote
+async def take_many_user_points(mapping, source="command"):
+    return await worker.submit(_local().take_many_user_points, mapping, source)
+
+@remote
+async def get_user_count():
+    return await worker.submit(_local().get_user_count)
+
+@remote
+async def get_history(username, limit=10):
+    return await worker.submit(_local().get_history, username, limit)
+
+def _step(steps):
+    try:
+        next(steps)
+        return False, None
+    except StopIteration as stop:
+        return True, stop.value
+
+async def _run_steps(steps):
+    """Führt einen blockweisen Import/Export im DB-Worker aus, ein Auftrag pro Block
+
+    So laufen andere Datenbank-Aufträge zwischen den Blöcken weiter, und Cache
+    und Rangliste werden nur vom Worker-Thread angefasst.
+    """
+    try:
+        while True:
+            done, result = await worker.submit(_step, steps)
+            if done:
+                return result
+    finally:
+        # Abgebrochene Generatoren im Worker schließen (räumt Datei und Cache auf)
+        try:
+            worker.post(steps.close)
+        except queue.Full:
+            pass
+
+@remote
+async def export_points(path, fmt=None):
+    return await _run_steps(_local().export_steps(path, fmt))
+
+@remote
+async def import_points(path, mode="overwrite", fmt=None, progress=None):
+    return await _run_steps(_local().import_steps(path, mode, fmt, progress))
+
+@remote
+async def get_streak(username):
+    return await worker.submit(_local().get_streak, username)
+
+@remote
+async def load_streaks():
+    return await worker.submit(_local().load_streaks)
+
+@remote
+async def save_streaks():
+    return await worker.submit(_local().save_streaks)
+
+@remote
+async def pay_daily_bonuses(daily_bonus, streak_bonus=True):
+    return await worker.submit(_local().pay_daily_bonuses, daily_bonus, streak_bonus)
+
+@remote
+async def mark_presence_many(usernames):
+    return await worker.submit(_local().mark_presence_many, list(usernames))
+
+def mark_presence(username):
+    """Merkt die heutige Anwesenheit für die Streaks, ohne auf die Datenbank zu warten
+
+    Gesammelt und einmal pro Intervall weitergegeben: im Shard an den Store, sonst
+    an den DB-Worker. Dort laufen sie nach load_streaks bzw. pay_daily_bonuses und
+    nie parallel dazu, das erste Laden der Streaks blockiert so nie den Loop.
+    """
+    if not _presence:
+        asyncio.get_running_loop().call_later(PRESENCE_FLUSH, flush_presence)
+    _presence.add(username)
+
+def flush_presence():
+    """Gibt gesammelte Anwesenheiten sofort weiter (z.B. vor dem Speichern oder Beenden)"""
+    usernames = list(_presence)
+    _presence.clear()
+    if not usernames:
+        return
+    if store is not None:
+        store.notify("mark_presence_many", usernames)
+        return
+    try:
+        worker.post(_local().mark_presence_many, usernames)
+    except queue.Full:
+        # Beim nächsten Intervall erneut versuchen
+        _presence.update(usernames)
+        asyncio.get_running_loop().call_later(PRESENCE_FLUSH, flush_presence)
+
+def shutdown():
+    """Stoppt den DB-Worker-Thread"""
+    worker.stop()
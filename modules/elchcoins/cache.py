@@ -0,0 +1,169 @@
+"""
+Read-Through-Cache für Kontostände
+
+Begrenzter LRU-Cache mit TTL. Schreibpfade in coinmanager aktualisieren oder
+invalidieren Einträge. Bei Änderungen aus anderen Prozessen (z.B. der Console)
+leert coinmanager den Cache komplett.
+
+Geladen wird außerhalb des Locks. Damit ein paralleles invalidate/adjust/clear
+nicht von einem veralteten Ladeergebnis überschrieben wird, merkt sich jeder
+Fehlzugriff eine Generation (global für clear, pro User für die übrigen) und
+legt das Ergebnis nur ab, wenn sie sich bis dahin nicht geändert hat.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+MAX_ENTRIES = 10000
+TTL = 30.0  # Sekunden
+
+
+class BalanceCache:
+    """LRU/TTL-Cache für username -> Kontostand"""
+
+    def __init__(self, max_entries=MAX_ENTRIES, ttl=TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._epoch = 0       # wird bei clear erhöht
+        self._loading = {}    # username -> laufende Ladevorgänge
+        self._changes = {}    # username -> Änderungen während eines Ladevorgangs
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, username, loader):
+        """Liefert den Kontostand aus dem Cache oder lädt ihn über loader(username)"""
+        username = username.lower()
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(username)
+            if entry is not None and entry[1] > now:
+                self._entries.move_to_end(username)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+            token = self._begin_load(username)
+
+        try:
+            value = loader(username)
+        except BaseException:
+            with self._lock:
+                self._end_load(username)
+            raise
+        self._finish_load(username, value, token)
+        return value
+
+    def get_many(self, usernames, loader):
+        """Wie get für viele User, alle Fehlzugriffe werden mit einem loader(usernames)-Aufruf geladen"""
+        now = time.monotonic()
+        result = {}
+        missing = []
+        with self._lock:
+            for username in {u.lower() for u in usernames}:
+                entry = self._entries.get(username)
+                if entry is not None and entry[1] > now:
+                    self._entries.move_to_end(username)
+                    self.hits += 1
+                    result[username] = entry[0]
+                else:
+                    self.misses += 1
+                    missing.append(username)
+            tokens = {username: self._begin_load(username) for username in missing}
+
+        if missing:
+            try:
+                loaded = loader(missing)
+            except BaseException:
+                with self._lock:
+                    for username in missing:
+                        self._end_load(username)
+                raise
+            for username in missing:
+                value = loaded.get(username, 0)
+                self._finish_load(username, value, tokens[username])
+                result[username] = value
+        return result
+
+    # Aufrufer halten self._lock
+    def _begin_load(self, username):
+        self._loading[username] = self._loading.get(username, 0) + 1
+        return self._epoch, self._changes.get(username, 0)
+
+    def _end_load(self, username):
+        remaining = self._loading[username] - 1
+        if remaining:
+            self._loading[username] = remaining
+        else:
+            del self._loading[username]
+            self._changes.pop(username, None)
+
+    def _changed(self, username):
+        if username in self._loading:
+            self._changes[username] = self._changes.get(username, 0) + 1
+
+    def _finish_load(self, username, value, token):
+        """Legt ein Ladeergebnis ab, außer der User wurde inzwischen geändert/invalidiert"""
+        with self._lock:
+            current = (self._epoch, self._changes.get(username, 0))
+            self._end_load(username)
+            if current == token:
+                self._store(username, value)
+
+    def put(self, username, value):
+        with self._lock:
+            self._changed(username.lower())
+            self._store(username.lower(), value)
+
+    def _store(self, username, value):
+        self._entries[username] = (value, time.monotonic() + self.ttl)
+        self._entries.move_to_end(username)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def adjust(self, username, delta):
+        """Passt einen gecachten Kontostand an (nur wenn vorhanden)"""
+        username = username.lower()
+        with self._lock:
+            self._changed(username)
+            entry = self._entries.get(username)
+            if entry is not None:
+                self._entries[username] = (max(entry[0] + delta, 0), entry[1])
+
+    def invalidate(self, username):
+        with self._lock:
+            self._changed(username.lower())
+            if self._entries.pop(username.lower(), None) is not None:
+                self.invalidations += 1
+
+    def invalidate_many(self, usernames):
+        with self._lock:
+            for username in usernames:
+                if not isinstance(username, str):
+                    continue
+                self._changed(username.lower())
+                if self._entries.pop(username.lower(), None) is not None:
+                    self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+            self._epoch += 1
+
+    def stats(self):
+        """Zähler für Treffer, Fehlzugriffe und Verdrängungen"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
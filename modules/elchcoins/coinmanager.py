@@ -1,23 +1,352 @@
-from .database import init_db, add_points, remove_points, get_points
-import sqlite3
+from .database import init_db, add_points, remove_points, get_points, get_points_many, get_all_points, get_data_version, add_points_many, remove_points_many, normalize_deltas
+from .database import get_all_streaks, get_streak_paid_day, save_streaks as _save_streak_rows
+from .writebehind import WriteBehindBuffer
+from .cache import BalanceCache
+from .leaderboard import Leaderboard
+from .streaks import StreakTracker, bonus_for, day_number, WINDOW_DAYS
+from . import ledger, transfer
 import os
+import time
+
+# Sekunden zwischen zwei Prüfungen auf Schreibzugriffe anderer Prozesse (PRAGMA data_version)
+EXTERNAL_CHECK_INTERVAL = 1.0
 
-init_db()
 DB_PATH = os.path.join(os.path.dirname(__file__), "..", "..", "databases", "elchcoins.db")
 
-def get_user_points(username: str) -> int:
+# Read-Through-Cache für Kontostände
+cache = BalanceCache()
+
+# Sortierte Rangliste aller User (wird beim ersten Zugriff aus der Datenbank aufgebaut)
+leaderboard = Leaderboard()
+_leaderboard_ready = False
+_data_version = None
+_data_version_checked = 0.0
+
+# Tägliche Anwesenheit (wird beim ersten Zugriff aus der Datenbank geladen)
+streaks = StreakTracker()
+_streaks_ready = False
+
+# Tabellen/erster Snapshot angelegt (siehe init)
+_initialized = False
+
+# Write-Behind-Puffer (nur im Bot-Prozess aktiv, siehe enable_write_behind)
+write_behind = None
+
+# Periodische Ledger-Snapshots (nur im Bot-Prozess aktiv)
+ledger_maintenance = None
+
+def init():
+    """Legt Tabellen und den ersten Ledger-Snapshot an
+
+    Nur der Prozess, der die Datenbank besitzt (Bot-Prozess ohne Shards bzw.
+    der Coin-Store), ruft das auf. Der Import allein fasst die Datenbank nicht an.
+    """
+    global _initialized
+    if not _initialized:
+        init_db()
+        ledger.ensure_initial_snapshot()
+        _initialized = True
+
+def enable_write_behind(**kwargs):
+    """Aktiviert den Write-Behind-Puffer und spielt das Journal nach, gibt Anzahl nachgespielter Einträge zurück"""
+    global write_behind
+    if write_behind is not None:
+        return 0
+    buffer = WriteBehindBuffer(**kwargs)
+    replayed = buffer.start()
+    write_behind = buffer
+    return replayed
+
+def disable_write_behind():
+    """Schreibt alle ausstehenden Deltas und deaktiviert den Puffer"""
+    global write_behind
+    if write_behind is not None:
+        buffer = write_behind
+        write_behind = None
+        buffer.stop()
+
+def flush():
+    """Schreibt ausstehende Deltas sofort in die Datenbank"""
+    if write_behind is not None:
+        write_behind.flush()
+
+def take_ledger_snapshot():
+    """Flusht ausstehende Deltas und legt einen Ledger-Snapshot an"""
+    flush()
+    return ledger.take_snapshot()
+
+def start_ledger_maintenance(**kwargs):
+    """Startet periodische Snapshots mit Kompaktierung alter Ledger-Segmente"""
+    global ledger_maintenance
+    if ledger_maintenance is None:
+        ledger_maintenance = ledger.LedgerMaintenance(take_ledger_snapshot, **kwargs)
+        ledger_maintenance.start()
+
+def stop_ledger_maintenance():
+    global ledger_maintenance
+    if ledger_maintenance is not None:
+        ledger_maintenance.stop()
+        ledger_maintenance = None
+
+def get_balance_as_of(username, ts):
+    """Kontostand eines Users zum Zeitpunkt ts (Unix-Sekunden), ausgehend vom nächsten Snapshot"""
+    flush()
+    return ledger.balance_as_of(username, ts)
+
+def get_history(username, limit=10):
+    """Letzte Ledger-Einträge eines Users als [(ts, delta, source), ...]"""
+    flush()
+    return ledger.history(username, limit)
+
+def _check_external_writes():
+    """Verwirft Cache und Rangliste, wenn ein anderer Prozess (z.B. ein externes Tool) geschrieben hat
+
+    Alle regulären Schreibzugriffe laufen über diesen Prozess, daher wird höchstens
+    alle EXTERNAL_CHECK_INTERVAL Sekunden nachgefragt statt bei jedem Cache-Treffer.
+    """
+    global _data_version, _data_version_checked, _leaderboard_ready
+    now = time.monotonic()
+    if now - _data_version_checked < EXTERNAL_CHECK_INTERVAL:
+        return
+    _data_version_checked = now
+    version = get_data_version()
+    if _data_version is not None and version != _data_version:
+        cache.clear()
+        _leaderboard_ready = False
+    _data_version = version
+
+def _ensure_leaderboard():
+    global _leaderboard_ready
+    _check_external_writes()
+    if _leaderboard_ready:
+        return
+    if write_behind is not None:
+        rows, pending = write_behind.snapshot(get_all_points)
+    else:
+        rows, pending = get_all_points(), {}
+    leaderboard.rebuild(rows)
+    for username, delta in pending.items():
+        leaderboard.add(username, delta)
+    _leaderboard_ready = True
+
+def _update_leaderboard(deltas):
+    if _leaderboard_ready:
+        for username, delta in deltas.items():
+            leaderboard.add(username, delta)
+
+def _load_points(username):
+    if write_behind is not None:
+        return write_behind.get(username)
     return get_points(username)
 
-def give_user_points(username: str, amount: int):
-    add_points(username, amount)
+def get_user_points(username: str) -> int:
+    _check_external_writes()
+    return cache.get(username, _load_points)
+
+def _load_points_many(usernames):
+    if write_behind is not None:
+        return write_behind.get_many(usernames)
+    return get_points_many(usernames)
+
+def get_many_user_points(usernames):
+    """Kontostände vieler User, ein Datenbankzugriff für alle nicht gecachten: {username: points}"""
+    _check_external_writes()
+    return cache.get_many(usernames, _load_points_many)
 
-def take_user_points(username: str, amount: int):
-    remove_points(username, amount)
+def give_user_points(username: str, amount: int, source="command"):
+    code = ledger.source_code(source)
+    if write_behind is not None:
+        write_behind.add(username, amount, code)
+    else:
+        add_points(username, amount, code)
+    cache.adjust(username, amount)
+    _update_leaderboard({username: amount})
+
+def take_user_points(username: str, amount: int, source="command"):
+    """Zieht höchstens den Kontostand ab, gibt den tatsächlich abgezogenen Betrag zurück"""
+    code = ledger.source_code(source)
+    try:
+        if write_behind is not None:
+            taken = write_behind.remove(username, amount, code)
+        else:
+            taken = remove_points(username, amount, code)
+    except Exception:
+        cache.invalidate(username)
+        raise
+    if taken:
+        cache.adjust(username, -taken)
+        _update_leaderboard({username: -taken})
+    return taken
+
+def reset_user_points(username: str, source="command"):
+    """Setzt den Kontostand auf 0, gibt den abgezogenen Betrag zurück"""
+    amount = get_user_points(username)
+    if amount > 0:
+        return take_user_points(username, amount, source)
+    return 0
 
 def get_top_users(limit=3):
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("SELECT username, points FROM user_points ORDER BY points DESC LIMIT ?", (limit,))
-    result = c.fetchall()
-    conn.close()
-    return result
\ No newline at end of file
+    _ensure_leaderboard()
+    return leaderboard.top(limit)
+
+def get_leaderboard_page(page, page_size=10):
+    """Eine Seite der Rangliste (page beginnt bei 1) als [(username, points), ...]"""
+    _ensure_leaderboard()
+    return leaderboard.page(page, page_size)
+
+def get_user_ranks(usernames):
+    """Platzierung für mehrere User: {username: (points, position, total, percentile)}"""
+    _ensure_leaderboard()
+    total = len(leaderboard)
+    result = {}
+    for username in usernames:
+        points = leaderboard.get(username)
+        position = leaderboard.position(points)
+        user_total = max(total, position)
+        # Anteil der User, die dieser User überholt hat (0-100)
+        percentile = 100.0 * leaderboard.count_below(points) / user_total if user_total else 0.0
+        result[username] = (points, position, user_total, percentile)
+    return result
+
+def get_user_rank(username):
+    """Platzierung eines Users als (points, position, total, percentile)"""
+    return get_user_ranks([username])[username]
+
+def get_user_count():
+    """Anzahl der User mit Kontostand"""
+    _ensure_leaderboard()
+    return len(leaderboard)
+
+def give_many_user_points(mapping, source="command"):
+    """Vergibt Punkte an viele User auf einmal ({username: amount}), gibt Fehler pro User zurück"""
+    code = ledger.source_code(source)
+    try:
+        merged, failures = normalize_deltas(mapping)
+        if write_behind is not None:
+            write_behind.add_many(merged, code)
+        else:
+            failures = add_points_many(mapping, code)
+        _update_leaderboard({u: a for u, a in merged.items() if u not in failures})
+        return failures
+    finally:
+        cache.invalidate_many(mapping)
+
+def take_many_user_points(mapping, source="command"):
+    """Zieht vielen Usern auf einmal Punkte ab ({username: amount}), gibt Fehler pro User zurück"""
+    code = ledger.source_code(source)
+    try:
+        merged, failures = normalize_deltas(mapping)
+        # Nur die tatsächlich abgebuchten Beträge (höchstens der Kontostand) in die Rangliste
+        if write_behind is not None:
+            taken = {username: write_behind.remove(username, amount, code) for username, amount in merged.items()}
+        else:
+            taken = {}
+            failures = remove_points_many(mapping, code, taken)
+        _update_leaderboard({u: -t for u, t in taken.items() if t and u not in failures})
+        return failures
+    finally:
+        cache.invalidate_many(mapping)
+
+def export_steps(path, fmt=None):
+    """Export als Generator, ein Schritt pro Block (siehe transfer.iter_export)"""
+    flush()
+    return (yield from transfer.iter_export(path, fmt))
+
+def export_points(path, fmt=None):
+    """Exportiert alle Kontostände gestreamt nach CSV/JSONL, gibt Anzahl Zeilen zurück"""
+    return transfer.run_steps(export_steps(path, fmt))
+
+def import_steps(path, mode="overwrite", fmt=None, progress=None):
+    """Import als Generator, ein Schritt pro Block (siehe transfer.iter_import)
+
+    Vor jedem Block werden gepufferte Deltas geschrieben, danach die betroffenen
+    Cache-Einträge und die Rangliste verworfen (eigene Schreibzugriffe ändern
+    data_version nicht). Zwischen den Schritten sind Cache und Rangliste damit
+    immer auf dem Stand der Datenbank.
+    """
+    global _leaderboard_ready
+    steps = transfer.iter_import(path, mode, fmt, ledger.source_code("import"), progress=progress)
+    try:
+        while True:
+            flush()
+            try:
+                usernames = next(steps)
+            except StopIteration as stop:
+                return stop.value
+            cache.invalidate_many(usernames)
+            _leaderboard_ready = False
+            yield
+    finally:
+        steps.close()
+
+def import_points(path, mode="overwrite", fmt=None, progress=None):
+    """Importiert Kontostände gestreamt aus CSV/JSONL (mode: overwrite, add, max)
+
+    Gibt (gelesen, geändert, übersprungen) zurück.
+    """
+    return transfer.run_steps(import_steps(path, mode, fmt, progress))
+
+def cache_stats():
+    """Treffer/Fehlzugriffe/Verdrängungen des Kontostand-Caches"""
+    return cache.stats()
+
+def _ensure_streaks():
+    global _streaks_ready
+    if not _streaks_ready:
+        streaks.load(get_all_streaks())
+        _streaks_ready = True
+
+def load_streaks():
+    """Lädt die Streak-Bitmaps vorab, damit der erste Chat-Eintrag nicht auf die Datenbank wartet"""
+    _ensure_streaks()
+    return len(streaks)
+
+def mark_presence(username):
+    """Merkt die heutige Anwesenheit eines Users (nur im Speicher), True beim ersten Mal pro Tag"""
+    _ensure_streaks()
+    return streaks.mark(username)
+
+def mark_presence_many(usernames):
+    """mark_presence für viele User (von Shards gesammelt), gibt die Anzahl neuer Einträge zurück"""
+    _ensure_streaks()
+    return sum(1 for username in usernames if streaks.mark(username))
+
+def get_streak(username):
+    """(aktuelle Streak, längste Streak) in Tagen"""
+    _ensure_streaks()
+    return streaks.streak(username)
+
+def save_streaks(last_paid_day=None):
+    """Schreibt geänderte Streak-Bitmaps in die Datenbank, gibt die Anzahl zurück"""
+    rows = streaks.take_dirty()
+    if not rows and last_paid_day is None:
+        return 0
+    try:
+        _save_streak_rows(rows, last_paid_day)
+    except Exception:
+        streaks.restore_dirty(rows)
+        raise
+    return len(rows)
+
+def pay_daily_bonuses(daily_bonus, streak_bonus=True, today=None):
+    """Zahlt den Tagesbonus für alle abgeschlossenen, noch nicht bezahlten Tage in einem Batch
+
+    Gibt (bezahlte Tage, {username: bonus}, failures) zurück.
+    """
+    _ensure_streaks()
+    today = day_number() if today is None else today
+    last_paid = get_streak_paid_day()
+    if last_paid is None:
+        # Erster Start: ab heute zählen, vergangene Tage gibt es noch nicht
+        save_streaks(today - 1)
+        return 0, {}, {}
+
+    first_day = max(last_paid + 1, today - WINDOW_DAYS + 1)
+    bonuses = {}
+    for day in range(first_day, today):
+        for username, streak in streaks.rollover(day).items():
+            bonuses[username] = bonuses.get(username, 0) + bonus_for(streak, daily_bonus, streak_bonus)
+
+    failures = give_many_user_points(bonuses, "daily-bonus") if bonuses else {}
+    save_streaks(max(last_paid, today - 1))
+    return max(today - first_day, 0), bonuses, failures
@@ -0,0 +1,87 @@
+# connection.py
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+# Pragmas für jede neue Verbindung
+# WAL: Leser blockieren Schreiber nicht, synchronous=NORMAL spart das fsync pro Commit
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-8000",  # ~8 MB Page-Cache
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA busy_timeout=5000",
+)
+
+STATEMENT_CACHE_SIZE = 128
+
+
+class ConnectionManager:
+    """Hält eine langlebige SQLite-Verbindung pro Prozess, Zugriffe werden per Lock serialisiert
+
+    Weil alle Threads eines Prozesses dieselbe Verbindung nutzen, ändert sich
+    PRAGMA data_version nur durch Commits anderer Prozesse (z.B. der Console).
+    """
+
+    def __init__(self, db_path, pragmas=PRAGMAS):
+        self.db_path = db_path
+        self.pragmas = pragmas
+        self.lock = threading.RLock()
+        self._conn = None
+
+    def _connect(self):
+        conn = sqlite3.connect(
+            self.db_path,
+            check_same_thread=False,
+            cached_statements=STATEMENT_CACHE_SIZE,
+        )
+        for pragma in self.pragmas:
+            conn.execute(pragma)
+        return conn
+
+    def get_connection(self):
+        """Gibt die gemeinsame Verbindung zurück (wird bei Bedarf geöffnet), Aufrufer hält self.lock"""
+        with self.lock:
+            if self._conn is None:
+                self._conn = self._connect()
+            return self._conn
+
+    def execute(self, sql, params=()):
+        """Führt ein einzelnes Statement aus und committet es"""
+        with self.lock:
+            conn = self.get_connection()
+            cursor = conn.execute(sql, params)
+            conn.commit()
+            return cursor
+
+    def query(self, sql, params=()):
+        """Führt eine Leseabfrage aus und gibt alle Zeilen zurück"""
+        with self.lock:
+            return self.get_connection().execute(sql, params).fetchall()
+
+    def query_one(self, sql, params=()):
+        """Führt eine Leseabfrage aus und gibt die erste Zeile zurück"""
+        with self.lock:
+            return self.get_connection().execute(sql, params).fetchone()
+
+    @contextmanager
+    def transaction(self):
+        """Bündelt mehrere Statements in einer Transaktion"""
+        with self.lock:
+            conn = self.get_connection()
+            try:
+                yield conn
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+
+    def close_all(self):
+        """Schließt die Verbindung"""
+        with self.lock:
+            if self._conn is not None:
+                try:
+                    self._conn.close()
+                except sqlite3.Error:
+                    pass
+                self._conn = None
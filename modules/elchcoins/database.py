@@ -1,50 +1,321 @@
 # database.py
-import sqlite3
 import os
+import sqlite3
+import time
+from .connection import ConnectionManager
 
 DB_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "databases")
 os.makedirs(DB_DIR, exist_ok=True)
 
 DB_PATH = os.path.join(DB_DIR, "elchcoins.db")
 
+db = ConnectionManager(DB_PATH)
+
 def init_db():
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute('''
+    db.execute('''
         CREATE TABLE IF NOT EXISTS user_points (
             username TEXT PRIMARY KEY,
             points INTEGER DEFAULT 0
         )
     ''')
-    conn.commit()
-    conn.close()
-
-def add_points(username, amount):
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute('''
-        INSERT INTO user_points (username, points)
-        VALUES (?, ?)
-        ON CONFLICT(username) DO UPDATE SET points = points + ?
-    ''', (username.lower(), amount, amount))
-    conn.commit()
-    conn.close()
-
-def remove_points(username, amount):
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute('''
-        UPDATE user_points
-        SET points = MAX(points - ?, 0)
-        WHERE username = ?
-    ''', (amount, username.lower()))
-    conn.commit()
-    conn.close()
+    db.execute('''
+        CREATE INDEX IF NOT EXISTS idx_user_points_points
+        ON user_points (points DESC)
+    ''')
+    db.execute('''
+        CREATE TABLE IF NOT EXISTS journal_state (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            last_seq INTEGER NOT NULL
+        )
+    ''')
+    # Ledger: jede Gutschrift/Abbuchung als kompakter Datensatz (source als Zahl, siehe ledger.py)
+    db.execute('''
+        CREATE TABLE IF NOT EXISTS coin_ledger (
+            id INTEGER PRIMARY KEY,
+            ts INTEGER NOT NULL,
+            username TEXT NOT NULL,
+            delta INTEGER NOT NULL,
+            source INTEGER NOT NULL
+        )
+    ''')
+    db.execute('''
+        CREATE INDEX IF NOT EXISTS idx_coin_ledger_user
+        ON coin_ledger (username, id)
+    ''')
+    db.execute('''
+        CREATE TABLE IF NOT EXISTS ledger_snapshots (
+            id INTEGER PRIMARY KEY,
+            ts INTEGER NOT NULL,
+            last_ledger_id INTEGER NOT NULL
+        )
+    ''')
+    db.execute('''
+        CREATE TABLE IF NOT EXISTS ledger_snapshot_balances (
+            snapshot_id INTEGER NOT NULL,
+            username TEXT NOT NULL,
+            points INTEGER NOT NULL,
+            PRIMARY KEY (snapshot_id, username)
+        ) WITHOUT ROWID
+    ''')
+    # Tägliche Anwesenheit als Bitmap pro User (siehe streaks.py)
+    db.execute('''
+        CREATE TABLE IF NOT EXISTS user_streaks (
+            username TEXT PRIMARY KEY,
+            last_day INTEGER NOT NULL,
+            longest INTEGER NOT NULL,
+            bits BLOB NOT NULL
+        ) WITHOUT ROWID
+    ''')
+    db.execute('''
+        CREATE TABLE IF NOT EXISTS streak_state (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            last_paid_day INTEGER NOT NULL
+        )
+    ''')
+
+LEDGER_INSERT = "INSERT INTO coin_ledger (ts, username, delta, source) VALUES (?, ?, ?, ?)"
+
+def add_points(username, amount, source=0):
+    username = username.lower()
+    with db.transaction() as conn:
+        conn.execute('''
+            INSERT INTO user_points (username, points)
+            VALUES (?, ?)
+            ON CONFLICT(username) DO UPDATE SET points = points + ?
+        ''', (username, amount, amount))
+        conn.execute(LEDGER_INSERT, (int(time.time()), username, amount, source))
+
+def remove_points(username, amount, source=0):
+    """Zieht höchstens den Kontostand ab, gibt den tatsächlich abgebuchten Betrag zurück"""
+    username = username.lower()
+    with db.transaction() as conn:
+        # Schreibsperre vor dem Lesen holen, damit der abgebuchte Betrag exakt im Ledger landet
+        conn.execute("BEGIN IMMEDIATE")
+        row = conn.execute('SELECT points FROM user_points WHERE username = ?', (username,)).fetchone()
+        taken = min(amount, row[0]) if row else 0
+        if taken > 0:
+            conn.execute('''
+                UPDATE user_points
+                SET points = points - ?
+                WHERE username = ?
+            ''', (taken, username))
+            conn.execute(LEDGER_INSERT, (int(time.time()), username, -taken, source))
+    return max(taken, 0)
 
 def get_points(username):
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute('SELECT points FROM user_points WHERE username = ?', (username.lower(),))
-    result = c.fetchone()
-    conn.close()
+    result = db.query_one('SELECT points FROM user_points WHERE username = ?', (username.lower(),))
+    return result[0] if result else 0
+
+def get_points_many(usernames):
+    """Kontostände vieler User: {username: points} (User ohne Eintrag fehlen)"""
+    names = [u.lower() for u in usernames]
+    result = {}
+    for start in range(0, len(names), BATCH_SIZE):
+        chunk = names[start:start + BATCH_SIZE]
+        placeholders = ",".join("?" * len(chunk))
+        result.update(db.query(f"SELECT username, points FROM user_points WHERE username IN ({placeholders})", chunk))
+    return result
+
+def get_data_version():
+    """Ändert sich, sobald eine andere Verbindung (auch aus einem anderen Prozess) committet"""
+    return db.query_one("PRAGMA data_version")[0]
+
+def get_top(limit):
+    return db.query("SELECT username, points FROM user_points ORDER BY points DESC LIMIT ?", (limit,))
+
+def get_all_points():
+    """Alle (username, points)-Zeilen, z.B. für den Aufbau des Leaderboards"""
+    return db.query("SELECT username, points FROM user_points")
+
+BATCH_SIZE = 500
+
+def normalize_deltas(deltas):
+    """Fasst Deltas pro User zusammen und trennt ungültige Einträge ab"""
+    merged = {}
+    failures = {}
+    for username, amount in deltas.items():
+        if not isinstance(username, str) or not username.strip():
+            failures[username] = "invalid username"
+            continue
+        if isinstance(amount, bool) or not isinstance(amount, int):
+            failures[username] = "amount must be an integer"
+            continue
+        if amount < 0:
+            failures[username] = "amount must not be negative"
+            continue
+        key = username.strip().lower()
+        merged[key] = merged.get(key, 0) + amount
+    return merged, failures
+
+def _apply_batch(conn, sql, rows, failures, sign, source):
+    """Führt alle Zeilen aus, fehlerhafte Zeilen werden einzeln isoliert; erfolgreiche landen im Ledger"""
+    ts = int(time.time())
+    for start in range(0, len(rows), BATCH_SIZE):
+        chunk = rows[start:start + BATCH_SIZE]
+        conn.execute("SAVEPOINT batch")
+        try:
+            conn.executemany(sql, chunk)
+            conn.executemany(LEDGER_INSERT, [(ts, username, sign * amount, source) for username, amount in chunk])
+            conn.execute("RELEASE SAVEPOINT batch")
+            continue
+        except sqlite3.Error:
+            conn.execute("ROLLBACK TO SAVEPOINT batch")
+            conn.execute("RELEASE SAVEPOINT batch")
+
+        # Fallback: Zeile für Zeile, damit ein Fehler nicht den ganzen Chunk kostet
+        for username, amount in chunk:
+            conn.execute("SAVEPOINT row")
+            try:
+                conn.execute(sql, (username, amount))
+                conn.execute(LEDGER_INSERT, (ts, username, sign * amount, source))
+                conn.execute("RELEASE SAVEPOINT row")
+            except sqlite3.Error as e:
+                conn.execute("ROLLBACK TO SAVEPOINT row")
+                conn.execute("RELEASE SAVEPOINT row")
+                failures[username] = str(e)
+
+def add_points_many(deltas, source=0):
+    """Vergibt Punkte an viele User in einer Transaktion, gibt {username: fehler} zurück"""
+    merged, failures = normalize_deltas(deltas)
+    rows = [(username, amount) for username, amount in merged.items() if amount]
+    if rows:
+        with db.transaction() as conn:
+            conn.execute("BEGIN")
+            _apply_batch(conn, '''
+                INSERT INTO user_points (username, points)
+                VALUES (?1, ?2)
+                ON CONFLICT(username) DO UPDATE SET points = points + ?2
+            ''', rows, failures, 1, source)
+    return failures
+
+def remove_points_many(deltas, source=0, taken=None):
+    """Zieht vielen Usern Punkte in einer Transaktion ab, gibt {username: fehler} zurück
+
+    taken (falls übergeben) bekommt die tatsächlich abgebuchten Beträge {username: betrag}.
+    """
+    merged, failures = normalize_deltas(deltas)
+    if not any(merged.values()):
+        return failures
+    with db.transaction() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        # Tatsächlich abbuchbare Beträge bestimmen (Kontostand fällt nie unter 0)
+        rows = []
+        for username, amount in merged.items():
+            row = conn.execute('SELECT points FROM user_points WHERE username = ?', (username,)).fetchone()
+            available = min(amount, row[0]) if row else 0
+            if available > 0:
+                rows.append((username, available))
+        _apply_batch(conn, '''
+            UPDATE user_points
+            SET points = points - ?2
+            WHERE username = ?1
+        ''', rows, failures, -1, source)
+    if taken is not None:
+        taken.update((username, amount) for username, amount in rows if username not in failures)
+    return failures
+
+def apply_deltas(deltas, last_seq, ledger_rows=()):
+    """Schreibt Deltas, Ledger-Einträge und den Journal-Stand atomar in einer Transaktion"""
+    rows = [(username, delta) for username, delta in deltas.items() if delta]
+    ledger_rows = list(ledger_rows)
+    with db.transaction() as conn:
+        conn.execute("BEGIN")
+        for start in range(0, len(ledger_rows), BATCH_SIZE):
+            conn.executemany(LEDGER_INSERT, ledger_rows[start:start + BATCH_SIZE])
+        for start in range(0, len(rows), BATCH_SIZE):
+            conn.executemany('''
+                INSERT INTO user_points (username, points)
+                VALUES (?1, MAX(?2, 0))
+                ON CONFLICT(username) DO UPDATE SET points = MAX(points + ?2, 0)
+            ''', rows[start:start + BATCH_SIZE])
+        conn.execute('''
+            INSERT INTO journal_state (id, last_seq) VALUES (1, ?1)
+            ON CONFLICT(id) DO UPDATE SET last_seq = ?1
+        ''', (last_seq,))
+
+def get_journal_seq():
+    """Letzte bereits in die Datenbank übernommene Journal-Sequenznummer"""
+    result = db.query_one("SELECT last_seq FROM journal_state WHERE id = 1")
     return result[0] if result else 0
+
+MERGE_MODES = ("overwrite", "add", "max")
+
+def merge_points_chunk(values, mode, source=0):
+    """Übernimmt {username: points} nach Merge-Modus in einer Transaktion, gibt Anzahl geänderter User zurück"""
+    if mode not in MERGE_MODES:
+        raise ValueError(f"Unknown merge mode: {mode}")
+    ts = int(time.time())
+    items = list(values.items())
+    changed = 0
+    with db.transaction() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        for start in range(0, len(items), BATCH_SIZE):
+            chunk = items[start:start + BATCH_SIZE]
+            placeholders = ",".join("?" * len(chunk))
+            current = dict(conn.execute(
+                f"SELECT username, points FROM user_points WHERE username IN ({placeholders})",
+                [username for username, _ in chunk],
+            ).fetchall())
+
+            updates = []
+            ledger_rows = []
+            for username, points in chunk:
+                old = current.get(username, 0)
+                if mode == "overwrite":
+                    new = points
+                elif mode == "add":
+                    new = old + points
+                else:
+                    new = max(old, points)
+                new = max(new, 0)
+                if new != old or username not in current:
+                    updates.append((username, new))
+                if new != old:
+                    ledger_rows.append((ts, username, new - old, source))
+
+            conn.executemany('''
+                INSERT INTO user_points (username, points)
+                VALUES (?1, ?2)
+                ON CONFLICT(username) DO UPDATE SET points = ?2
+            ''', updates)
+            conn.executemany(LEDGER_INSERT, ledger_rows)
+            changed += len(ledger_rows)
+    return changed
+
+def iter_all_points(chunk_size=BATCH_SIZE):
+    """Streamt alle (username, points)-Zeilen sortiert in Blöcken, ohne alles in den Speicher zu laden"""
+    last = ""
+    while True:
+        rows = db.query(
+            "SELECT username, points FROM user_points WHERE username > ? ORDER BY username LIMIT ?",
+            (last, chunk_size),
+        )
+        if not rows:
+            break
+        yield from rows
+        last = rows[-1][0]
+
+def get_all_streaks():
+    """Alle gespeicherten Streak-Bitmaps als (username, last_day, longest, bits)"""
+    return db.query("SELECT username, last_day, longest, bits FROM user_streaks")
+
+def get_streak_paid_day():
+    """Letzter Tag, für den der Tagesbonus ausgezahlt wurde (None vor der ersten Auszahlung)"""
+    result = db.query_one("SELECT last_paid_day FROM streak_state WHERE id = 1")
+    return result[0] if result else None
+
+def save_streaks(rows, last_paid_day=None):
+    """Speichert geänderte Streak-Bitmaps und optional den Auszahlungsstand in einer Transaktion"""
+    with db.transaction() as conn:
+        conn.execute("BEGIN")
+        for start in range(0, len(rows), BATCH_SIZE):
+            conn.executemany('''
+                INSERT INTO user_streaks (username, last_day, longest, bits)
+                VALUES (?1, ?2, ?3, ?4)
+                ON CONFLICT(username) DO UPDATE SET last_day = ?2, longest = ?3, bits = ?4
+            ''', rows[start:start + BATCH_SIZE])
+        if last_paid_day is not None:
+            conn.execute('''
+                INSERT INTO streak_state (id, last_paid_day) VALUES (1, ?1)
+                ON CONFLICT(id) DO UPDATE SET last_paid_day = ?1
+            ''', (last_paid_day,))
@@ -0,0 +1,75 @@
+"""
+In-Memory-Leaderboard
+
+Hält alle Kontostände als sortierte Liste (-points, username), die bei jeder
+Änderung inkrementell per bisect aktualisiert wird. Top-N und Seiten sind damit
+einfache Slices, Platzierungen eine binäre Suche, ohne ORDER BY oder COUNT
+über die ganze Tabelle.
+"""
+import threading
+from bisect import bisect_left, insort
+
+
+class Leaderboard:
+    """Sortierte Rangliste aller User, inkrementell gepflegt"""
+
+    def __init__(self):
+        self._points = {}
+        self._sorted = []
+        self._lock = threading.Lock()
+
+    def rebuild(self, rows):
+        """Baut die Rangliste komplett aus (username, points)-Zeilen neu auf"""
+        points = {username: value for username, value in rows}
+        ordered = sorted((-value, username) for username, value in points.items())
+        with self._lock:
+            self._points = points
+            self._sorted = ordered
+
+    def get(self, username):
+        return self._points.get(username.lower(), 0)
+
+    def set(self, username, value):
+        """Setzt den Kontostand eines Users und verschiebt ihn an die richtige Position"""
+        username = username.lower()
+        with self._lock:
+            old = self._points.get(username)
+            if old == value:
+                return
+            if old is not None:
+                index = bisect_left(self._sorted, (-old, username))
+                if index < len(self._sorted) and self._sorted[index] == (-old, username):
+                    del self._sorted[index]
+            self._points[username] = value
+            insort(self._sorted, (-value, username))
+
+    def add(self, username, delta):
+        """Addiert ein Delta (Untergrenze 0) und gibt den neuen Kontostand zurück"""
+        value = max(self.get(username) + delta, 0)
+        self.set(username, value)
+        return value
+
+    def top(self, limit=3):
+        """Die besten `limit` User als [(username, points), ...]"""
+        with self._lock:
+            return [(username, -neg) for neg, username in self._sorted[:limit]]
+
+    def page(self, page, page_size=10):
+        """Eine Seite der Rangliste (page beginnt bei 1)"""
+        start = max(page - 1, 0) * page_size
+        with self._lock:
+            return [(username, -neg) for neg, username in self._sorted[start:start + page_size]]
+
+    def position(self, points):
+        """Platz für einen Kontostand (1 = bester), gleiche Punkte teilen sich den Platz"""
+        with self._lock:
+            # (-points,) ist kleiner als jedes (-points, username) -> Anzahl User mit mehr Punkten
+            return bisect_left(self._sorted, (-points,)) + 1
+
+    def count_below(self, points):
+        """Anzahl User mit weniger Punkten"""
+        with self._lock:
+            return len(self._sorted) - bisect_left(self._sorted, (-points + 1,))
+
+    def __len__(self):
+        return len(self._sorted)
@@ -0,0 +1,177 @@
+"""
+Coin-Ledger: Append-Only-Historie aller Gutschriften und Abbuchungen
+
+Die Einträge selbst schreibt database.py (bzw. der Write-Behind-Puffer) in
+derselben Transaktion wie die Kontostände. Hier liegen Snapshots, Kompaktierung
+alter Segmente und die "Kontostand zum Zeitpunkt T"-Abfrage, die vom nächsten
+Snapshot aus nur die danach folgenden Einträge aufsummiert.
+"""
+import csv
+import gzip
+import os
+import threading
+import time
+
+from . import database
+
+# Quellen werden als kleine Zahl gespeichert
+SOURCES = {
+    "unknown": 0,
+    "command": 1,
+    "auto-reward": 2,
+    "follow": 3,
+    "console": 4,
+    "import": 5,
+    "daily-bonus": 6,
+}
+SOURCE_NAMES = {code: name for name, code in SOURCES.items()}
+
+ARCHIVE_DIR = os.path.join(database.DB_DIR, "ledger_archive")
+SNAPSHOT_INTERVAL = 6 * 3600  # Sekunden
+KEEP_SNAPSHOTS = 4
+
+
+def source_code(name):
+    """Wandelt einen Quellen-Namen in den gespeicherten Code um"""
+    if name not in SOURCES:
+        raise ValueError(f"Unknown ledger source: {name}")
+    return SOURCES[name]
+
+def source_name(code):
+    return SOURCE_NAMES.get(code, "unknown")
+
+def take_snapshot(ts=None):
+    """Speichert alle aktuellen Kontostände zusammen mit der letzten Ledger-ID, gibt die Snapshot-ID zurück
+
+    Ausstehende Write-Behind-Deltas müssen vorher geflusht sein (coinmanager.take_ledger_snapshot).
+    """
+    ts = int(time.time()) if ts is None else int(ts)
+    with database.db.transaction() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM coin_ledger").fetchone()[0]
+        snapshot_id = conn.execute(
+            "INSERT INTO ledger_snapshots (ts, last_ledger_id) VALUES (?, ?)", (ts, last_id)
+        ).lastrowid
+        conn.execute('''
+            INSERT INTO ledger_snapshot_balances (snapshot_id, username, points)
+            SELECT ?, username, points FROM user_points WHERE points != 0
+        ''', (snapshot_id,))
+    return snapshot_id
+
+def ensure_initial_snapshot():
+    """Legt beim ersten Start einen Basis-Snapshot an, damit Kontostände von vor dem Ledger zählen"""
+    if database.db.query_one("SELECT 1 FROM ledger_snapshots LIMIT 1") is None:
+        take_snapshot()
+
+def balance_as_of(username, ts):
+    """Kontostand eines Users zum Zeitpunkt ts (Unix-Sekunden)"""
+    username = username.lower()
+    snapshot = database.db.query_one('''
+        SELECT id, last_ledger_id FROM ledger_snapshots
+        WHERE ts <= ? ORDER BY ts DESC, id DESC LIMIT 1
+    ''', (int(ts),))
+    if snapshot is None:
+        raise ValueError("No ledger history available for that time (before the oldest snapshot)")
+
+    snapshot_id, last_ledger_id = snapshot
+    row = database.db.query_one(
+        "SELECT points FROM ledger_snapshot_balances WHERE snapshot_id = ? AND username = ?",
+        (snapshot_id, username),
+    )
+    base = row[0] if row else 0
+    delta = database.db.query_one('''
+        SELECT COALESCE(SUM(delta), 0) FROM coin_ledger
+        WHERE username = ? AND id > ? AND ts <= ?
+    ''', (username, last_ledger_id, int(ts)))[0]
+    return base + delta
+
+def history(username, limit=10):
+    """Letzte Ledger-Einträge eines Users als [(ts, delta, source_name), ...], neueste zuerst"""
+    rows = database.db.query('''
+        SELECT ts, delta, source FROM coin_ledger
+        WHERE username = ? ORDER BY id DESC LIMIT ?
+    ''', (username.lower(), limit))
+    return [(ts, delta, source_name(source)) for ts, delta, source in rows]
+
+def compact(keep_snapshots=KEEP_SNAPSHOTS, archive_dir=ARCHIVE_DIR):
+    """Archiviert und löscht Ledger-Einträge vor dem ältesten behaltenen Snapshot
+
+    Gibt die Anzahl der archivierten Einträge zurück. Ohne archive_dir werden
+    die Einträge nur gelöscht.
+    """
+    snapshots = database.db.query(
+        "SELECT id, last_ledger_id FROM ledger_snapshots ORDER BY ts DESC, id DESC"
+    )
+    if len(snapshots) <= keep_snapshots:
+        return 0
+
+    _, cutoff = snapshots[keep_snapshots - 1]
+    dropped = [snapshot_id for snapshot_id, _ in snapshots[keep_snapshots:]]
+
+    with database.db.transaction() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        archived = 0
+        if archive_dir:
+            archived = _archive(conn, cutoff, archive_dir)
+        else:
+            archived = conn.execute("SELECT COUNT(*) FROM coin_ledger WHERE id <= ?", (cutoff,)).fetchone()[0]
+        conn.execute("DELETE FROM coin_ledger WHERE id <= ?", (cutoff,))
+        conn.executemany("DELETE FROM ledger_snapshot_balances WHERE snapshot_id = ?", [(i,) for i in dropped])
+        conn.executemany("DELETE FROM ledger_snapshots WHERE id = ?", [(i,) for i in dropped])
+    return archived
+
+def _archive(conn, cutoff, archive_dir):
+    """Schreibt alle Einträge bis cutoff gestreamt in eine gzip-CSV-Datei"""
+    os.makedirs(archive_dir, exist_ok=True)
+    first = conn.execute("SELECT MIN(id) FROM coin_ledger WHERE id <= ?", (cutoff,)).fetchone()[0]
+    if first is None:
+        return 0
+
+    path = os.path.join(archive_dir, f"ledger_{first}-{cutoff}.csv.gz")
+    count = 0
+    with gzip.open(path, "wt", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "ts", "username", "delta", "source"])
+        cursor = conn.execute(
+            "SELECT id, ts, username, delta, source FROM coin_ledger WHERE id <= ? ORDER BY id", (cutoff,)
+        )
+        while True:
+            rows = cursor.fetchmany(database.BATCH_SIZE)
+            if not rows:
+                break
+            writer.writerows((i, ts, user, delta, source_name(src)) for i, ts, user, delta, src in rows)
+            count += len(rows)
+    return count
+
+
+class LedgerMaintenance:
+    """Hintergrund-Thread: periodisch Snapshot anlegen und alte Segmente kompaktieren"""
+
+    def __init__(self, snapshot, interval=SNAPSHOT_INTERVAL, keep_snapshots=KEEP_SNAPSHOTS,
+                 archive_dir=ARCHIVE_DIR):
+        self.snapshot = snapshot
+        self.interval = interval
+        self.keep_snapshots = keep_snapshots
+        self.archive_dir = archive_dir
+        self.last_error = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="elchcoins-ledger", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.snapshot()
+                compact(self.keep_snapshots, self.archive_dir)
+            except Exception as e:
+                self.last_error = str(e)
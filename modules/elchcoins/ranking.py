@@ -0,0 +1,71 @@
+"""
+Rang-Engine: Kontostand -> Rang-Stufe
+
+Die Stufen sind Daten (überschreibbar über custom_settings["rank_tiers"] in der
+rank-Config) und werden per binärer Suche aufgelöst. Platzierung und Perzentil
+kommen aus dem Leaderboard in coinmanager.
+"""
+from bisect import bisect_left
+
+# "up_to" ist die inklusive Obergrenze, die letzte Stufe hat keine (None)
+DEFAULT_TIERS = [
+    {"name": "newbe", "up_to": 100, "message": "Welcome in the Chat! ❤️"},
+    {"name": "novice", "up_to": 500, "message": "Thanks for showing up! 🥳"},
+    {"name": "watcher", "up_to": 1000, "message": "Thanks for actually Watching! 😊"},
+    {"name": "Viewer", "up_to": 2000, "message": "Someone seems to actually like my Stream 📺"},
+    {"name": "master", "up_to": 5000, "message": "Playing Ranked now huh?"},
+    {"name": "elite", "up_to": 7500, "message": "Going into E-Sports now it seems like? 🏆"},
+    {"name": "Legend", "up_to": 10000, "message": "You are on top! but maybe it goes higher ; )"},
+    {"name": "Jobless", "up_to": None, "message": "I dont think I have to say more... you are CRAZY!"},
+]
+
+
+class RankEngine:
+    """Löst Kontostände per binärer Suche über die Stufen-Grenzen auf"""
+
+    def __init__(self, tiers=None):
+        self.set_tiers(tiers or DEFAULT_TIERS)
+
+    def set_tiers(self, tiers):
+        bounded = sorted((t for t in tiers if t.get("up_to") is not None), key=lambda t: t["up_to"])
+        unbounded = [t for t in tiers if t.get("up_to") is None]
+        if len(unbounded) != 1:
+            raise ValueError("Exactly one rank tier must have no upper bound (up_to: null)")
+        self.tiers = bounded + unbounded
+        self.bounds = [t["up_to"] for t in bounded]
+
+    def resolve(self, points):
+        """Gibt die Stufe (dict mit name/message) für einen Kontostand zurück"""
+        return self.tiers[bisect_left(self.bounds, points)]
+
+    def names(self):
+        return [t["name"] for t in self.tiers]
+
+
+engine = RankEngine()
+
+def load_tiers(module_config):
+    """Übernimmt Stufen aus der Modul-Config, falls vorhanden (sonst Standard)"""
+    tiers = module_config.custom_settings.get("rank_tiers") if module_config else None
+    engine.set_tiers(tiers or DEFAULT_TIERS)
+
+def rank_many(usernames):
+    """Batch-API: Stufe, Platz und Perzentil für viele User in einem Durchlauf"""
+    from . import coinmanager  # erst hier, Shards importieren nur describe
+    return describe(coinmanager.get_user_ranks(usernames))
+
+def describe(ranks):
+    """{username: (points, position, total, percentile)} -> {username: {"tier", "position", ...}}"""
+    result = {}
+    for username, (points, position, total, percentile) in ranks.items():
+        result[username] = {
+            "points": points,
+            "tier": engine.resolve(points),
+            "position": position,
+            "total": total,
+            "percentile": percentile,
+        }
+    return result
+
+def rank_one(username):
+    return rank_many([username])[username]
@@ -0,0 +1,176 @@
+"""
+Zeitplan für Auto-Rewards
+
+Die Ticks liegen fest auf start + n * Intervall (wall clock, passend zu den
+Minuten-Buckets des ActivityTrackers), dadurch driftet der Zeitplan nicht.
+Hängt der Event-Loop, werden beim nächsten Aufwachen alle verpassten Ticks
+nachgeholt: jeder Tick zahlt nur die Buckets seit dem vorherigen Tick aus,
+es wird also nichts doppelt bezahlt. Alle nachgeholten Ticks landen in einem
+einzigen Batch für den Coin-Store. Als bezahlt gelten die Buckets erst nach
+finish(), schlägt die Auszahlung fehl, holt der nächste Tick sie nach.
+"""
+import time
+from collections import deque
+
+DEFAULT_BASE_REWARD = 10
+DEFAULT_INTERVAL = 600         # Sekunden
+DEFAULT_EVENT_SECONDS = 1800   # Dauer eines Raid/Host-Multiplikators
+MIN_INTERVAL = 60              # kleiner als ein Bucket ergibt keinen Sinn
+TICK_HISTORY = 50
+
+
+class RewardBatch:
+    """Auszahlung für einen oder mehrere (nachgeholte) Ticks"""
+
+    def __init__(self, due, ticks, skipped, rewards, multiplier, lag, compute_seconds, paid_key):
+        self.due = due
+        self.ticks = ticks
+        self.skipped = skipped
+        self.rewards = rewards
+        self.multiplier = multiplier
+        self.lag = lag
+        self.compute_seconds = compute_seconds
+        self.paid_key = paid_key  # letzter Bucket, der mit diesem Batch bezahlt ist
+
+    @property
+    def points(self):
+        return sum(self.rewards.values())
+
+
+class RewardScheduler:
+    """Berechnet fällige Ticks und deren Belohnungen aus dem ActivityTracker"""
+
+    def __init__(self, activity, base_reward=DEFAULT_BASE_REWARD, interval=DEFAULT_INTERVAL,
+                 multiplier_events=None, reward_multiplier=1.0, enabled=True):
+        self.activity = activity
+        self.base_reward = base_reward
+        self.interval = interval
+        self.multiplier_events = dict(multiplier_events or {})
+        self.reward_multiplier = reward_multiplier
+        self.enabled = enabled
+        self.events = []  # [(start, end, event, multiplier)]
+        self.next_due = None
+        self.last_paid_key = None
+        self.history = deque(maxlen=TICK_HISTORY)
+
+    def configure(self, base_reward=None, interval=None, multiplier_events=None, reward_multiplier=None,
+                  enabled=None):
+        """Übernimmt geänderte Einstellungen, ein neues Intervall gilt ab dem nächsten Tick"""
+        if base_reward is not None:
+            self.base_reward = max(int(base_reward), 0)
+        if interval is not None:
+            interval = max(int(interval), MIN_INTERVAL)
+            if self.next_due is not None and interval != self.interval:
+                self.next_due += interval - self.interval
+            self.interval = interval
+        if multiplier_events is not None:
+            self.multiplier_events = {name: float(value) for name, value in multiplier_events.items()}
+        if reward_multiplier is not None:
+            self.reward_multiplier = float(reward_multiplier)
+        if enabled is not None:
+            self.enabled = bool(enabled)
+
+    def start(self, now=None):
+        """Setzt den Zeitplan auf: erster Tick ein Intervall nach jetzt"""
+        now = time.time() if now is None else now
+        self.next_due = now + self.interval
+        self.last_paid_key = self.activity.bucket_key(now) - 1
+
+    def seconds_until_due(self, now=None):
+        now = time.time() if now is None else now
+        # Begrenzen, falls die Uhr zurückspringt
+        return min(max(self.next_due - now, 0.0), self.interval)
+
+    # --- Multiplikator-Events ---
+
+    def start_event(self, event, duration=DEFAULT_EVENT_SECONDS, now=None):
+        """Aktiviert einen Multiplikator (z.B. raid, host), gibt den Faktor zurück"""
+        if event not in self.multiplier_events:
+            raise ValueError(f"Unknown multiplier event: {event} (use {', '.join(self.multiplier_events)})")
+        now = time.time() if now is None else now
+        multiplier = self.multiplier_events[event]
+        self.events.append((now, now + duration, event, multiplier))
+        return multiplier
+
+    def multiplier_at(self, ts):
+        """Höchster aktiver Event-Multiplikator zum Zeitpunkt ts (1.0 ohne Event)"""
+        active = [multiplier for start, end, _, multiplier in self.events if start <= ts < end]
+        return max(active, default=1.0)
+
+    def active_events(self, now=None):
+        now = time.time() if now is None else now
+        return [(event, multiplier, end - now) for start, end, event, multiplier in self.events
+                if start <= now < end]
+
+    def _prune_events(self, now):
+        self.events = [entry for entry in self.events if entry[1] > now]
+
+    # --- Ticks ---
+
+    def collect(self, now=None):
+        """Fasst alle fälligen Ticks zu einem RewardBatch zusammen, None wenn noch nichts fällig ist"""
+        now = time.time() if now is None else now
+        if self.next_due is None:
+            self.start(now)
+        if now < self.next_due:
+            return None
+
+        started = time.perf_counter()
+        due = self.next_due
+        lag = now - due
+        # Ältere Ticks als das Fenster des Trackers haben keine Daten mehr
+        max_ticks = max(self.activity.num_buckets * self.activity.bucket_seconds // self.interval, 1)
+        ticks = int(lag // self.interval) + 1
+        skipped = max(ticks - max_ticks, 0)
+
+        rewards = {}
+        multiplier = 1.0
+        paid_key = self.last_paid_key
+        for index in range(ticks):
+            tick_end = due + index * self.interval
+            until_key = self.activity.bucket_key(tick_end) - 1
+            if index < skipped or not self.enabled or until_key <= paid_key:
+                paid_key = max(paid_key, until_key)
+                continue
+            multiplier = self.multiplier_at(tick_end) * self.reward_multiplier
+            tick_rewards = self.activity.weighted_rewards(self.base_reward * multiplier, paid_key + 1, until_key)
+            for username, amount in tick_rewards.items():
+                rewards[username] = rewards.get(username, 0) + amount
+            paid_key = until_key
+
+        self.next_due = due + ticks * self.interval
+        self._prune_events(now)
+        return RewardBatch(due, ticks, skipped, rewards, multiplier, lag, time.perf_counter() - started, paid_key)
+
+    def finish(self, batch, payout_seconds, failures=None):
+        """Markiert die Buckets eines ausgezahlten Batches als bezahlt und speichert Kennzahlen"""
+        self.last_paid_key = max(self.last_paid_key, batch.paid_key)
+        failures = failures or {}
+        entry = {
+            "due": batch.due,
+            "ticks": batch.ticks,
+            "skipped": batch.skipped,
+            "users": len(batch.rewards) - len(failures),
+            "failed": len(failures),
+            "points": batch.points,
+            "multiplier": batch.multiplier,
+            "lag": round(batch.lag, 3),
+            "compute_ms": round(batch.compute_seconds * 1000, 2),
+            "payout_ms": round(payout_seconds * 1000, 2),
+        }
+        self.history.append(entry)
+        return entry
+
+    def stats(self):
+        """Letzter Tick und Mittelwerte über die gespeicherten Ticks"""
+        if not self.history:
+            return {"ticks": 0}
+        count = len(self.history)
+        return {
+            "ticks": count,
+            "last": self.history[-1],
+            "avg_users": round(sum(t["users"] for t in self.history) / count, 1),
+            "avg_compute_ms": round(sum(t["compute_ms"] for t in self.history) / count, 2),
+            "avg_payout_ms": round(sum(t["payout_ms"] for t in self.history) / count, 2),
+            "max_payout_ms": max(t["payout_ms"] for t in self.history),
+        }
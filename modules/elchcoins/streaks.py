@@ -0,0 +1,177 @@
+"""
+Tägliche Anwesenheit und Streaks als Bitmaps
+
+Jeder User bekommt eine feste Zeile von ROW_BYTES Bytes in einem großen
+bytearray, ein Bit pro Tag in einem Ring über WINDOW_DAYS Tage. Tag d liegt
+auf Bit (-d) % WINDOW_DAYS, so dass nach einer Rotation Bit i immer "heute - i"
+ist. Aktuelle und längste Streaks ergeben sich dann aus Bit-Operationen auf
+einem int statt aus Schleifen über Datumswerte.
+
+100k User mit einem Jahr Historie brauchen so ca. 4,6 MB. Abfragen laufen
+komplett im Speicher, persistiert wird nur beim Speichern (database.save_streaks).
+"""
+import threading
+from array import array
+from datetime import date
+
+WINDOW_DAYS = 368             # Vielfaches von 8, etwas mehr als ein Jahr
+ROW_BYTES = WINDOW_DAYS // 8
+FULL_MASK = (1 << WINDOW_DAYS) - 1
+
+STREAK_STEP_PERCENT = 10      # Bonus-Aufschlag pro weiterem Streak-Tag
+STREAK_MAX_STEPS = 10         # höchstens +100%
+
+
+def day_number(ts=None):
+    """Lokaler Kalendertag als fortlaufende Zahl"""
+    return (date.today() if ts is None else date.fromtimestamp(ts)).toordinal()
+
+def trailing_ones(bits):
+    """Anzahl gesetzter Bits ab Bit 0 (Länge der aktuellen Serie)"""
+    return (~bits & (bits + 1)).bit_length() - 1
+
+def longest_run(bits):
+    """Längste Folge gesetzter Bits: so oft mit dem um eins verschobenen Wert verunden, bis nichts übrig ist"""
+    run = 0
+    while bits:
+        bits &= bits >> 1
+        run += 1
+    return run
+
+def bonus_for(streak, daily_bonus, streak_bonus=True):
+    """Tagesbonus inkl. Streak-Aufschlag (+10% pro weiterem Tag, maximal +100%)"""
+    if not streak_bonus or streak <= 1:
+        return daily_bonus
+    steps = min(streak - 1, STREAK_MAX_STEPS)
+    return daily_bonus * (100 + steps * STREAK_STEP_PERCENT) // 100
+
+
+class StreakTracker:
+    """Bitmap-Anwesenheit für alle User"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.ids = {}
+        self.names = []
+        self.rows = bytearray()
+        self.last_day = array("i")
+        self.longest = array("H")
+        self.dirty = set()
+
+    def _new_id(self, username, last_day=0, longest=0, row=None):
+        uid = len(self.names)
+        self.ids[username] = uid
+        self.names.append(username)
+        self.rows += row if row is not None else bytes(ROW_BYTES)
+        self.last_day.append(last_day)
+        self.longest.append(min(longest, 0xFFFF))
+        return uid
+
+    def _set_bit(self, uid, day, value):
+        bit = -day % WINDOW_DAYS
+        index = uid * ROW_BYTES + bit // 8
+        if value:
+            self.rows[index] |= 1 << (bit % 8)
+        else:
+            self.rows[index] &= ~(1 << (bit % 8)) & 0xFF
+
+    def mark(self, username, day=None):
+        """Merkt die Anwesenheit eines Users für einen Tag, gibt True beim ersten Mal pro Tag zurück"""
+        username = username.lower()
+        day = day_number() if day is None else day
+        with self.lock:
+            uid = self.ids.get(username)
+            if uid is None:
+                uid = self._new_id(username)
+            last = self.last_day[uid]
+            if last == day:
+                return False
+            if day > last:
+                # Bits aus dem letzten Ring-Durchlauf zwischen letztem Besuch und heute löschen
+                if day - last >= WINDOW_DAYS:
+                    start = uid * ROW_BYTES
+                    self.rows[start:start + ROW_BYTES] = bytes(ROW_BYTES)
+                else:
+                    for gap_day in range(last + 1, day):
+                        self._set_bit(uid, gap_day, False)
+                self.last_day[uid] = day
+            self._set_bit(uid, day, True)
+            self.dirty.add(uid)
+            return True
+
+    def _bits(self, uid, day):
+        """Anwesenheit relativ zu day: Bit i ist gesetzt, wenn der User am Tag day - i da war"""
+        start = uid * ROW_BYTES
+        raw = int.from_bytes(self.rows[start:start + ROW_BYTES], "little")
+        shift = -day % WINDOW_DAYS
+        bits = ((raw >> shift) | (raw << (WINDOW_DAYS - shift))) & FULL_MASK
+        # Tage nach dem letzten Besuch sind noch nicht gelöscht und zählen nicht
+        gap = day - self.last_day[uid]
+        if gap >= WINDOW_DAYS:
+            return 0
+        if gap > 0:
+            bits = (bits >> gap) << gap
+        return bits
+
+    def streak(self, username, day=None):
+        """(aktuelle Streak, längste Streak) eines Users
+
+        Die aktuelle Streak bleibt bis zum Ende eines Tages bestehen, auch wenn
+        der User heute noch nicht da war.
+        """
+        day = day_number() if day is None else day
+        with self.lock:
+            uid = self.ids.get(username.lower())
+            if uid is None:
+                return 0, 0
+            bits = self._bits(uid, day)
+            current = trailing_ones(bits) if bits & 1 else trailing_ones(bits >> 1)
+            return current, max(longest_run(bits), self.longest[uid])
+
+    def rollover(self, day):
+        """Streaks aller User, die an `day` da waren: {username: streak bis einschließlich day}"""
+        streaks = {}
+        with self.lock:
+            last_day = self.last_day
+            for uid, username in enumerate(self.names):
+                if last_day[uid] < day:
+                    continue
+                bits = self._bits(uid, day)
+                if not bits & 1:
+                    continue
+                current = trailing_ones(bits)
+                streaks[username] = current
+                if current > self.longest[uid]:
+                    self.longest[uid] = min(current, 0xFFFF)
+                    self.dirty.add(uid)
+        return streaks
+
+    def load(self, rows):
+        """Lädt gespeicherte Zeilen (username, last_day, longest, bits), vor dem ersten mark() aufrufen"""
+        with self.lock:
+            for username, last_day, longest, bits in rows:
+                row = bytes(bits[:ROW_BYTES]).ljust(ROW_BYTES, b"\0")
+                if username not in self.ids:
+                    self._new_id(username, last_day, longest, row)
+
+    def take_dirty(self):
+        """Geänderte Zeilen zum Speichern, setzt die Markierung zurück"""
+        with self.lock:
+            rows = [
+                (self.names[uid], self.last_day[uid], self.longest[uid],
+                 bytes(self.rows[uid * ROW_BYTES:(uid + 1) * ROW_BYTES]))
+                for uid in self.dirty
+            ]
+            self.dirty.clear()
+        return rows
+
+    def restore_dirty(self, rows):
+        """Markiert Zeilen nach einem fehlgeschlagenen Speichern wieder als geändert"""
+        with self.lock:
+            self.dirty.update(self.ids[username] for username, *_ in rows if username in self.ids)
+
+    def __len__(self):
+        return len(self.names)
+
+    def memory_bytes(self):
+        return len(self.rows) + len(self.last_day) * self.last_day.itemsize + len(self.longest) * self.longest.itemsize
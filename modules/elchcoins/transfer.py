@@ -0,0 +1,152 @@
+"""
+Streaming Import/Export der Elchcoins-Datenbank (CSV und JSONL)
+
+Dateien werden zeilenweise gelesen bzw. geschrieben und in Blöcken fester
+Größe übernommen, der Speicherverbrauch bleibt dadurch konstant. Jeder Block
+ist eine eigene, kurze Transaktion, damit der laufende Bot nicht lange auf die
+Schreibsperre warten muss.
+"""
+import csv
+import json
+import os
+
+from . import database
+
+FORMATS = ("csv", "jsonl")
+CHUNK_ROWS = 10000  # Zeilen pro Transaktion
+PROGRESS_EVERY = 100000
+
+
+def detect_format(path, fmt=None):
+    """Bestimmt das Format aus dem Parameter oder der Dateiendung"""
+    if fmt is None:
+        ext = os.path.splitext(path)[1].lower().lstrip(".")
+        fmt = "jsonl" if ext in ("jsonl", "ndjson", "json") else "csv"
+    fmt = fmt.lower()
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format: {fmt} (use csv or jsonl)")
+    return fmt
+
+def _parse_row(username, points):
+    if not isinstance(username, str) or not username.strip():
+        return None
+    try:
+        points = int(points)
+    except (TypeError, ValueError):
+        return None
+    if points < 0:
+        return None
+    return username.strip().lower(), points
+
+def _read_csv(f):
+    for index, row in enumerate(csv.reader(f)):
+        if len(row) < 2:
+            yield None
+            continue
+        parsed = _parse_row(row[0], row[1])
+        # Kopfzeile (username,points) überspringen
+        if parsed is None and index == 0:
+            continue
+        yield parsed
+
+def _read_jsonl(f):
+    for line in f:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            yield None
+            continue
+        if not isinstance(record, dict):
+            yield None
+            continue
+        yield _parse_row(record.get("username"), record.get("points"))
+
+def iter_import(path, mode="overwrite", fmt=None, source=0, chunk_rows=CHUNK_ROWS, progress=None):
+    """Importiert Kontostände blockweise, liefert nach jedem Block die geänderten User
+
+    Zwischen zwei Blöcken kann der Aufrufer andere Datenbank-Aufträge abarbeiten.
+    Rückgabewert des Generators ist (gelesen, geändert, übersprungen).
+    mode: overwrite (Wert ersetzen), add (addieren) oder max (größeren Wert behalten)
+    """
+    if mode not in database.MERGE_MODES:
+        raise ValueError(f"Unknown merge mode: {mode} (use {', '.join(database.MERGE_MODES)})")
+    fmt = detect_format(path, fmt)
+    reader = _read_csv if fmt == "csv" else _read_jsonl
+
+    read = changed = skipped = 0
+    next_progress = PROGRESS_EVERY
+    chunk = {}
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        for parsed in reader(f):
+            if parsed is None:
+                skipped += 1
+                continue
+            username, points = parsed
+            read += 1
+            # Doppelte User innerhalb eines Blocks passend zum Modus zusammenfassen
+            if username in chunk:
+                if mode == "add":
+                    points += chunk[username]
+                elif mode == "max":
+                    points = max(points, chunk[username])
+            chunk[username] = points
+            if len(chunk) >= chunk_rows:
+                changed += database.merge_points_chunk(chunk, mode, source)
+                if progress and read >= next_progress:
+                    progress(read)
+                    next_progress += PROGRESS_EVERY
+                yield list(chunk)
+                chunk = {}
+        if chunk:
+            changed += database.merge_points_chunk(chunk, mode, source)
+            yield list(chunk)
+    return read, changed, skipped
+
+def iter_export(path, fmt=None, chunk_rows=CHUNK_ROWS):
+    """Exportiert alle Kontostände blockweise, liefert nach jedem Block die bisherige Zeilenzahl
+
+    Rückgabewert des Generators ist die Anzahl geschriebener Zeilen.
+    """
+    fmt = detect_format(path, fmt)
+    count = 0
+    tmp_path = path + ".tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+            if fmt == "csv":
+                writer = csv.writer(f)
+                writer.writerow(["username", "points"])
+            for username, points in database.iter_all_points():
+                if fmt == "csv":
+                    writer.writerow((username, points))
+                else:
+                    f.write(json.dumps({"username": username, "points": points}, ensure_ascii=False))
+                    f.write("\n")
+                count += 1
+                if count % chunk_rows == 0:
+                    yield count
+        # Erst nach vollständigem Schreiben ersetzen, damit kein halber Export liegen bleibt
+        os.replace(tmp_path, path)
+    finally:
+        # Abgebrochen (Fehler oder close() des Generators): halbe Datei nicht liegen lassen
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return count
+
+def run_steps(steps):
+    """Führt einen blockweisen Import/Export am Stück aus und gibt sein Ergebnis zurück"""
+    while True:
+        try:
+            next(steps)
+        except StopIteration as stop:
+            return stop.value
+
+def import_file(path, mode="overwrite", fmt=None, source=0, chunk_rows=CHUNK_ROWS, progress=None):
+    """Importiert Kontostände gestreamt, gibt (gelesen, geändert, übersprungen) zurück"""
+    return run_steps(iter_import(path, mode, fmt, source, chunk_rows, progress))
+
+def export_file(path, fmt=None):
+    """Exportiert alle Kontostände gestreamt, gibt die Anzahl geschriebener Zeilen zurück"""
+    return run_steps(iter_export(path, fmt))
@@ -0,0 +1,201 @@
+"""
+Write-Behind-Puffer für Punkte-Änderungen
+
+Deltas werden pro User im Speicher zusammengefasst und gesammelt in einer
+Transaktion nach SQLite geschrieben (Zeit- oder Größen-Schwelle), zusammen mit
+den zugehörigen Ledger-Einträgen. Jedes Delta
+landet vorher in einem Append-Only-Journal, damit nicht geflushte Änderungen
+einen Absturz überleben und beim nächsten Start erneut angewendet werden.
+
+Das Journal gehört genau einem Prozess (dem Bot-Prozess). Die Console schreibt
+nicht selbst, sondern schickt ihre Punkte-Befehle per RPC an den Bot-Prozess.
+"""
+import os
+import threading
+import time
+
+from metrics import metrics
+from . import database
+
+JOURNAL_PATH = os.path.join(database.DB_DIR, "elchcoins.journal")
+FLUSH_INTERVAL = 5.0  # Sekunden
+MAX_PENDING = 5000    # User mit ausstehenden Deltas
+
+
+class WriteBehindBuffer:
+    """Sammelt Punkte-Deltas im Speicher und schreibt sie gebündelt in die Datenbank"""
+
+    def __init__(self, journal_path=JOURNAL_PATH, flush_interval=FLUSH_INTERVAL,
+                 max_pending=MAX_PENDING, fsync=False):
+        self.journal_path = journal_path
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.fsync = fsync
+
+        self.pending = {}
+        self.ledger = []  # (ts, username, delta, source) für das Ledger
+        self.seq = 0
+        self.flush_count = 0
+        self.last_error = None
+
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._journal = None
+
+    # --- Lebenszyklus ---
+
+    def start(self):
+        """Spielt das Journal nach und startet den Flush-Thread"""
+        with self._lock:
+            replayed = self._replay()
+            self._journal = open(self.journal_path, "a", encoding="utf-8")
+            if self.pending or self.ledger:
+                self._flush_locked()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="elchcoins-flush", daemon=True)
+        self._thread.start()
+        return replayed
+
+    def stop(self):
+        """Stoppt den Flush-Thread und schreibt alle ausstehenden Deltas"""
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        with self._lock:
+            self._flush_locked()
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                # Deltas bleiben im Speicher und im Journal, nächster Versuch beim nächsten Tick
+                self.last_error = str(e)
+
+    # --- Journal ---
+
+    def _replay(self):
+        """Liest nicht übernommene Journal-Einträge in den Puffer ein"""
+        self.seq = database.get_journal_seq()
+        if not os.path.exists(self.journal_path):
+            return 0
+
+        applied_seq = self.seq
+        replayed = 0
+        with open(self.journal_path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.endswith("\n"):
+                    continue  # Abgebrochene letzte Zeile nach Absturz
+                # seq, username, delta, ts, source (ältere Journale ohne ts/source)
+                parts = line.rstrip("\n").split("\t")
+                if len(parts) == 3:
+                    parts += [str(int(time.time())), "0"]
+                if len(parts) != 5:
+                    continue
+                try:
+                    seq, username, delta = int(parts[0]), parts[1], int(parts[2])
+                    ts, source = int(parts[3]), int(parts[4])
+                except ValueError:
+                    continue
+                if seq <= applied_seq:
+                    continue
+                self.pending[username] = self.pending.get(username, 0) + delta
+                self.ledger.append((ts, username, delta, source))
+                self.seq = max(self.seq, seq)
+                replayed += 1
+        return replayed
+
+    def _append(self, entries, ts, source):
+        lines = []
+        for username, delta in entries:
+            self.seq += 1
+            lines.append(f"{self.seq}\t{username}\t{delta}\t{ts}\t{source}\n")
+        self._journal.write("".join(lines))
+        self._journal.flush()
+        if self.fsync:
+            os.fsync(self._journal.fileno())
+
+    # --- Schreiben ---
+
+    def add(self, username, delta, source=0):
+        """Merkt ein Delta für einen User vor"""
+        self.add_many({username: delta}, source)
+
+    def add_many(self, deltas, source=0):
+        """Merkt mehrere Deltas vor (ein Journal-Write für alle)"""
+        entries = [(username.lower(), delta) for username, delta in deltas.items() if delta]
+        if not entries:
+            return
+        ts = int(time.time())
+        with self._lock:
+            self._append(entries, ts, source)
+            for username, delta in entries:
+                self.pending[username] = self.pending.get(username, 0) + delta
+                self.ledger.append((ts, username, delta, source))
+            if len(self.pending) >= self.max_pending:
+                self._wakeup.set()
+
+    def remove(self, username, amount, source=0):
+        """Zieht Punkte ab, ohne unter 0 zu fallen (wie database.remove_points), gibt den abgezogenen Betrag zurück"""
+        username = username.lower()
+        with self._lock:
+            balance = self.get(username)
+            taken = min(amount, balance)
+            if taken <= 0:
+                return 0
+            self.add_many({username: -taken}, source)
+            return taken
+
+    # --- Lesen ---
+
+    def get(self, username):
+        """Kontostand inklusive ausstehender Deltas"""
+        username = username.lower()
+        with self._lock:
+            return max(database.get_points(username) + self.pending.get(username, 0), 0)
+
+    def get_many(self, usernames):
+        """Kontostände vieler User inklusive ausstehender Deltas"""
+        names = [u.lower() for u in usernames]
+        with self._lock:
+            rows = database.get_points_many(names)
+            return {u: max(rows.get(u, 0) + self.pending.get(u, 0), 0) for u in names}
+
+    def snapshot(self, loader):
+        """Ruft loader() auf und liefert (ergebnis, kopie der ausstehenden deltas) ohne Flush dazwischen"""
+        with self._lock:
+            return loader(), dict(self.pending)
+
+    def pending_count(self):
+        with self._lock:
+            return len(self.pending)
+
+    # --- Flush ---
+
+    def flush(self):
+        """Schreibt alle ausstehenden Deltas in einer Transaktion"""
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if not self.pending and not self.ledger:
+            return
+        started = time.perf_counter()
+        database.apply_deltas(self.pending, self.seq, self.ledger)
+        metrics.observe("db_seconds", "write_behind_flush", time.perf_counter() - started, label_name="op")
+        self.pending = {}
+        self.ledger = []
+        self.flush_count += 1
+        # Alles bis self.seq ist jetzt in der Datenbank, das Journal kann geleert werden
+        if self._journal is not None:
+            self._journal.seek(0)
+            self._journal.truncate()
@@ -1,13 +1,27 @@
+from botlog import get_logger
+from outbound import reply
+import coalesce
+
+# Bisher per Keyword-Erkennung ermittelter Typ, bestehende configs/help.json bleiben gültig
+MODULE_TYPE = "game"
+
+log = get_logger("help")
+
+HELP_MESSAGE = "❓| Use \"%\" as Präfix before one of my Custom Commands like %song, %coins or %rank! Have Fun Chatting! There also will be Chat Interactive Things/Games sometimes : )"
+
 async def help_command(ctx):
-    await ctx.send("❓| Use \"%\" as Präfix before one of my Custom Commands like %song, %coins or %rank! Have Fun Chatting! There also will be Chat Interactive Things/Games sometimes : )")
+    await reply(ctx, HELP_MESSAGE)
+    log.info("Command executed by %s in %s", ctx.author.name, ctx.channel.name)
 
-    if hasattr(ctx.bot, 'log_queue'):
-        ctx.bot.log_queue.put(f"[HELP] Command executed by {ctx.author.name} in {ctx.channel.name}")
+async def help_batch(ctxs):
+    return "", [HELP_MESSAGE]
 
 def setup_command(bot, log_queue):
+    handler = coalesce.command('help', 'help', help_command, help_batch)
+    
     @bot.command(name='help')
     async def help(ctx):
-        await help_command(ctx)
+        await handler(ctx)
     
     log_queue.put(f"✅ [HELP] Command registered")
 
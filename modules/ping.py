@@ -1,11 +1,13 @@
 from configs import get_config, get_command_config, is_command_enabled
+from botlog import get_logger
+from outbound import reply
+
+log = get_logger("ping")
 
 async def ping_command(ctx):
     """Simple ping command"""
-    await ctx.send("🏓 Pong!")
-    # Log zur Queue senden
-    if hasattr(ctx.bot, 'log_queue'):
-        ctx.bot.log_queue.put(f"🎯 [PING] Command executed by {ctx.author.name} in {ctx.channel.name}")
+    await reply(ctx, "🏓 Pong!")
+    log.info("Command executed by %s in %s", ctx.author.name, ctx.channel.name)
 
 def setup_command(bot, log_queue):
     """Setup function called by module manager"""
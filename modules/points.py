@@ -1,30 +1,58 @@
-from .elchcoins import coinmanager
+from botlog import get_logger
+from outbound import reply
+import coalesce
+from .elchcoins import async_coinmanager
+
+MODULE_TYPE = "points"
+
+log = get_logger("points")
+
+MAX_TOP_COUNT = 10
 
 async def coin_command(ctx):
     username = ctx.author.name
-    points = coinmanager.get_user_points(username)
-    await ctx.send(f"{username}, du hast {points} Elchcoins 💰")
+    points = await async_coinmanager.get_user_points(username)
+    await reply(ctx, f"{username}, du hast {points} Elchcoins 💰")
+    log.info("Command executed by %s in %s", username, ctx.channel.name)
+
+async def coin_batch(ctxs):
+    # Ein Datenbankzugriff für alle User des Bursts
+    names = coalesce.unique_authors(ctxs)
+    points = await async_coinmanager.get_many_user_points(names)
+    return "💰 Elchcoins: ", [f"{name}: {points.get(name.lower(), 0)}" for name in names]
 
-    if hasattr(ctx.bot, 'log_queue'):
-        ctx.bot.log_queue.put(f"[POINTS] Command executed by {username} in {ctx.channel.name}")
+async def top_message(count):
+    top_users = await async_coinmanager.get_top_users(count)
+    if not top_users:
+        return "Noch keine Punkte vergeben."
+    return f"🏆 Top {len(top_users)} User: " + " | ".join([f"{u[0]}: {u[1]}" for u in top_users])
+
+async def top_command(ctx, count):
+    await reply(ctx, await top_message(count))
+
+async def top_batch(ctxs, count):
+    return "", [await top_message(count)]
 
 def setup_command(bot, log_queue):
     """Setup function called by module manager"""
+    coins_handler = coalesce.command('points', 'coins', coin_command, coin_batch)
+    top_handler = coalesce.command('points', 'top', top_command, top_batch)
+
     @bot.command(name='coins')
     async def coins(ctx):
-        await coin_command(ctx)
+        await coins_handler(ctx)
     
     log_queue.put(f"✅ [POINTS] Command registered")
 
     @bot.command(name='top')
-    async def top(ctx):
-        top_users = coinmanager.get_top_users(3)
-        if not top_users:
-            await ctx.send("Noch keine Punkte vergeben.")
-            return
-
-        msg = "🏆 Top 3 User: " + " | ".join([f"{u[0]}: {u[1]}" for u in top_users])
-        await ctx.send(msg)
+    async def top(ctx, count: str = "3"):
+        # Anzahl optional, begrenzt damit die Nachricht in den Chat passt
+        try:
+            count = min(max(int(count), 1), MAX_TOP_COUNT)
+        except ValueError:
+            count = 3
+
+        await top_handler(ctx, count)
 
     log_queue.put(f"✅ [POINTS] Command registered")
 
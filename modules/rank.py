@@ -1,46 +1,63 @@
-from .elchcoins import coinmanager
+from botlog import get_logger
+from outbound import reply
+import coalesce
+from configs import get_config
+from .elchcoins import async_coinmanager, ranking
+
+MODULE_TYPE = "points"
+
+log = get_logger("rank")
 
 async def rank_command(ctx):
-    coins = coinmanager.get_user_points(f"{ctx.author.name}")
-    if coins < 100 or coins == 100:
-        await ctx.send(f'{ctx.author.name} rank is "newbe". Welcome in the Chat! ❤️')
-    elif coins > 100 and coins <= 500:
-        await ctx.send(f'{ctx.author.name} rank is "novice". Thanks for showing up! 🥳')
-    elif coins > 500 and coins <= 1000:
-        await ctx.send(f'{ctx.author.name} rank is "watcher". Thanks for actually Watching! 😊')
-    elif coins > 1000 and coins <= 2000:
-        await ctx.send(f'{ctx.author.name} rank is "Viewer". Someone seems to actually like my Stream 📺')
-    elif coins > 2000 and coins <= 5000:
-        await ctx.send(f'{ctx.author.name} rank is "master". Playing Ranked now huh?')
-    elif coins > 5000 and coins <= 7500:
-        await ctx.send(f'{ctx.author.name} rank is "elite". Going into E-Sports now it seems like? 🏆')
-    elif coins > 7500 and coins <= 10000:
-        await ctx.send(f'{ctx.author.name} rank is "Legend". You are on top! but maybe it goes higher ; )')
-        await ctx.send(f'{ctx.author.name} rank is "Jobless". I dont think I have to say more... you are CRAZY!')
-    
-    if hasattr(ctx.bot, 'log_queue'):
-        ctx.bot.log_queue.put(f"[RANK] Command executed by {ctx.author.name} in {ctx.channel.name}")
+    info = await async_coinmanager.get_rank(f"{ctx.author.name}")
+    tier = info["tier"]
+    await reply(ctx,
+        f'{ctx.author.name} rank is "{tier["name"]}". {tier["message"]} '
+        f'(#{info["position"]:,} of {info["total"]:,})'
+    )
+    log.info("Command executed by %s in %s", ctx.author.name, ctx.channel.name)
+
+async def rank_batch(ctxs):
+    # Eine Batch-Abfrage für alle User des Bursts
+    ranks = await async_coinmanager.get_ranks(coalesce.unique_authors(ctxs))
+    return "🏅 ", [f'{name}: {info["tier"]["name"]} (#{info["position"]:,})' for name, info in ranks.items()]
+
+def ranks_message():
+    names = ", ".join(f'"{name}"' for name in ranking.engine.names())
+    return f'There are the following Ranks: {names} Good Luck!'
 
 async def ranks_command(ctx):
-    await ctx.send('There are the following Ranks: "newbe", "novice", "watcher", "Viewer", "elite", "Legend" Good Luck!')
-    if hasattr(ctx.bot, 'log_queue'):
-        ctx.bot.log_queue.put(f"[RANK] Command executed by {ctx.author.name} in {ctx.channel.name}")
+    await reply(ctx, ranks_message())
+    log.info("Command executed by %s in %s", ctx.author.name, ctx.channel.name)
+
+async def ranks_batch(ctxs):
+    return "", [ranks_message()]
 
 def setup_command(bot, log_queue):
+    # Rang-Stufen aus der Config laden (custom_settings["rank_tiers"])
+    try:
+        ranking.load_tiers(get_config('rank'))
+    except Exception as e:
+        log_queue.put(f"❌ [RANK] Invalid rank_tiers config, using defaults: {str(e)}")
+        ranking.load_tiers(None)
+
+    rank_handler = coalesce.command('rank', 'rank', rank_command, rank_batch)
+    ranks_handler = coalesce.command('rank', 'ranks', ranks_command, ranks_batch)
+
     @bot.command(name='rank')
     async def rank(ctx):
-        await rank_command(ctx)
-    
+        await rank_handler(ctx)
+
     log_queue.put(f"✅ [RANK] Command registered")
 
     @bot.command(name='ranks')
     async def ranks(ctx):
-        await ranks_command(ctx)
-    
+        await ranks_handler(ctx)
+
     log_queue.put(f"✅ [RANK] Command registered")
 
 def cleanup_command(bot):
     if hasattr(bot, 'commands') and 'rank' in bot.commands:
         bot.remove_command('rank')
     if hasattr(bot, 'commands') and 'ranks' in bot.commands:
-        bot.remove_command('ranks')
\ No newline at end of file
+        bot.remove_command('ranks')
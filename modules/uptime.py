@@ -3,14 +3,19 @@ Uptime command module
 """
 import time
 from datetime import datetime, timedelta
+from botlog import get_logger
+from outbound import reply
+import coalesce
+
+MODULE_TYPE = "utility"
+
+log = get_logger("uptime")
 
 start_time = None
 
-async def uptime_command(ctx):
-    """Show bot uptime"""
+def uptime_message():
     if start_time is None:
-        await ctx.send("⏰ Uptime tracking not available")
-        return
+        return "⏰ Uptime tracking not available"
     
     uptime_seconds = time.time() - start_time
     uptime_delta = timedelta(seconds=int(uptime_seconds))
@@ -29,19 +34,28 @@ async def uptime_command(ctx):
     else:
         uptime_str = f"{seconds}s"
     
-    await ctx.send(f"⏰ Bot uptime: {uptime_str}")
+    return f"⏰ Bot uptime: {uptime_str}"
+
+async def uptime_command(ctx):
+    """Show bot uptime"""
+    await reply(ctx, uptime_message())
     
-    if hasattr(ctx.bot, 'log_queue'):
-        ctx.bot.log_queue.put(f"⏰ [UPTIME] Uptime requested by {ctx.author.name}")
+    log.info("Uptime requested by %s", ctx.author.name)
+
+async def uptime_batch(ctxs):
+    return "", [uptime_message()]
 
 def setup_command(bot, log_queue):
     """Setup function called by module manager"""
     global start_time
     start_time = time.time()
     
+    # Gleiche Antwort für alle, ein Burst wird mit einer Nachricht beantwortet
+    handler = coalesce.command('uptime', 'uptime', uptime_command, uptime_batch)
+    
     @bot.command(name='uptime')
     async def uptime(ctx):
-        await uptime_command(ctx)
+        await handler(ctx)
     
     log_queue.put(f"✅ [UPTIME] Command registered")
 
@@ -0,0 +1,218 @@
+"""
+Zentraler Versand von Chat-Nachrichten
+
+Alle Nachrichten gehen über eine Warteschlange pro Kanal. Gesendet wird nur,
+wenn die Token-Buckets es erlauben (Twitch-Limits, abhängig davon ob der Bot
+im Kanal Moderator ist), sonst wartet die Nachricht statt verworfen oder
+gedrosselt zu werden. Command-Antworten haben Vorrang vor Ankündigungen,
+und Nachrichten, die sich im selben Kanal stauen, werden zu einer Nachricht
+zusammengefasst.
+
+Module senden über reply(ctx, text) bzw. announce(bot, channel, text).
+"""
+import asyncio
+import heapq
+import itertools
+import time
+
+from metrics import metrics
+
+# Prioritäten (kleiner = früher)
+REPLY = 0          # Antworten auf Commands
+NORMAL = 1         # Console, sonstiges
+ANNOUNCEMENT = 2   # Follows, Auto-Rewards, ...
+PRIORITY_NAMES = {REPLY: "reply", NORMAL: "normal", ANNOUNCEMENT: "announcement"}
+
+# Twitch-Limits als (Nachrichten, Sekunden)
+ACCOUNT_LIMIT = (100, 30.0)         # alle Kanäle zusammen
+NON_MOD_ACCOUNT_LIMIT = (20, 30.0)  # alle Kanäle ohne Moderator-Rechte zusammen
+NON_MOD_CHANNEL_LIMIT = (1, 1.0)    # pro Kanal ohne Moderator-Rechte
+
+MAX_MESSAGE_LENGTH = 500
+MAX_QUEUED = 50                     # Nachrichten pro Kanal, darüber wird verworfen
+SEPARATOR = " | "
+
+
+class TokenBucket:
+    """capacity Tokens, die gleichmäßig über per_seconds nachlaufen"""
+    __slots__ = ("capacity", "rate", "tokens", "updated")
+
+    def __init__(self, capacity, per_seconds):
+        self.capacity = capacity
+        self.rate = capacity / per_seconds
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def wait_time(self, now):
+        """Sekunden bis ein Token frei ist (0 = sofort)"""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self):
+        self.tokens -= 1
+
+
+class Outbox:
+    """Warteschlange eines Kanals: Heap aus (priority, seq, queued_at, text, future)"""
+    __slots__ = ("name", "channel", "queue", "moderator", "bucket", "task")
+
+    def __init__(self, name, channel, moderator):
+        self.name = name
+        self.channel = channel
+        self.queue = []
+        self.moderator = None
+        self.bucket = None
+        self.task = None
+        self.set_moderator(moderator)
+
+    def set_moderator(self, moderator):
+        if moderator != self.moderator:
+            self.moderator = moderator
+            self.bucket = None if moderator else TokenBucket(*NON_MOD_CHANNEL_LIMIT)
+
+
+def is_command(text):
+    # /me, .announce usw. dürfen nicht mit anderen Nachrichten verbunden werden
+    return text.startswith(("/", "."))
+
+
+class SendScheduler:
+    """Versendet Nachrichten pro Kanal nach Priorität innerhalb der Twitch-Limits"""
+
+    def __init__(self, log_queue=None, moderator_channels=()):
+        self.log_queue = log_queue
+        self.outboxes = {}
+        self.moderator_channels = {name.lower() for name in moderator_channels}
+        self.account_bucket = TokenBucket(*ACCOUNT_LIMIT)
+        self.non_mod_bucket = TokenBucket(*NON_MOD_ACCOUNT_LIMIT)
+        self.sent = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self._seq = itertools.count()
+
+    def set_moderator(self, channel_name, moderator=True):
+        name = channel_name.lower()
+        if moderator:
+            self.moderator_channels.add(name)
+        else:
+            self.moderator_channels.discard(name)
+        outbox = self.outboxes.get(name)
+        if outbox is not None:
+            outbox.set_moderator(moderator)
+
+    def send(self, channel, text, priority=NORMAL):
+        """Reiht eine Nachricht ein, das Future liefert True sobald sie gesendet wurde (False wenn verworfen)"""
+        name = channel.name.lower()
+        outbox = self.outboxes.get(name)
+        if outbox is None:
+            outbox = self.outboxes[name] = Outbox(name, channel, name in self.moderator_channels)
+        outbox.channel = channel  # Nach Reconnects immer das aktuelle Objekt verwenden
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(outbox.queue, (priority, next(self._seq), time.perf_counter(), str(text), future))
+        if len(outbox.queue) > MAX_QUEUED:
+            # Die neueste Nachricht der niedrigsten Priorität fällt weg
+            worst = max(outbox.queue)
+            outbox.queue.remove(worst)
+            heapq.heapify(outbox.queue)
+            self._drop(outbox, worst)
+
+        if outbox.task is None:
+            outbox.task = asyncio.create_task(self._drain(outbox))
+        return future
+
+    def _drop(self, outbox, item):
+        self.dropped += 1
+        metrics.inc("outbound_dropped", outbox.name, label_name="channel")
+        if not item[4].done():
+            item[4].set_result(False)
+
+    def _wait_time(self, outbox):
+        now = time.monotonic()
+        buckets = [self.account_bucket]
+        if not outbox.moderator:
+            buckets += [self.non_mod_bucket, outbox.bucket]
+        # Alle Buckets auffüllen, gewartet wird auf den langsamsten
+        return max([bucket.wait_time(now) for bucket in buckets]), buckets
+
+    def _take_batch(self, outbox):
+        """Nächste Nachricht plus gleich priorisierte, die noch in dieselbe Nachricht passen"""
+        first = heapq.heappop(outbox.queue)
+        batch = [first]
+        if is_command(first[3]):
+            return batch
+        length = len(first[3])
+        while outbox.queue:
+            item = outbox.queue[0]
+            if item[0] != first[0] or is_command(item[3]):
+                break
+            if length + len(SEPARATOR) + len(item[3]) > MAX_MESSAGE_LENGTH:
+                break
+            length += len(SEPARATOR) + len(item[3])
+            batch.append(heapq.heappop(outbox.queue))
+        return batch
+
+    async def _drain(self, outbox):
+        try:
+            while outbox.queue:
+                delay, buckets = self._wait_time(outbox)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                    continue
+                for bucket in buckets:
+                    bucket.take()
+
+                batch = self._take_batch(outbox)
+                started = time.perf_counter()
+                for priority, _, queued_at, _, _ in batch:
+                    metrics.observe("outbound_queue_seconds", PRIORITY_NAMES.get(priority, str(priority)),
+                                    started - queued_at, label_name="priority")
+                try:
+                    await outbox.channel.send(SEPARATOR.join(item[3] for item in batch))
+                    ok = True
+                except Exception as e:
+                    ok = False
+                    metrics.inc("outbound_errors", outbox.name, label_name="channel")
+                    if self.log_queue is not None:
+                        self.log_queue.put(f"[OUTBOUND] ❌ Sending to #{outbox.name} failed: {str(e)}")
+                if ok:
+                    self.sent += 1
+                self.coalesced += len(batch) - 1
+                if len(batch) > 1:
+                    metrics.inc("outbound_coalesced", outbox.name, len(batch) - 1, label_name="channel")
+                for item in batch:
+                    if not item[4].done():
+                        item[4].set_result(ok)
+        finally:
+            outbox.task = None
+            # Abgebrochen (z.B. beim Beenden): Wartende nicht hängen lassen
+            for item in outbox.queue:
+                if not item[4].done():
+                    item[4].set_result(False)
+            outbox.queue.clear()
+
+    def pending(self):
+        """Anzahl wartender Nachrichten über alle Kanäle"""
+        return sum(len(outbox.queue) for outbox in list(self.outboxes.values()))
+
+    def stats(self):
+        return {"pending": self.pending(), "sent": self.sent, "coalesced": self.coalesced, "dropped": self.dropped}
+
+
+async def reply(ctx, text, priority=REPLY):
+    """Antwortet im Kanal des Commands über den Send-Scheduler, ohne auf das Senden zu warten"""
+    sender = getattr(ctx.bot, "sender", None)
+    if sender is None:
+        await ctx.send(text)
+    else:
+        sender.send(ctx.channel, text, priority)
+
+
+async def announce(bot, channel, text, priority=ANNOUNCEMENT):
+    """Ankündigung in einem Kanal, wird nach Command-Antworten gesendet"""
+    sender = getattr(bot, "sender", None)
+    if sender is None:
+        await channel.send(text)
+    else:
+        sender.send(channel, text, priority)
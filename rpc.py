@@ -0,0 +1,144 @@
+"""
+Request/Response-Kanal zwischen Console und Bot-Prozess
+
+Die Console schickt {"id", "command", "args"} über eine Pipe und wartet auf die
+Antwort mit derselben id ({"id", "ok", "result"} bzw. {"id", "ok", "error"}).
+Im Bot-Prozess liest ein Thread blockierend von der Pipe und übergibt die
+Anfragen per call_soon_threadsafe an eine asyncio.Queue, der Bot wartet also
+ohne Polling auf Befehle.
+"""
+import asyncio
+import itertools
+import threading
+import traceback
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+
+DEFAULT_TIMEOUT = 10.0  # Sekunden
+
+
+class RpcError(Exception):
+    """Fehler, den der Bot-Prozess für eine Anfrage zurückgemeldet hat"""
+
+
+class RpcClient:
+    """Console-Seite: call() sendet eine Anfrage und wartet auf das Ergebnis"""
+
+    def __init__(self, conn, peer="bot process"):
+        self.conn = conn
+        self.peer = peer
+        self.pending = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="rpc-client", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                response = self.conn.recv()
+            except (EOFError, OSError):
+                break
+            with self._lock:
+                future = self.pending.pop(response.get("id"), None)
+            if future is None:
+                continue  # Antwort auf eine Anfrage mit abgelaufenem Timeout
+            if response.get("ok"):
+                future.set_result(response.get("result"))
+            else:
+                future.set_exception(RpcError(response.get("error", "unknown error")))
+        # Gegenseite beendet: alle Wartenden freigeben
+        with self._lock:
+            pending, self.pending = self.pending, {}
+        for future in pending.values():
+            future.set_exception(RpcError(f"{self.peer} is not running"))
+
+    def submit(self, command, *args):
+        """Sendet eine Anfrage und gibt ein Future für das Ergebnis zurück"""
+        future = Future()
+        with self._lock:
+            request_id = next(self._ids)
+            self.pending[request_id] = future
+            try:
+                self.conn.send({"id": request_id, "command": command, "args": list(args)})
+            except (OSError, BrokenPipeError):
+                self.pending.pop(request_id, None)
+                raise RpcError(f"{self.peer} is not running")
+        return future
+
+    def call(self, command, *args, timeout=DEFAULT_TIMEOUT):
+        """Führt einen Befehl im Bot-Prozess aus und gibt dessen Ergebnis zurück"""
+        future = self.submit(command, *args)
+        try:
+            return future.result(timeout)
+        except FutureTimeout:
+            with self._lock:
+                self.pending = {i: f for i, f in self.pending.items() if f is not future}
+            raise RpcError(f"no response for '{command}' within {timeout:g}s")
+
+    def notify(self, command, *args):
+        """Sendet einen Befehl ohne auf die Antwort zu warten"""
+        try:
+            self.submit(command, *args)
+        except RpcError:
+            pass
+
+
+class RpcServer:
+    """Bot-Seite: liest Anfragen und ruft passende async-Handler auf"""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.requests = None
+        self._send_lock = threading.Lock()
+
+    def _reader(self, loop):
+        while True:
+            try:
+                request = self.conn.recv()
+            except (EOFError, OSError):
+                request = None  # Console beendet
+            loop.call_soon_threadsafe(self.requests.put_nowait, request)
+            if request is None:
+                break
+
+    def respond(self, request_id, ok, payload):
+        message = {"id": request_id, "ok": ok, ("result" if ok else "error"): payload}
+        with self._send_lock:
+            try:
+                self.conn.send(message)
+            except (OSError, BrokenPipeError):
+                pass
+
+    async def serve(self, resolve, log_queue=None):
+        """Bearbeitet Anfragen bis die Console die Verbindung schließt
+
+        resolve(command) liefert den async-Handler für einen Befehl oder None.
+        Jeder Handler läuft als eigener Task, ein langsamer Befehl blockiert keine anderen.
+        """
+        loop = asyncio.get_running_loop()
+        self.requests = asyncio.Queue()
+        threading.Thread(target=self._reader, args=(loop,), name="rpc-server", daemon=True).start()
+        tasks = set()
+        while True:
+            request = await self.requests.get()
+            if request is None:
+                break
+            task = asyncio.create_task(self._handle(resolve, request, log_queue))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+    async def _handle(self, resolve, request, log_queue):
+        request_id = request.get("id")
+        command = request.get("command")
+        handler = resolve(command)
+        if handler is None:
+            self.respond(request_id, False, f"Unknown command: {command}")
+            return
+        try:
+            result = await handler(*request.get("args", []))
+        except Exception as e:
+            if log_queue is not None:
+                log_queue.put(f"[RPC] {command} failed: {traceback.format_exc()}")
+            self.respond(request_id, False, str(e))
+        else:
+            self.respond(request_id, True, result)
@@ -0,0 +1,482 @@
+"""
+Mehrere Bot-Prozesse (Shards) für viele Kanäle
+
+Kanäle werden per Consistent Hashing auf N Shards verteilt, jeder Shard ist
+ein eigener Bot-Prozess mit eigenem Event-Loop. Die Punkte liegen in einem
+einzigen Coin-Store-Prozess (einziger Schreiber der Datenbank), die Shards
+rufen ihn über async_coinmanager per RPC auf.
+
+Der Supervisor in der Console startet Store und Shards, startet abgestürzte
+Prozesse mit Backoff neu und sammelt die Logs aller Prozesse. Nach einem
+Store-Neustart verbinden sich laufende Shards mit dem neuen Store. ShardedRpc
+verteilt Console-Befehle auf alle Shards und fasst die Antworten zusammen.
+
+Aktiviert über die env-Variable shards (Standard 1 = ein Bot-Prozess wie bisher).
+"""
+import asyncio
+import hashlib
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from bisect import bisect
+from concurrent.futures import TimeoutError as FutureTimeout
+
+from logtransport import LogWriter, start_reader
+from rpc import DEFAULT_TIMEOUT, RpcClient, RpcError, RpcServer
+
+REPLICAS = 100            # Punkte pro Shard auf dem Hash-Ring
+CHECK_INTERVAL = 1.0      # Sekunden zwischen zwei Prüfungen des Supervisors
+RESTART_DELAY = 1.0       # Sekunden bis zum ersten Neustart
+MAX_RESTART_DELAY = 60.0  # Obergrenze des Backoffs
+STABLE_SECONDS = 60.0     # Läuft ein Prozess so lange, beginnt der Backoff von vorn
+RECONNECT_TIMEOUT = 5.0   # Sekunden, die ein Shard für das Verbinden mit einem neuen Store hat
+STORE_LOG_FILE = os.path.join("logs", "elchbot-store.log")
+
+
+def hash_key(value):
+    return int.from_bytes(hashlib.blake2b(str(value).encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """Consistent Hashing: ein Kanal landet immer auf demselben Shard, solange die Anzahl gleich bleibt"""
+
+    def __init__(self, nodes, replicas=REPLICAS):
+        points = sorted((hash_key(f"{node}#{index}"), node) for node in nodes for index in range(replicas))
+        self.keys = [key for key, _ in points]
+        self.nodes = [node for _, node in points]
+
+    def node_for(self, key):
+        return self.nodes[bisect(self.keys, hash_key(key)) % len(self.keys)]
+
+
+def assign_channels(channels, shard_count):
+    """{shard_id: [kanal, ...]} für alle Kanäle, Shards ohne Kanal fehlen"""
+    ring = HashRing(range(shard_count))
+    assignment = {}
+    for channel in channels:
+        assignment.setdefault(ring.node_for(channel.lower()), []).append(channel)
+    return dict(sorted(assignment.items()))
+
+
+# --- Coin-Store-Prozess ---
+
+def run_store(log_conn, control_conn, authkey):
+    """Einziger Schreiber der Coin-Datenbank, beantwortet Aufrufe aller Shards"""
+    from multiprocessing.connection import Listener
+    from botlog import setup_logging, shutdown_logging
+    from modules.elchcoins import async_coinmanager, coinmanager
+
+    # Wie run_bot: keine Signal-Handler der Console, beendet wird über control_conn
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.default_int_handler)
+    writer = LogWriter(log_conn).start()
+    log_queue = setup_logging(writer, path=STORE_LOG_FILE)
+    try:
+        coinmanager.init()
+        replayed = coinmanager.enable_write_behind()
+        if replayed:
+            log_queue.put(f"[COINS] Replayed {replayed} unflushed journal entries")
+        coinmanager.start_ledger_maintenance()
+        listener = Listener(authkey=authkey)
+        control_conn.send(listener.address)
+        asyncio.run(serve_store(listener, control_conn, log_queue))
+    except Exception as e:
+        log_queue.put(f"[COINS] ❌ Coin store failed: {str(e)}")
+    finally:
+        coinmanager.stop_ledger_maintenance()
+        # DB-Worker erst leeren (gesammelte Anwesenheiten der Shards), dann speichern
+        async_coinmanager.shutdown()
+        coinmanager.save_streaks()
+        coinmanager.disable_write_behind()
+        shutdown_logging()
+        writer.close()
+
+
+async def serve_store(listener, control_conn, log_queue):
+    """Nimmt Shard-Verbindungen an, bis die Console den Store beendet"""
+    from modules.elchcoins import async_coinmanager
+
+    loop = asyncio.get_running_loop()
+    servers = set()
+
+    def serve(conn):
+        task = asyncio.create_task(RpcServer(conn).serve(async_coinmanager.resolve_remote, log_queue))
+        servers.add(task)
+        task.add_done_callback(servers.discard)
+
+    closed = threading.Event()
+
+    def accept():
+        while not closed.is_set():
+            try:
+                conn = listener.accept()
+            except Exception:
+                continue  # z.B. falscher authkey oder Listener geschlossen
+            loop.call_soon_threadsafe(serve, conn)
+
+    def wait_for_stop():
+        try:
+            control_conn.recv()
+        except (EOFError, OSError):
+            pass  # Console beendet
+
+    threading.Thread(target=accept, name="store-accept", daemon=True).start()
+    log_queue.put(f"[COINS] Coin store ready on {listener.address}")
+    await loop.run_in_executor(None, wait_for_stop)
+    closed.set()
+    listener.close()
+    for task in list(servers):
+        task.cancel()
+
+
+# --- Supervisor (Console-Prozess) ---
+
+class Process:
+    """Ein überwachter Kindprozess (Store oder Shard) mit Neustart-Backoff"""
+
+    def __init__(self, name, prefix):
+        self.name = name
+        self.prefix = prefix
+        self.process = None
+        self.started_at = 0.0
+        self.restarts = 0
+        self.delay = RESTART_DELAY
+        self.restart_at = None
+
+    def alive(self):
+        return self.process is not None and self.process.is_alive()
+
+    def crashed(self, now):
+        """Plant den Neustart, gibt die Wartezeit zurück"""
+        if now - self.started_at >= STABLE_SECONDS:
+            self.delay = RESTART_DELAY
+        delay = self.delay
+        self.restart_at = now + delay
+        self.delay = min(self.delay * 2, MAX_RESTART_DELAY)
+        return delay
+
+    def terminate(self):
+        if self.alive():
+            self.process.terminate()
+
+    def stop(self, timeout=5):
+        """Wartet auf das Prozessende, beendet den Prozess sonst per SIGTERM und notfalls hart"""
+        if self.process is None:
+            return
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(5)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+
+
+class Shard(Process):
+    def __init__(self, shard_id, channels):
+        super().__init__(f"shard {shard_id}", f"[S{shard_id}] ")
+        self.id = shard_id
+        self.channels = channels
+        self.rpc = None
+
+
+class ShardSupervisor:
+    """Startet Coin-Store und Shards, überwacht sie und startet abgestürzte Prozesse neu"""
+
+    def __init__(self, bot_target, channels, shard_count, log_queue):
+        self.bot_target = bot_target
+        self.log_queue = log_queue
+        self.assignment = assign_channels(channels, shard_count)
+        self.ring = HashRing(range(shard_count))
+        self.shards = [Shard(shard_id, assigned) for shard_id, assigned in self.assignment.items()]
+        self.store = Process("coin store", "[STORE] ")
+        self.store_control = None
+        self.store_address = None
+        self.authkey = os.urandom(16)
+        self.running = False
+        self._lock = threading.Lock()
+
+    def start(self):
+        self.running = True
+        self._start_store()
+        for shard in self.shards:
+            self._start_shard(shard)
+        threading.Thread(target=self._monitor, name="shard-supervisor", daemon=True).start()
+
+    def _start_store(self):
+        log_recv, log_send = multiprocessing.Pipe(duplex=False)
+        control, store_control = multiprocessing.Pipe()
+        process = multiprocessing.Process(target=run_store, args=(log_send, store_control, self.authkey),
+                                          name="elchbot-store")
+        process.start()
+        log_send.close()
+        store_control.close()
+        start_reader(log_recv, self.log_queue, self.store.prefix)
+        # Der Store meldet seine Adresse, erst dann können Shards sich verbinden
+        if not control.poll(30):
+            raise RuntimeError("Coin store did not start within 30s")
+        self.store_address = control.recv()
+        self.store_control = control
+        self.store.process = process
+        self.store.started_at = time.time()
+
+    def _start_shard(self, shard):
+        command_console, command_bot = multiprocessing.Pipe()
+        log_recv, log_send = multiprocessing.Pipe(duplex=False)
+        config = {
+            "id": shard.id,
+            "channels": shard.channels,
+            "store": (self.store_address, self.authkey),
+        }
+        process = multiprocessing.Process(target=self.bot_target, args=(log_send, command_bot, config),
+                                          name=f"elchbot-shard-{shard.id}")
+        process.start()
+        log_send.close()
+        command_bot.close()
+        start_reader(log_recv, self.log_queue, shard.prefix)
+        shard.rpc = RpcClient(command_console, peer=shard.name)
+        shard.process = process
+        shard.started_at = time.time()
+        shard.restart_at = None
+
+    def _monitor(self):
+        while self.running:
+            time.sleep(CHECK_INTERVAL)
+            with self._lock:
+                if not self.running:
+                    break
+                try:
+                    self._check()
+                except Exception as e:
+                    self.log_queue.put(f"[SHARD] ❌ Supervisor error: {str(e)}")
+
+    def _check(self):
+        now = time.time()
+        if not self.store.alive():
+            # Neuer Store hat eine neue Adresse, laufende Shards verbinden sich neu
+            if self.store.restart_at is None:
+                delay = self.store.crashed(now)
+                self.log_queue.put(f"[SHARD] ❌ Coin store exited (code {self.store.process.exitcode}), "
+                                   f"restarting in {delay:g}s")
+                return
+            if now < self.store.restart_at:
+                return
+            self.store.restarts += 1
+            self.store.restart_at = None
+            self._start_store()
+            # Nur Shards, die den neuen Store nicht erreichen, werden neu gestartet
+            restart = [shard for shard in self.shards if not self._reconnect_store(shard)]
+            for shard in restart:
+                shard.terminate()
+            for shard in restart:
+                shard.stop(timeout=1)
+            for shard in restart:
+                self._start_shard(shard)
+            self.log_queue.put(f"[SHARD] Restarted coin store, {len(self.shards) - len(restart)} shards reconnected, "
+                               f"{len(restart)} restarted")
+            return
+
+        for shard in self.shards:
+            if shard.alive():
+                continue
+            if shard.restart_at is None:
+                delay = shard.crashed(now)
+                self.log_queue.put(f"[SHARD] ❌ Shard {shard.id} exited (code {shard.process.exitcode}), "
+                                   f"restarting in {delay:g}s")
+            elif now >= shard.restart_at:
+                shard.restarts += 1
+                self._start_shard(shard)
+                self.log_queue.put(f"[SHARD] Restarted shard {shard.id} ({', '.join(shard.channels)})")
+
+    def _reconnect_store(self, shard):
+        """Verbindet einen laufenden Shard mit dem neuen Store, gibt False zurück wenn das nicht klappt"""
+        if not shard.alive() or shard.rpc is None:
+            return False
+        try:
+            shard.rpc.call("store", self.store_address, self.authkey, timeout=RECONNECT_TIMEOUT)
+        except RpcError:
+            return False
+        return True
+
+    def shard_for(self, channel):
+        shard_id = self.ring.node_for(channel.lower())
+        return next((shard for shard in self.shards if shard.id == shard_id), None)
+
+    def status(self):
+        return [
+            {"id": shard.id, "alive": shard.alive(), "restarts": shard.restarts, "channels": shard.channels}
+            for shard in self.shards
+        ]
+
+    def stop(self):
+        """Beendet alle Shards und danach den Store (der dabei ausstehende Punkte schreibt)"""
+        with self._lock:
+            self.running = False
+        # Shards schließen sich nach 'exit' selbst, erst danach wird hart beendet
+        for shard in self.shards:
+            if shard.rpc is not None:
+                shard.rpc.notify('exit')
+            else:
+                shard.terminate()
+        for shard in self.shards:
+            shard.stop(timeout=5)
+        if self.store_control is not None:
+            try:
+                self.store_control.send("stop")
+            except (OSError, BrokenPipeError):
+                pass
+        self.store.stop(timeout=10)
+
+
+class ShardedRpc:
+    """Wie RpcClient, verteilt Befehle aber auf alle Shards und fasst die Antworten zusammen"""
+
+    def __init__(self, supervisor):
+        self.supervisor = supervisor
+
+    def live_shards(self):
+        return [shard for shard in self.supervisor.shards if shard.alive() and shard.rpc is not None]
+
+    def call(self, command, *args, timeout=DEFAULT_TIMEOUT):
+        shards = self.live_shards()
+        if not shards:
+            raise RpcError("no shard is running")
+
+        if command == "points":
+            # Alle Shards teilen sich einen Coin-Store, einer reicht
+            return shards[0].rpc.call(command, *args, timeout=timeout)
+        if command == "send" and len(args) > 1 and args[1]:
+            shard = self.supervisor.shard_for(args[1])
+            if shard is None or not shard.alive():
+                raise RpcError(f"Shard for #{args[1]} is not running")
+            return shard.rpc.call(command, *args, timeout=timeout)
+
+        futures = []
+        errors = []
+        for shard in shards:
+            try:
+                futures.append((shard, shard.rpc.submit(command, *args)))
+            except RpcError as e:
+                errors.append(f"shard {shard.id}: {e}")
+        deadline = None if timeout is None else time.monotonic() + timeout
+        results = []
+        for shard, future in futures:
+            try:
+                remaining = None if deadline is None else max(deadline - time.monotonic(), 0)
+                results.append(future.result(remaining))
+            except FutureTimeout:
+                errors.append(f"shard {shard.id}: no response within {timeout:g}s")
+            except RpcError as e:
+                errors.append(f"shard {shard.id}: {e}")
+        if errors and (not results or command in ("reload", "send")):
+            raise RpcError("; ".join(errors))
+
+        merge = MERGE.get(command)
+        result = merge(results) if merge else results[0]
+        if command == "status":
+            result["shards"] = self.supervisor.status()
+            result["errors"] = errors
+        return result
+
+    def notify(self, command, *args):
+        for shard in self.live_shards():
+            shard.rpc.notify(command, *args)
+
+
+def merge_summaries(summaries):
+    """Fasst Histogramm-Zusammenfassungen zusammen (Quantile als Obergrenze über alle Shards)"""
+    count = sum(s["count"] for s in summaries)
+    return {
+        "count": count,
+        "avg_ms": round(sum(s["avg_ms"] * s["count"] for s in summaries) / count, 3) if count else 0.0,
+        "p50_ms": max(s["p50_ms"] for s in summaries),
+        "p99_ms": max(s["p99_ms"] for s in summaries),
+        "max_ms": max(s["max_ms"] for s in summaries),
+    }
+
+
+def merge_status(results):
+    log = {}
+    for result in results:
+        for key, value in result["log"].items():
+            log[key] = log.get(key, 0) + value
+    return {
+        "nick": results[0]["nick"],
+        "channels": [channel for result in results for channel in result["channels"]],
+        "uptime": min(result["uptime"] for result in results),
+        "modules": results[0]["modules"],
+        "db_pending": sum(result["db_pending"] for result in results),
+        "log": log,
+    }
+
+
+def merge_stats(results):
+    histograms = {}
+    for result in results:
+        for name, labels in result["histograms"].items():
+            for label, summary in labels.items():
+                histograms.setdefault(name, {}).setdefault(label, []).append(summary)
+    counters = {}
+    for result in results:
+        for name, values in result["counters"].items():
+            merged = counters.setdefault(name, {})
+            for label, value in values.items():
+                merged[label] = merged.get(label, 0) + value
+    rates = {}
+    for result in results:
+        for name, keys in result["rates"].items():
+            merged = rates.setdefault(name, {})
+            for key, rate in keys.items():
+                if key in merged:
+                    merged[key] = {"per_sec": merged[key]["per_sec"] + rate["per_sec"],
+                                   "total": merged[key]["total"] + rate["total"]}
+                else:
+                    merged[key] = dict(rate)
+    gauges = {}
+    for result in results:
+        for name, value in result["gauges"].items():
+            current = gauges.get(name)
+            if not isinstance(current, (int, float)):
+                gauges[name] = value
+            elif isinstance(value, (int, float)):
+                # Loop-Lag ist pro Prozess, alles andere sind Mengen
+                gauges[name] = max(current, value) if name.startswith("loop_lag") else current + value
+    return {
+        "histograms": {name: {label: merge_summaries(summaries) for label, summaries in labels.items()}
+                       for name, labels in histograms.items()},
+        "counters": counters,
+        "rates": rates,
+        "gauges": gauges,
+    }
+
+
+def merge_modules(results):
+    hooks = {}
+    for result in results:
+        for name, stats in result["hooks"].items():
+            hooks.setdefault(name, []).append(stats)
+    merged = {}
+    for name, entries in hooks.items():
+        calls = sum(entry["calls"] for entry in entries)
+        merged[name] = {
+            "calls": calls,
+            "avg_us": round(sum(entry["avg_us"] * entry["calls"] for entry in entries) / calls, 1) if calls else 0.0,
+            "max_us": max(entry["max_us"] for entry in entries),
+            "slow": sum(entry["slow"] for entry in entries),
+            "errors": sum(entry["errors"] for entry in entries),
+        }
+    return {"modules": results[0]["modules"], "hooks": merged}
+
+
+def merge_send(results):
+    return {"channels": [channel for result in results for channel in result["channels"]]}
+
+
+MERGE = {
+    "status": merge_status,
+    "stats": merge_stats,
+    "modules": merge_modules,
+    "send": merge_send,
+}
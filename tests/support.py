@@ -0,0 +1,26 @@
+"""
+Gemeinsame Hilfen für die Tests: jede Testklasse bekommt eine eigene,
+temporäre Elchcoins-Datenbank
+"""
+import os
+import shutil
+import tempfile
+import unittest
+
+from modules.elchcoins import database
+from modules.elchcoins.connection import ConnectionManager
+
+
+class DatabaseTestCase(unittest.TestCase):
+    """Leitet database.db für jeden Test auf eine frische Datenbank im Temp-Verzeichnis um"""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp(prefix="elchtest-")
+        self.previous_db = database.db
+        database.db = ConnectionManager(os.path.join(self.tmp, "test.db"))
+        database.init_db()
+
+    def tearDown(self):
+        database.db.close_all()
+        database.db = self.previous_db
+        shutil.rmtree(self.tmp, ignore_errors=True)
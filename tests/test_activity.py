@@ -0,0 +1,82 @@
+import unittest
+
+from modules.elchcoins.activity import MAX_COUNT, ActivityTracker, ChannelActivity
+
+
+class ChannelActivityTest(unittest.TestCase):
+
+    def test_ids_are_interned_and_recycled(self):
+        channel = ChannelActivity(num_buckets=5, max_users=10)
+        self.assertTrue(channel.record("alice", 0))
+        self.assertFalse(channel.record("alice", 1))
+        channel.record("bob", 1)
+        self.assertEqual(channel.ids, {"alice": 0, "bob": 1})
+
+        # Bucket 6 verdrängt die Buckets 0 und 1, alice und bob fallen aus dem Fenster
+        channel.record("carol", 6)
+        self.assertEqual(list(channel.ids), ["carol"])
+        # carol bekommt eine freie ID statt einer neuen
+        self.assertIn(channel.ids["carol"], (0, 1))
+        self.assertEqual(len(channel.names), 2)
+        self.assertEqual(len(channel.free), 1)
+        self.assertEqual(channel.counts(2, 6), {"carol": 1})
+
+    def test_max_users_cap(self):
+        channel = ChannelActivity(num_buckets=5, max_users=2)
+        channel.record("alice", 0)
+        channel.record("bob", 0)
+        self.assertFalse(channel.record("carol", 0))
+        self.assertEqual(channel.dropped, 1)
+        self.assertEqual(channel.counts(0, 0), {"alice": 1, "bob": 1})
+        # Bekannte User zählen weiter
+        channel.record("alice", 1)
+        self.assertEqual(channel.counts(0, 1)["alice"], 2)
+
+    def test_counts_saturate(self):
+        channel = ChannelActivity(num_buckets=5, max_users=10)
+        for _ in range(MAX_COUNT + 20):
+            channel.record("spam", 0)
+        channel.record("spam", 1)
+        self.assertEqual(channel.counts(0, 1), {"spam": MAX_COUNT + 1})
+
+
+class ActivityTrackerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tracker = ActivityTracker(bucket_seconds=60, max_window=600)
+
+    def test_bucket_ring_window(self):
+        self.tracker.record("elch", "Alice", now=0)
+        self.tracker.record("elch", "bob", now=300)
+        self.assertEqual(self.tracker.active_users(window=600, now=590), {"alice": 1, "bob": 1})
+        self.assertEqual(self.tracker.active_users(window=300, now=590), {"bob": 1})
+        # Nach einer vollen Runde über den Ring ist alice vergessen, auch wenn ihr Slot wiederverwendet wird
+        self.tracker.record("elch", "carol", now=11 * 60)
+        self.assertEqual(self.tracker.counts_between(0, 11), {"bob": 1, "carol": 1})
+
+    def test_channels_are_separate_and_merged(self):
+        self.tracker.record("elch", "alice", now=0)
+        self.tracker.record("other", "alice", now=0)
+        self.tracker.record("other", "bob", now=0)
+        self.assertEqual(self.tracker.counts_between(0, 0, channel="elch"), {"alice": 1})
+        self.assertEqual(self.tracker.counts_between(0, 0), {"alice": 2, "bob": 1})
+        self.assertEqual(self.tracker.counts_between(0, 0, channel="missing"), {})
+
+    def test_weighted_rewards(self):
+        self.tracker.set_weights([(10, 2.0), (1, 1.0), (3, 1.5)])
+        for _ in range(12):
+            self.tracker.record("elch", "chatty", now=0)
+        for _ in range(3):
+            self.tracker.record("elch", "normal", now=0)
+        self.tracker.record("elch", "quiet", now=0)
+        self.assertEqual(self.tracker.weighted_rewards(10, 0, 0), {"chatty": 20, "normal": 15, "quiet": 10})
+
+    def test_users_below_first_threshold_get_nothing(self):
+        self.tracker.set_weights([(2, 1.0)])
+        self.tracker.record("elch", "once", now=0)
+        self.assertEqual(self.tracker.weighted_rewards(10, 0, 0), {})
+        self.assertEqual(self.tracker.weight(0), 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
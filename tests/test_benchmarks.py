@@ -0,0 +1,57 @@
+import contextlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from benchmarks.common import LatencyRecorder, compare_results, write_results
+
+
+class LatencyRecorderTest(unittest.TestCase):
+
+    def test_summary(self):
+        recorder = LatencyRecorder("give")
+        for index in range(1, 101):
+            recorder.record(index / 1e6)
+        recorder.elapsed = 0.5
+
+        summary = recorder.summary()
+        self.assertEqual(summary["ops"], 100)
+        self.assertEqual(summary["throughput"], 200.0)
+        self.assertEqual((summary["p50_us"], summary["p90_us"], summary["p99_us"]), (51.0, 91.0, 100.0))
+        self.assertEqual(summary["max_us"], 100.0)
+
+    def test_empty_summary(self):
+        summary = LatencyRecorder("empty").summary()
+        self.assertEqual((summary["ops"], summary["throughput"], summary["p99_us"], summary["max_us"]),
+                         (0, 0.0, 0.0, 0.0))
+
+
+class ResultsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp(prefix="elchtest-")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_write_and_compare(self):
+        path = os.path.join(self.tmp, "results", "old.json")
+        write_results(path, {"users": 10}, {"give": {"throughput": 100.0, "p99_us": 50.0}})
+        with open(path, encoding="utf-8") as f:
+            self.assertEqual(json.load(f)["config"], {"users": 10})
+
+        new = {"results": {"give": {"throughput": 150.0, "p99_us": 25.0}, "new": {"throughput": 1.0, "p99_us": 1.0}}}
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            compare_results(path, new)
+        lines = [line for line in output.getvalue().splitlines() if line.strip().startswith(("give", "new"))]
+        self.assertEqual(len(lines), 1)
+        self.assertIn("+50.0%", lines[0])
+        self.assertIn("-50.0%", lines[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
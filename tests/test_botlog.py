@@ -0,0 +1,111 @@
+import json
+import logging
+import os
+import shutil
+import tempfile
+import unittest
+
+import botlog
+from botlog import BatchedFileSink, RateLimitFilter, legacy_template
+
+
+def legacy_record(text, created=0.0, level=logging.INFO):
+    record = logging.LogRecord("elchbot.auto-reward", level, __file__, 0, "%s", (text,), None)
+    record.raw = True
+    record.created = created
+    return record
+
+
+class LegacyTemplateTest(unittest.TestCase):
+
+    def test_usernames_and_amounts_share_a_key(self):
+        self.assertEqual(
+            legacy_template("\x1b[32m[AUTO-REWARD]\x1b[0m Gave 100 points to new follower: alice"),
+            legacy_template("[AUTO-REWARD] Gave 250 points to new follower: bob"),
+        )
+
+    def test_different_events_of_a_tag_differ(self):
+        self.assertNotEqual(
+            legacy_template("[AUTO-REWARD] Gave 100 points to new follower: alice"),
+            legacy_template("[AUTO-REWARD] Follow event triggered for: alice"),
+        )
+
+    def test_untagged_lines_mask_digits(self):
+        self.assertEqual(legacy_template("took 12 ms"), legacy_template("took 7 ms"))
+
+
+class RateLimitFilterTest(unittest.TestCase):
+
+    def allowed(self, limiter, records):
+        return sum(1 for record in records if limiter.filter(record))
+
+    def test_templates_under_one_tag_are_limited_independently(self):
+        limiter = RateLimitFilter(limit=3, interval=10)
+        payouts = [legacy_record(f"[AUTO-REWARD] Gave 10 points to user{i}") for i in range(10)]
+        follows = [legacy_record(f"[AUTO-REWARD] Follow event triggered for: user{i}") for i in range(2)]
+        self.assertEqual(self.allowed(limiter, payouts), 3)
+        self.assertEqual(self.allowed(limiter, follows), 2)
+
+    def test_suppressed_count_is_reported_in_next_window(self):
+        limiter = RateLimitFilter(limit=1, interval=10)
+        self.allowed(limiter, [legacy_record(f"[POINTS] Served coins to user{i}") for i in range(5)])
+        record = legacy_record("[POINTS] Served coins to late", created=11.0)
+        self.assertTrue(limiter.filter(record))
+        self.assertEqual(botlog.render(record), "[POINTS] Served coins to late (+4 similar suppressed)")
+
+    def test_errors_are_never_limited(self):
+        limiter = RateLimitFilter(limit=1, interval=10)
+        errors = [legacy_record(f"[POINTS] failed for user{i}", level=logging.ERROR) for i in range(5)]
+        self.assertEqual(self.allowed(limiter, errors), 5)
+
+    def test_record_is_counted_once_for_both_sinks(self):
+        limiter = RateLimitFilter(limit=1, interval=10)
+        record = legacy_record("[POINTS] once")
+        self.assertTrue(limiter.filter(record))
+        self.assertTrue(limiter.filter(record))
+        self.assertFalse(limiter.filter(legacy_record("[POINTS] once")))
+
+
+class BatchedFileSinkTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp(prefix="elchtest-")
+        self.path = os.path.join(self.tmp, "bot.log")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def read(self, path):
+        with open(path, encoding="utf-8") as f:
+            return [json.loads(line) for line in f]
+
+    def test_args_are_frozen_at_emit(self):
+        sink = BatchedFileSink(self.path, flush_interval=3600)
+        names = ["alice"]
+        record = logging.LogRecord("elchbot.points", logging.INFO, __file__, 0, "users: %s", (names,), None)
+        sink.emit(record)
+        names.append("bob")
+        sink.close()
+        self.assertEqual([entry["msg"] for entry in self.read(self.path)], ["users: ['alice']"])
+
+    def test_rotation_counts_bytes(self):
+        sink = BatchedFileSink(self.path, backup_count=2, flush_interval=3600)
+
+        def write():
+            # Umlaute sind in UTF-8 doppelt so lang wie in Zeichen
+            sink.emit(logging.LogRecord("elchbot.points", logging.INFO, __file__, 0, "ä" * 100, None, None))
+            sink._write_pending()
+
+        write()
+        size = os.path.getsize(self.path)
+        # Zwei gleiche Einträge passen in Zeichen gezählt, in Bytes aber nicht
+        sink.max_bytes = 2 * size - 1
+        write()
+        sink.close()
+        self.assertEqual(os.path.getsize(self.path), size)
+        self.assertEqual(os.path.getsize(self.path + ".1"), size)
+        self.assertEqual(sink.written, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+import unittest
+
+from modules.elchcoins import database
+
+from support import DatabaseTestCase
+
+
+class BulkPointsTest(DatabaseTestCase):
+
+    def reject(self):
+        """Schreibzugriffe auf mallory scheitern lassen"""
+        for event in ("INSERT", "UPDATE"):
+            database.db.execute(f'''
+                CREATE TRIGGER reject_{event.lower()} BEFORE {event} ON user_points
+                WHEN NEW.username = 'mallory'
+                BEGIN SELECT RAISE(ABORT, 'rejected'); END
+            ''')
+
+    def ledger(self):
+        return dict(database.db.query("SELECT username, SUM(delta) FROM coin_ledger GROUP BY username"))
+
+    def test_invalid_entries_are_reported(self):
+        failures = database.add_points_many({"alice": 5, "Alice": 2, "bob": -1, "carol": 1.5, " ": 3})
+        self.assertEqual(set(failures), {"bob", "carol", " "})
+        self.assertEqual(database.get_points("alice"), 7)
+
+    def test_failing_row_is_isolated(self):
+        deltas = {f"user{i}": 1 for i in range(database.BATCH_SIZE + 10)}
+        deltas["mallory"] = 5
+        self.reject()
+        failures = database.add_points_many(deltas, source=3)
+
+        self.assertEqual(list(failures), ["mallory"])
+        self.assertIn("rejected", failures["mallory"])
+        points = database.get_points_many(list(deltas))
+        self.assertEqual(len(points), len(deltas) - 1)
+        self.assertNotIn("mallory", points)
+        ledger = self.ledger()
+        self.assertNotIn("mallory", ledger)
+        self.assertEqual(sum(ledger.values()), len(deltas) - 1)
+
+    def test_remove_isolates_failures_and_reports_taken(self):
+        database.apply_deltas({"alice": 10, "bob": 3, "mallory": 4}, 0)
+        self.reject()
+        taken = {}
+        failures = database.remove_points_many({"alice": 4, "bob": 5, "mallory": 1, "nobody": 2}, taken=taken)
+
+        self.assertEqual(list(failures), ["mallory"])
+        self.assertEqual(taken, {"alice": 4, "bob": 3})
+        self.assertEqual(database.get_points_many(["alice", "bob", "mallory"]),
+                         {"alice": 6, "bob": 0, "mallory": 4})
+        self.assertEqual(self.ledger(), {"alice": -4, "bob": -3})
+
+
+if __name__ == "__main__":
+    unittest.main()
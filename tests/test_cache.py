@@ -0,0 +1,65 @@
+import unittest
+
+from modules.elchcoins.cache import BalanceCache
+
+
+class BalanceCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = BalanceCache(max_entries=3, ttl=60)
+
+    def test_read_through_and_hit(self):
+        loads = []
+        loader = lambda username: loads.append(username) or 7
+        self.assertEqual(self.cache.get("Alice", loader), 7)
+        self.assertEqual(self.cache.get("alice", loader), 7)
+        self.assertEqual(loads, ["alice"])
+        self.assertEqual(self.cache.stats()["hits"], 1)
+
+    def test_lru_eviction(self):
+        for name in "abcd":
+            self.cache.put(name, 1)
+        self.assertEqual(self.cache.stats()["evictions"], 1)
+        self.assertEqual(self.cache.get("a", lambda username: 99), 99)
+
+    def test_adjust_only_touches_cached_entries(self):
+        self.cache.put("alice", 10)
+        self.cache.adjust("alice", -15)
+        self.cache.adjust("bob", 5)
+        self.assertEqual(self.cache.get("alice", lambda username: -1), 0)
+        self.assertEqual(self.cache.stats()["size"], 1)
+
+    def test_invalidate_during_load_is_not_overwritten(self):
+        def loader(username):
+            # Ein anderer Thread schreibt, während noch geladen wird
+            self.cache.invalidate(username)
+            return 5
+        self.assertEqual(self.cache.get("alice", loader), 5)
+        self.assertEqual(self.cache.get("alice", lambda username: 8), 8)
+
+    def test_adjust_during_load_is_not_overwritten(self):
+        def loader(username):
+            self.cache.adjust(username, 3)
+            return 5
+        self.cache.get("alice", loader)
+        self.assertEqual(self.cache.get("alice", lambda username: 8), 8)
+
+    def test_clear_during_get_many_is_not_overwritten(self):
+        def loader(usernames):
+            self.cache.clear()
+            return {username: 1 for username in usernames}
+        self.assertEqual(self.cache.get_many(["a", "B"], loader), {"a": 1, "b": 1})
+        self.assertEqual(self.cache.stats()["size"], 0)
+
+    def test_failed_load_leaves_no_state(self):
+        def loader(username):
+            raise RuntimeError("db down")
+        with self.assertRaises(RuntimeError):
+            self.cache.get("alice", loader)
+        self.assertEqual(self.cache._loading, {})
+        self.assertEqual(self.cache.get("alice", lambda username: 4), 4)
+        self.assertEqual(self.cache.get("alice", lambda username: 9), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import asyncio
+import unittest
+from types import SimpleNamespace
+
+import coalesce
+from coalesce import CommandBatcher, pack
+from outbound import MAX_MESSAGE_LENGTH, SEPARATOR
+
+
+class PackTest(unittest.TestCase):
+
+    def test_joins_parts_with_separator(self):
+        self.assertEqual(pack(["a: 1", "b: 2"], "💰 "), ["💰 a: 1" + SEPARATOR + "b: 2"])
+        self.assertEqual(pack([]), [])
+
+    def test_starts_new_message_at_limit(self):
+        part = "x" * 200
+        messages = pack([part] * 5, "> ")
+        self.assertEqual(len(messages), 3)
+        self.assertTrue(all(len(message) <= MAX_MESSAGE_LENGTH for message in messages))
+        self.assertTrue(all(message.startswith("> ") for message in messages))
+        self.assertEqual(sum(message.count("x") for message in messages), 1000)
+
+    def test_oversized_part_is_hard_split(self):
+        messages = pack(["short", "y" * 1200], "Top: ")
+        self.assertTrue(all(len(message) <= MAX_MESSAGE_LENGTH for message in messages))
+        self.assertEqual("".join(message[len("Top: "):] for message in messages).replace(SEPARATOR, ""),
+                         "short" + "y" * 1200)
+
+
+def context(name, channel="elch"):
+    return SimpleNamespace(author=SimpleNamespace(name=name), channel=SimpleNamespace(name=channel), bot=None)
+
+
+class CommandBatcherTest(unittest.TestCase):
+
+    def setUp(self):
+        config = SimpleNamespace(coalesce_window=0.0)
+        snapshot = SimpleNamespace(command=lambda module, command: config)
+        self.config = config
+        self.calls = []
+        self.batcher = CommandBatcher("points", "coins", self.single, self.batch, snapshot=lambda: snapshot)
+
+    async def single(self, ctx):
+        self.calls.append(("single", ctx.author.name))
+
+    async def batch(self, ctxs):
+        self.calls.append(("batch", [ctx.author.name for ctx in ctxs]))
+        return "", []
+
+    def test_window_is_read_on_each_burst(self):
+        async def run():
+            await self.batcher.submit(context("a"))
+            self.config.coalesce_window = 0.01
+            for name in "bcd":
+                await self.batcher.submit(context(name))
+            await self.batcher.submit(context("e", channel="other"))
+            await asyncio.sleep(0.05)
+
+        asyncio.run(run())
+        self.assertEqual(self.calls[0], ("single", "a"))
+        self.assertIn(("batch", ["b", "c", "d"]), self.calls)
+        self.assertIn(("batch", ["e"]), self.calls)
+
+    def test_unique_authors(self):
+        ctxs = [context("a"), context("b"), context("a")]
+        self.assertEqual(coalesce.unique_authors(ctxs), ["a", "b"])
+
+
+if __name__ == "__main__":
+    unittest.main()
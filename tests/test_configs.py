@@ -0,0 +1,127 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+try:
+    import colorama
+except ImportError:
+    colorama = None
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@unittest.skipIf(colorama is None, "configs braucht colorama")
+class ConfigTestCase(unittest.TestCase):
+    """ConfigManager mit eigenem configs/ und modules/ in einem Temp-Verzeichnis"""
+
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.tmp = tempfile.mkdtemp(prefix="elchtest-")
+        # ConfigManager arbeitet mit Pfaden relativ zum Arbeitsverzeichnis
+        os.chdir(self.tmp)
+        os.mkdir("modules")
+        import configs
+        self.configs = configs
+        self.manager = configs.ConfigManager()
+
+    def tearDown(self):
+        self.manager.stop_watcher()
+        os.chdir(self.cwd)
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def copy_module(self, name):
+        shutil.copy(os.path.join(REPO, "modules", f"{name}.py"), os.path.join("modules", f"{name}.py"))
+
+    def write_config(self, name, data, mtime=None):
+        path = os.path.join("configs", f"{name}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(data if isinstance(data, str) else json.dumps(data))
+        if mtime is not None:
+            # Eigene mtime, damit schnelle Änderungen sicher erkannt werden
+            os.utime(path, (mtime, mtime))
+
+
+class ModuleTypeTest(ConfigTestCase):
+
+    def test_points_config_keeps_coalesce_window(self):
+        self.copy_module("points")
+        self.write_config("points", {
+            "base_reward": 25,
+            "commands": {"coins": {"cooldown": 0, "coalesce_window": 2.0}},
+        })
+        self.manager.refresh()
+
+        config = self.manager.snapshot.modules["points"]
+        self.assertIsInstance(config, self.configs.PointsModuleConfig)
+        self.assertEqual(config.base_reward, 25)
+        cmd_config, enabled, channels = self.manager.snapshot.rule("points", "coins")
+        self.assertEqual((cmd_config.coalesce_window, cmd_config.cooldown), (2.0, 0))
+        self.assertTrue(enabled)
+
+    def test_coalesced_modules_declare_their_type(self):
+        expected = {"points": "points", "rank": "points", "uptime": "utility", "help": "game"}
+        for name, module_type in expected.items():
+            self.copy_module(name)
+            self.assertEqual(self.manager.detect_module_type(name), module_type)
+
+
+class SnapshotTest(ConfigTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.copy_module("points")
+        self.write_config("points", {"commands": {"coins": {"cooldown": 3}}}, mtime=1000)
+        self.manager.refresh()
+
+    def cooldown(self, snapshot=None):
+        return (snapshot or self.manager.snapshot).command("points", "coins").cooldown
+
+    def test_snapshot_is_read_only_copy(self):
+        snapshot = self.manager.snapshot
+        with self.assertRaises(TypeError):
+            snapshot.modules["points"] = None
+        self.manager.loaded_configs["points"].commands["coins"].cooldown = 99
+        self.assertEqual(self.cooldown(snapshot), 3)
+
+        published = self.manager.publish()
+        self.assertEqual(published.version, snapshot.version + 1)
+        self.assertEqual(self.cooldown(published), 99)
+        self.assertEqual(self.cooldown(snapshot), 3)
+
+    def test_refresh_picks_up_changes(self):
+        self.assertFalse(self.manager.refresh())
+        old = self.manager.snapshot
+        self.write_config("points", {"commands": {"coins": {"cooldown": 7}}}, mtime=2000)
+        self.assertTrue(self.manager.refresh())
+        self.assertEqual(self.cooldown(), 7)
+        self.assertEqual(self.cooldown(old), 3)
+
+    def test_broken_file_keeps_previous_config(self):
+        self.write_config("points", "{half written", mtime=2000)
+        self.assertFalse(self.manager.refresh())
+        self.assertEqual(self.cooldown(), 3)
+
+    def test_watcher_publishes_changes(self):
+        self.manager.start_watcher(interval=0.02)
+        version = self.manager.snapshot.version
+        self.write_config("points", {"commands": {"coins": {"cooldown": 8}}}, mtime=3000)
+        deadline = time.monotonic() + 2
+        while self.manager.snapshot.version == version and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(self.cooldown(), 8)
+
+    def test_missing_module_gets_cached_default_without_io(self):
+        self.copy_module("uptime")
+        snapshot = self.manager.snapshot
+        config = snapshot.config("uptime")
+        self.assertIsInstance(config, self.configs.UtilityModuleConfig)
+        self.assertIn("uptime", config.commands)
+        self.assertIs(snapshot.config("uptime"), config)
+        self.assertFalse(os.path.exists(os.path.join("configs", "uptime.json")))
+
+
+if __name__ == "__main__":
+    unittest.main()
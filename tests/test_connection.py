@@ -0,0 +1,77 @@
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from modules.elchcoins.connection import ConnectionManager
+
+
+class ConnectionManagerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp(prefix="elchtest-")
+        self.path = os.path.join(self.tmp, "test.db")
+        self.db = ConnectionManager(self.path)
+        self.db.execute("CREATE TABLE counter (id INTEGER PRIMARY KEY, value INTEGER NOT NULL)")
+        self.db.execute("INSERT INTO counter (id, value) VALUES (1, 0)")
+
+    def tearDown(self):
+        self.db.close_all()
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def value(self):
+        return self.db.query_one("SELECT value FROM counter WHERE id = 1")[0]
+
+    def test_pragmas_are_applied(self):
+        self.assertEqual(self.db.query_one("PRAGMA journal_mode")[0], "wal")
+        self.assertEqual(self.db.query_one("PRAGMA synchronous")[0], 1)  # NORMAL
+        self.assertEqual(self.db.query_one("PRAGMA busy_timeout")[0], 5000)
+
+    def test_threads_share_one_connection(self):
+        connections = []
+
+        def work():
+            connections.append(self.db.get_connection())
+            for _ in range(50):
+                with self.db.transaction() as conn:
+                    value = conn.execute("SELECT value FROM counter WHERE id = 1").fetchone()[0]
+                    conn.execute("UPDATE counter SET value = ? WHERE id = 1", (value + 1,))
+
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len({id(conn) for conn in connections}), 1)
+        self.assertEqual(self.value(), 400)
+
+    def test_transaction_rolls_back_on_error(self):
+        with self.assertRaises(ValueError):
+            with self.db.transaction() as conn:
+                conn.execute("UPDATE counter SET value = 5 WHERE id = 1")
+                raise ValueError("abort")
+        self.assertEqual(self.value(), 0)
+
+    def test_data_version_changes_only_for_other_connections(self):
+        version = self.db.query_one("PRAGMA data_version")[0]
+        self.db.execute("UPDATE counter SET value = 1 WHERE id = 1")
+        self.assertEqual(self.db.query_one("PRAGMA data_version")[0], version)
+
+        other = ConnectionManager(self.path)
+        try:
+            other.execute("UPDATE counter SET value = 2 WHERE id = 1")
+        finally:
+            other.close_all()
+        self.assertNotEqual(self.db.query_one("PRAGMA data_version")[0], version)
+        self.assertEqual(self.value(), 2)
+
+    def test_reopens_after_close(self):
+        first = self.db.get_connection()
+        self.db.close_all()
+        self.assertIsNot(self.db.get_connection(), first)
+        self.assertEqual(self.value(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import asyncio
+import queue
+import threading
+import unittest
+
+from modules.elchcoins.async_coinmanager import DBWorker
+
+
+class DBWorkerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.worker = DBWorker(maxsize=2)
+        self.release = threading.Event()
+        self.started = threading.Event()
+
+    def tearDown(self):
+        self.release.set()
+        self.worker.stop()
+
+    def block(self):
+        """Hält den Worker-Thread fest, bis release gesetzt wird"""
+        self.started.set()
+        self.release.wait(5)
+        return "blocked"
+
+    def fill(self):
+        blocked = self.worker.post(self.block)
+        self.assertTrue(self.started.wait(5))
+        queued = [self.worker.post(lambda value=value: value) for value in range(2)]
+        return blocked, queued
+
+    def test_post_raises_when_queue_is_full(self):
+        blocked, queued = self.fill()
+        self.assertEqual(self.worker.pending(), 2)
+        with self.assertRaises(queue.Full):
+            self.worker.post(lambda: None)
+        self.release.set()
+        self.assertEqual(blocked.result(5), "blocked")
+        self.assertEqual([future.result(5) for future in queued], [0, 1])
+
+    def test_submit_waits_without_blocking_the_loop(self):
+        self.fill()
+
+        async def main():
+            ticks = 0
+            task = asyncio.create_task(self.worker.submit(lambda: "done"))
+            while ticks < 5:
+                # Der Loop läuft weiter, während submit auf einen freien Platz wartet
+                await asyncio.sleep(0.01)
+                ticks += 1
+            self.assertFalse(task.done())
+            self.release.set()
+            return await asyncio.wait_for(task, 5)
+
+        self.assertEqual(asyncio.run(main()), "done")
+
+    def test_errors_reach_the_caller(self):
+        def fail():
+            raise ValueError("broken")
+
+        with self.assertRaises(ValueError):
+            asyncio.run(self.worker.submit(fail))
+        self.assertEqual(asyncio.run(self.worker.submit(lambda: 1)), 1)
+
+    def test_stop_finishes_queued_jobs(self):
+        blocked, queued = self.fill()
+        self.release.set()
+        self.worker.stop()
+        self.assertTrue(all(future.done() for future in queued))
+        self.assertEqual(self.worker.pending(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
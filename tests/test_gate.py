@@ -0,0 +1,159 @@
+import asyncio
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from gate import CommandGate, ExpiringMap
+
+
+def command_config(**overrides):
+    values = dict(enabled=True, permission_level="everyone", cooldown=0, max_uses_per_user=0)
+    values.update(overrides)
+    return SimpleNamespace(**values)
+
+
+def context(name="alice", channel="elch", **badges):
+    author = SimpleNamespace(name=name, id=name, **badges)
+    return SimpleNamespace(author=author, channel=SimpleNamespace(name=channel))
+
+
+class Snapshot:
+    def __init__(self):
+        self.rules = {}
+
+    def rule(self, module_name, command_name):
+        return self.rules.get((module_name, command_name), (None, True, None))
+
+
+class ExpiringMapTest(unittest.TestCase):
+
+    def test_remaining_counts_down_and_expires(self):
+        cooldowns = ExpiringMap(slots=60, now=1000)
+        cooldowns.set("a", 5, 1000.5)
+        self.assertAlmostEqual(cooldowns.remaining("a", 1002.5), 3.0)
+        self.assertEqual(cooldowns.remaining("a", 1005.5), 0.0)
+        self.assertEqual(cooldowns.remaining("missing", 1000), 0.0)
+
+    def test_wheel_removes_expired_entries(self):
+        cooldowns = ExpiringMap(slots=60, now=1000)
+        for i in range(100):
+            cooldowns.set(i, 2, 1000)
+        cooldowns.set("long", 30, 1000)
+        self.assertEqual(len(cooldowns), 101)
+        cooldowns.set("x", 1, 1010)
+        self.assertEqual(len(cooldowns), 2)
+
+    def test_ttl_longer_than_wheel_survives_laps(self):
+        cooldowns = ExpiringMap(slots=10, now=0)
+        cooldowns.set("a", 25, 0)
+        for now in range(1, 25):
+            cooldowns.set("tick", 0.5, now)
+            self.assertGreater(cooldowns.remaining("a", now), 0)
+        cooldowns.set("tick", 0.5, 27)
+        self.assertNotIn("a", cooldowns.expiry)
+
+    def test_reset_of_live_key_is_not_queued_twice(self):
+        cooldowns = ExpiringMap(slots=60, now=0)
+        for _ in range(100):
+            cooldowns.set("a", 10, 0.5, value=1)
+        self.assertEqual(sum(len(slot) for slot in cooldowns.wheel), 1)
+        self.assertEqual(cooldowns.get("a", 5), 1)
+        cooldowns.set("tick", 1, 20)
+        self.assertIsNone(cooldowns.get("a", 20))
+        self.assertNotIn("a", cooldowns.values)
+
+    def test_reset_moves_entry_to_new_slot(self):
+        cooldowns = ExpiringMap(slots=60, now=0)
+        cooldowns.set("a", 2, 0)
+        cooldowns.set("a", 20, 1)
+        cooldowns.set("tick", 1, 5)
+        self.assertAlmostEqual(cooldowns.remaining("a", 5), 16.0)
+
+
+class CommandGateTest(unittest.TestCase):
+
+    def setUp(self):
+        self.snapshot = Snapshot()
+        self.gate = CommandGate(snapshot=lambda: self.snapshot, now=0)
+
+    def configure(self, channels=None, module_enabled=True, **overrides):
+        self.snapshot.rules[("points", "coins")] = (command_config(**overrides), module_enabled, channels)
+
+    def check(self, ctx=None, now=0):
+        return self.gate.check("points", "coins", ctx or context(), now=now)
+
+    def test_unconfigured_command_is_allowed(self):
+        self.assertIsNone(self.check())
+        self.assertIsNone(self.gate.check(None, "coins", context()))
+
+    def test_disabled_channel_and_permission(self):
+        self.configure(module_enabled=False)
+        self.assertEqual(self.check(), "disabled")
+        self.configure(enabled=False)
+        self.assertEqual(self.check(), "disabled")
+        self.configure(channels={"other"})
+        self.assertEqual(self.check(), "channel")
+        self.configure(permission_level="mod")
+        self.assertEqual(self.check(), "permission")
+        self.assertIsNone(self.check(context(is_mod=True)))
+
+    def test_cooldown_per_user_expires(self):
+        self.configure(cooldown=10)
+        self.assertIsNone(self.check(now=100))
+        self.assertEqual(self.check(now=105), "cooldown")
+        self.assertIsNone(self.check(context("bob"), now=105))
+        self.assertIsNone(self.check(now=110.5))
+
+    def test_rejected_call_does_not_extend_cooldown(self):
+        self.configure(cooldown=10)
+        self.check(now=100)
+        self.check(now=109)
+        self.assertIsNone(self.check(now=110))
+
+    def test_cap_resets_next_day(self):
+        self.configure(max_uses_per_user=2)
+        with mock.patch("gate.seconds_until_midnight", return_value=100):
+            self.assertIsNone(self.check(now=0))
+            self.assertIsNone(self.check(now=10))
+            self.assertEqual(self.check(now=20), "limit")
+            self.assertIsNone(self.check(context("bob"), now=20))
+            self.assertEqual(self.check(now=99), "limit")
+            # Um Mitternacht (100 Sekunden nach dem ersten Aufruf) beginnt der Zähler neu
+            self.assertIsNone(self.check(now=120))
+            self.assertEqual(self.gate.uses.get(("coins", "alice"), 120), 1)
+
+    def test_caps_stay_bounded_under_raids(self):
+        self.configure(max_uses_per_user=3)
+        with mock.patch("gate.seconds_until_midnight", return_value=60):
+            for i in range(5000):
+                self.check(context(f"raider{i}"), now=i * 0.01)
+            self.assertEqual(len(self.gate.uses), 5000)
+            # Nach Ablauf räumt der nächste Eintrag alle alten Zähler weg
+            self.check(context("late"), now=200)
+        self.assertEqual(len(self.gate.uses), 1)
+        self.assertEqual(self.gate.stats()["capped_users"], 1)
+
+    def test_mods_bypass_cooldown_and_cap(self):
+        self.configure(cooldown=60, max_uses_per_user=1)
+        mod = context("mod", is_mod=True)
+        for now in range(5):
+            self.assertIsNone(self.check(mod, now=now))
+        self.assertEqual(self.gate.stats(), {"cooldowns": 0, "capped_users": 0})
+
+    def test_wrap_drops_rejected_calls(self):
+        self.configure(enabled=False)
+        calls = []
+
+        async def handler(ctx):
+            calls.append(ctx)
+            return "ran"
+
+        gated = self.gate.wrap("points", "coins", handler)
+        self.assertIsNone(asyncio.run(gated(context())))
+        self.configure()
+        self.assertEqual(asyncio.run(gated(context())), "ran")
+        self.assertEqual(len(calls), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
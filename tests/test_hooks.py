@@ -0,0 +1,87 @@
+import asyncio
+import unittest
+from queue import Queue
+
+try:
+    import main
+except ImportError:
+    main = None
+
+
+class FakeMessage:
+    content = "hello"
+
+
+@unittest.skipIf(main is None, "main braucht twitchio, dotenv und colorama")
+class MessageHookTest(unittest.TestCase):
+
+    def setUp(self):
+        self.log_queue = Queue()
+        self.manager = main.ModuleManager(None, self.log_queue)
+
+    def logged(self):
+        lines = []
+        while not self.log_queue.empty():
+            lines.append(self.log_queue.get())
+        return lines
+
+    def test_failing_hook_does_not_stop_others(self):
+        seen = []
+
+        def broken(message):
+            raise RuntimeError("boom")
+
+        self.manager.add_message_hook("broken", broken)
+        self.manager.add_message_hook("counter", seen.append)
+        message = FakeMessage()
+        for _ in range(3):
+            self.manager.dispatch_message(message)
+
+        self.assertEqual(seen, [message] * 3)
+        stats = self.manager.hook_stats()
+        self.assertEqual((stats["broken"]["calls"], stats["broken"]["errors"]), (3, 3))
+        self.assertEqual((stats["counter"]["calls"], stats["counter"]["errors"]), (3, 0))
+        # Nur der erste Fehler (und dann jeder hundertste) wird geloggt
+        self.assertEqual(len([line for line in self.logged() if "broken failed" in line]), 1)
+
+    def test_async_hooks_run_as_tasks(self):
+        seen = []
+
+        async def slow(message):
+            await asyncio.sleep(0)
+            seen.append(message)
+
+        async def broken(message):
+            raise RuntimeError("boom")
+
+        async def run():
+            self.manager.add_message_hook("slow", slow)
+            self.manager.add_message_hook("broken", broken)
+            self.manager.dispatch_message(FakeMessage())
+            # dispatch_message wartet nicht auf die Hooks
+            self.assertEqual(seen, [])
+            self.assertEqual(len(self.manager.hook_tasks), 2)
+            await asyncio.gather(*self.manager.hook_tasks, return_exceptions=True)
+            await asyncio.sleep(0)
+
+        asyncio.run(run())
+        self.assertEqual(len(seen), 1)
+        self.assertEqual(len(self.manager.hook_tasks), 0)
+        self.assertEqual(self.manager.hook_stats()["broken"]["errors"], 1)
+
+    def test_replace_and_remove(self):
+        calls = []
+        self.manager.add_message_hook("points", lambda message: calls.append("old"))
+        self.manager.add_message_hook("points", lambda message: calls.append("new"))
+        self.manager.dispatch_message(FakeMessage())
+        self.assertEqual(calls, ["new"])
+
+        self.manager.remove_message_hook("points")
+        self.manager.remove_message_hook("missing")
+        self.manager.dispatch_message(FakeMessage())
+        self.assertEqual(calls, ["new"])
+        self.assertEqual(self.manager.message_hooks, ())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+import ast
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from introspect import ModuleManifest, analyze_source, find_commands
+
+MODULE = '''
+from twitchio.ext import commands
+
+MODULE_TYPE = "Game"
+
+def setup_command(bot, log_queue):
+    @bot.command(name="dice")
+    async def dice(ctx):
+        pass
+
+    @bot.command()
+    async def roll(ctx):
+        pass
+
+    @bot.command(name="dice")
+    async def dice_again(ctx):
+        pass
+
+    @other.command(name="ignored")
+    async def ignored(ctx):
+        pass
+
+    bot.add_command(commands.Command(name="flip", func=flip))
+'''
+
+
+class AnalyzeTest(unittest.TestCase):
+
+    def test_find_commands(self):
+        self.assertEqual(find_commands(ast.parse(MODULE)), ["dice", "roll", "flip"])
+
+    def test_declared_type_wins_over_keywords(self):
+        self.assertEqual(analyze_source(MODULE).module_type, "game")
+
+    def test_guessed_type(self):
+        self.assertEqual(analyze_source("def give_coins(): pass\n").module_type, "points")
+        self.assertEqual(analyze_source("x = 1\n").module_type, "default")
+
+    def test_module_code_is_not_executed(self):
+        info = analyze_source("raise SystemExit('imported')\n")
+        self.assertEqual(info.commands, [])
+
+
+class ManifestTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp(prefix="elchtest-"))
+        self.module = self.tmp / "dice.py"
+        self.module.write_text(MODULE, encoding="utf-8")
+        self.manifest_path = self.tmp / ".cache" / "modules.json"
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_unchanged_files_are_not_reanalyzed(self):
+        manifest = ModuleManifest(self.manifest_path)
+        manifest.info(self.module)
+        self.assertTrue(manifest.save())
+
+        reloaded = ModuleManifest(self.manifest_path)
+        info = reloaded.info(self.module)
+        self.assertEqual((info.module_type, info.commands), ("game", ["dice", "roll", "flip"]))
+        self.assertEqual(reloaded.analyzed, 0)
+        self.assertFalse(reloaded.save())
+
+        self.module.write_text(MODULE.replace('"flip"', '"coin"'), encoding="utf-8")
+        self.assertEqual(reloaded.info(self.module).commands, ["dice", "roll", "coin"])
+        self.assertEqual(reloaded.analyzed, 1)
+
+    def test_prune_drops_deleted_modules(self):
+        manifest = ModuleManifest(self.manifest_path)
+        manifest.info(self.module)
+        manifest.save()
+        manifest.prune([])
+        self.assertTrue(manifest.save())
+        self.assertEqual(ModuleManifest(self.manifest_path).entries, {})
+
+    def test_broken_manifest_is_ignored(self):
+        os.makedirs(self.manifest_path.parent)
+        self.manifest_path.write_text("{not json", encoding="utf-8")
+        manifest = ModuleManifest(self.manifest_path)
+        self.assertEqual(manifest.info(self.module).commands, ["dice", "roll", "flip"])
+
+
+if __name__ == "__main__":
+    unittest.main()
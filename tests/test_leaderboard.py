@@ -0,0 +1,51 @@
+import random
+import unittest
+
+from modules.elchcoins.leaderboard import Leaderboard
+
+
+class LeaderboardTest(unittest.TestCase):
+
+    def setUp(self):
+        self.board = Leaderboard()
+        self.board.rebuild([("alice", 50), ("bob", 20), ("carol", 20), ("dave", 5)])
+
+    def test_top_and_page(self):
+        self.assertEqual(self.board.top(2), [("alice", 50), ("bob", 20)])
+        self.assertEqual(self.board.page(2, 2), [("carol", 20), ("dave", 5)])
+        self.assertEqual(self.board.page(3, 2), [])
+
+    def test_ties_share_position(self):
+        self.assertEqual(self.board.position(50), 1)
+        self.assertEqual(self.board.position(20), 2)
+        self.assertEqual(self.board.position(5), 4)
+        self.assertEqual(self.board.count_below(20), 1)
+
+    def test_add_moves_user_and_clamps_at_zero(self):
+        self.board.add("Dave", 100)
+        self.assertEqual(self.board.top(1), [("dave", 105)])
+        self.assertEqual(self.board.add("bob", -1000), 0)
+        self.assertEqual(self.board.position(0), 4)
+        self.assertEqual(len(self.board), 4)
+
+    def test_matches_sorting_after_random_updates(self):
+        rng = random.Random(7)
+        expected = {}
+        board = Leaderboard()
+        for _ in range(2000):
+            username = f"user{rng.randrange(50)}"
+            delta = rng.randrange(-30, 60)
+            expected[username] = max(expected.get(username, 0) + delta, 0)
+            board.add(username, delta)
+
+        ordered = sorted(expected.items(), key=lambda item: (-item[1], item[0]))
+        self.assertEqual(board.top(len(ordered)), ordered)
+        for username, points in expected.items():
+            better = sum(1 for value in expected.values() if value > points)
+            worse = sum(1 for value in expected.values() if value < points)
+            self.assertEqual(board.position(points), better + 1)
+            self.assertEqual(board.count_below(points), worse)
+
+
+if __name__ == "__main__":
+    unittest.main()
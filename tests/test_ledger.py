@@ -0,0 +1,63 @@
+import gzip
+import os
+import unittest
+
+from modules.elchcoins import database, ledger
+
+from support import DatabaseTestCase
+
+
+class LedgerTest(DatabaseTestCase):
+    """Historische Kontostände müssen eine Kompaktierung unverändert überstehen"""
+
+    def apply(self, ts, username, delta):
+        database.apply_deltas({username: delta}, 0, [(ts, username, delta, 0)])
+
+    def setUp(self):
+        super().setUp()
+        ledger.take_snapshot(50)
+        self.apply(100, "alice", 10)
+        ledger.take_snapshot(150)
+        self.apply(200, "alice", 5)
+        self.apply(210, "bob", 4)
+        ledger.take_snapshot(250)
+        self.apply(300, "alice", -3)
+        ledger.take_snapshot(350)
+        self.apply(400, "bob", 7)
+
+    def test_balance_as_of_replays_from_nearest_snapshot(self):
+        self.assertEqual(ledger.balance_as_of("alice", 99), 0)
+        self.assertEqual(ledger.balance_as_of("Alice", 120), 10)
+        self.assertEqual(ledger.balance_as_of("alice", 220), 15)
+        self.assertEqual(ledger.balance_as_of("alice", 320), 12)
+        self.assertEqual(ledger.balance_as_of("bob", 420), 11)
+
+    def test_balance_as_of_survives_compaction(self):
+        times = (250, 260, 320, 360, 420)
+        before = {(user, ts): ledger.balance_as_of(user, ts) for user in ("alice", "bob") for ts in times}
+
+        archive_dir = os.path.join(self.tmp, "archive")
+        archived = ledger.compact(keep_snapshots=2, archive_dir=archive_dir)
+
+        self.assertEqual(archived, 3)
+        after = {(user, ts): ledger.balance_as_of(user, ts) for user in ("alice", "bob") for ts in times}
+        self.assertEqual(after, before)
+        # Der aktuelle Stand stimmt weiter mit user_points überein
+        self.assertEqual(ledger.balance_as_of("alice", 10 ** 10), database.get_points("alice"))
+        self.assertEqual(ledger.balance_as_of("bob", 10 ** 10), database.get_points("bob"))
+
+        # Zeiten vor dem ältesten behaltenen Snapshot lassen sich nicht mehr beantworten
+        with self.assertRaises(ValueError):
+            ledger.balance_as_of("alice", 220)
+
+        (name,) = os.listdir(archive_dir)
+        with gzip.open(os.path.join(archive_dir, name), "rt", encoding="utf-8") as f:
+            self.assertEqual(len(f.read().splitlines()), archived + 1)
+
+    def test_compact_keeps_everything_with_few_snapshots(self):
+        self.assertEqual(ledger.compact(keep_snapshots=10, archive_dir=None), 0)
+        self.assertEqual(ledger.balance_as_of("alice", 120), 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
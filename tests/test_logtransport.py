@@ -0,0 +1,63 @@
+import multiprocessing
+import unittest
+from queue import Queue
+
+from logtransport import LogWriter, start_reader
+
+
+class FakeConn:
+
+    def __init__(self):
+        self.batches = []
+        self.closed = False
+
+    def send(self, batch):
+        self.batches.append(batch)
+
+    def close(self):
+        self.closed = True
+
+    def lines(self):
+        return [line for batch in self.batches for line in batch]
+
+
+class LogWriterTest(unittest.TestCase):
+
+    def test_drops_are_counted_and_reported_once(self):
+        conn = FakeConn()
+        writer = LogWriter(conn, max_buffered=3, batch_delay=0)
+        results = [writer.put(f"line {index}") for index in range(5)]
+        self.assertEqual(results, [True, True, True, False, False])
+        self.assertEqual(writer.stats()["dropped"], 2)
+
+        writer.start().close()
+        lines = conn.lines()
+        self.assertEqual(lines[:3], ["line 0", "line 1", "line 2"])
+        self.assertEqual([line for line in lines if "Dropped" in line],
+                         ["[LOG] Dropped 2 log lines (console too slow)"])
+        self.assertEqual(writer.stats()["sent"], 4)
+        self.assertTrue(conn.closed)
+
+    def test_sends_in_batches(self):
+        conn = FakeConn()
+        writer = LogWriter(conn, batch_size=4, batch_delay=0)
+        for index in range(10):
+            writer.put(index)
+        writer.start().close()
+        self.assertEqual(conn.lines(), list(range(10)))
+        self.assertTrue(all(len(batch) <= 4 for batch in conn.batches))
+        self.assertEqual(writer.batches, len(conn.batches))
+
+    def test_reader_prefixes_lines(self):
+        receiver, sender = multiprocessing.Pipe(duplex=False)
+        log_queue = Queue()
+        thread = start_reader(receiver, log_queue, "[S1] ")
+        writer = LogWriter(sender, batch_delay=0).start()
+        writer.put("hello")
+        writer.close()
+        thread.join(5)
+        self.assertEqual(log_queue.get_nowait(), "[S1] hello")
+
+
+if __name__ == "__main__":
+    unittest.main()
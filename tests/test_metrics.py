@@ -0,0 +1,106 @@
+import asyncio
+import unittest
+import urllib.error
+import urllib.request
+
+from metrics import BUCKETS, Histogram, Metrics, RateMeter, start_http_server
+
+
+class HistogramTest(unittest.TestCase):
+
+    def test_bucket_bounds_are_inclusive(self):
+        histogram = Histogram()
+        histogram.observe(0.001)
+        histogram.observe(0.0011)
+        histogram.observe(20.0)
+        index = BUCKETS.index(0.001)
+        self.assertEqual((histogram.counts[index], histogram.counts[index + 1], histogram.counts[-1]), (1, 1, 1))
+
+    def test_quantiles_and_summary(self):
+        histogram = Histogram()
+        self.assertEqual(histogram.quantile(0.5), 0.0)
+        for _ in range(98):
+            histogram.observe(0.002)
+        histogram.observe(0.3)
+        histogram.observe(0.4)
+        # Quantil ist die Bucket-Obergrenze, höchstens aber das Maximum
+        self.assertEqual(histogram.quantile(0.5), 0.0025)
+        self.assertEqual(histogram.quantile(0.99), 0.4)
+        summary = histogram.summary()
+        self.assertEqual((summary["count"], summary["p50_ms"], summary["p99_ms"], summary["max_ms"]),
+                         (100, 2.5, 400.0, 400.0))
+        self.assertAlmostEqual(summary["avg_ms"], 8.96)
+
+
+class RateMeterTest(unittest.TestCase):
+
+    def test_rate_over_window(self):
+        meter = RateMeter(window=10)
+        for second in range(20):
+            meter.mark("elch", now=second)
+            meter.mark("elch", now=second)
+        self.assertEqual(meter.totals["elch"], 40)
+        self.assertEqual(meter.rate("elch", now=19), 2.0)
+        self.assertEqual(meter.rate("elch", now=24), 1.0)
+        self.assertEqual(meter.rate("elch", now=40), 0.0)
+        self.assertEqual(meter.rate("missing"), 0.0)
+
+
+class MetricsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.metrics = Metrics()
+
+    def test_timed_counts_errors(self):
+        async def ok():
+            return 1
+
+        async def broken():
+            raise ValueError("boom")
+
+        asyncio.run(self.metrics.timed("command_seconds", "ok", ok, label_name="command")())
+        with self.assertRaises(ValueError):
+            asyncio.run(self.metrics.timed("command_seconds", "broken", broken, label_name="command")())
+        snapshot = self.metrics.snapshot()
+        self.assertEqual(snapshot["histograms"]["command_seconds"]["ok"]["count"], 1)
+        self.assertEqual(snapshot["histograms"]["command_seconds"]["broken"]["count"], 1)
+        self.assertEqual(snapshot["counters"], {"command_seconds_errors": {"broken": 1}})
+
+    def test_prometheus_format(self):
+        self.metrics.observe("db_seconds", 'give "many"', 0.003, label_name="op")
+        self.metrics.observe("db_seconds", 'give "many"', 30.0, label_name="op")
+        self.metrics.inc("hook_errors", "auto_points", label_name="hook")
+        self.metrics.gauge("db_queue_depth", lambda: 7)
+        self.metrics.gauge("broken", lambda: 1 / 0)
+        lines = self.metrics.prometheus().splitlines()
+
+        self.assertIn("# TYPE elchbot_db_seconds histogram", lines)
+        label = 'op="give \\"many\\""'
+        buckets = [line for line in lines if line.startswith("elchbot_db_seconds_bucket")]
+        self.assertEqual(len(buckets), len(BUCKETS) + 1)
+        self.assertIn(f'elchbot_db_seconds_bucket{{{label},le="0.0025"}} 0', buckets)
+        self.assertIn(f'elchbot_db_seconds_bucket{{{label},le="0.005"}} 1', buckets)
+        self.assertIn(f'elchbot_db_seconds_bucket{{{label},le="+Inf"}} 2', buckets)
+        self.assertIn(f"elchbot_db_seconds_count{{{label}}} 2", lines)
+        self.assertIn('elchbot_hook_errors_total{hook="auto_points"} 1', lines)
+        self.assertIn("elchbot_db_queue_depth 7", lines)
+        # Fehlerhafte Gauges werden weggelassen
+        self.assertFalse(any("broken" in line for line in lines))
+
+    def test_http_endpoint(self):
+        self.metrics.gauge("db_queue_depth", lambda: 3)
+        server = start_http_server(0, registry=self.metrics)
+        try:
+            base = f"http://127.0.0.1:{server.server_address[1]}"
+            with urllib.request.urlopen(f"{base}/metrics", timeout=5) as response:
+                self.assertIn("text/plain", response.headers["Content-Type"])
+                self.assertIn("elchbot_db_queue_depth 3", response.read().decode("utf-8"))
+            with self.assertRaises(urllib.error.HTTPError):
+                urllib.request.urlopen(f"{base}/other", timeout=5)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+if __name__ == "__main__":
+    unittest.main()
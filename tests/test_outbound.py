@@ -0,0 +1,123 @@
+import asyncio
+import unittest
+from queue import Queue
+
+import outbound
+from outbound import ANNOUNCEMENT, NORMAL, REPLY, SendScheduler, TokenBucket, is_command
+
+
+class TokenBucketTest(unittest.TestCase):
+
+    def bucket(self, capacity, per_seconds, now=0.0):
+        bucket = TokenBucket(capacity, per_seconds)
+        bucket.updated = now
+        return bucket
+
+    def drain(self, bucket, now):
+        sent = 0
+        while bucket.wait_time(now) == 0:
+            bucket.take()
+            sent += 1
+        return sent
+
+    def test_burst_up_to_capacity(self):
+        bucket = self.bucket(20, 30.0)
+        self.assertEqual(self.drain(bucket, 0.0), 20)
+        self.assertAlmostEqual(bucket.wait_time(0.0), 1.5)
+
+    def test_refills_evenly(self):
+        bucket = self.bucket(20, 30.0)
+        self.drain(bucket, 0.0)
+        self.assertEqual(self.drain(bucket, 1.5), 1)
+        self.assertEqual(self.drain(bucket, 15.0), 9)
+
+    def test_idle_time_does_not_exceed_capacity(self):
+        bucket = self.bucket(1, 1.0)
+        self.assertEqual(self.drain(bucket, 3600.0), 1)
+        self.assertAlmostEqual(bucket.wait_time(3600.25), 0.75)
+
+    def test_pacing_over_a_long_run(self):
+        bucket = self.bucket(100, 30.0)
+        sent = 0
+        now = 0.0
+        while now < 60.0:
+            wait = bucket.wait_time(now)
+            if wait:
+                # Wie asyncio.sleep: die Uhr läuft immer mindestens ein Stück weiter
+                now += max(wait, 1e-6)
+                continue
+            bucket.take()
+            sent += 1
+        # Startkapazität plus 60 Sekunden Nachlauf
+        self.assertLessEqual(sent, 100 + 200 + 1)
+        self.assertGreaterEqual(sent, 100 + 200 - 1)
+
+
+class IsCommandTest(unittest.TestCase):
+
+    def test_chat_commands(self):
+        self.assertTrue(is_command("/me waves"))
+        self.assertTrue(is_command(".announce hi"))
+        self.assertFalse(is_command("hello /me"))
+
+
+class FakeChannel:
+
+    def __init__(self, name, fail=False):
+        self.name = name
+        self.fail = fail
+        self.sent = []
+
+    async def send(self, text):
+        if self.fail:
+            raise ConnectionError("disconnected")
+        self.sent.append(text)
+
+
+class SendSchedulerTest(unittest.TestCase):
+
+    def run_sends(self, channel, messages, moderator=True, log_queue=None):
+        """Reiht alle (text, priority) ein, bevor der Kanal zum ersten Mal senden darf"""
+        scheduler = SendScheduler(log_queue, moderator_channels=[channel.name] if moderator else [])
+
+        async def run():
+            futures = [scheduler.send(channel, text, priority) for text, priority in messages]
+            return await asyncio.gather(*futures)
+
+        return scheduler, asyncio.run(run())
+
+    def test_replies_first_and_same_priority_coalesced(self):
+        channel = FakeChannel("elch")
+        scheduler, results = self.run_sends(channel, [
+            ("a1", ANNOUNCEMENT), ("r1", REPLY), ("a2", ANNOUNCEMENT), ("r2", REPLY), ("/me waves", REPLY),
+        ])
+        self.assertEqual(results, [True] * 5)
+        self.assertEqual(channel.sent, ["r1 | r2", "/me waves", "a1 | a2"])
+        self.assertEqual(scheduler.stats(), {"pending": 0, "sent": 3, "coalesced": 2, "dropped": 0})
+
+    def test_coalescing_respects_message_length(self):
+        channel = FakeChannel("elch")
+        long_text = "x" * 300
+        self.run_sends(channel, [(long_text, NORMAL), (long_text, NORMAL)])
+        self.assertEqual(channel.sent, [long_text, long_text])
+
+    def test_full_queue_drops_newest_lowest_priority(self):
+        channel = FakeChannel("elch")
+        messages = [(f"a{index}", ANNOUNCEMENT) for index in range(outbound.MAX_QUEUED)] + [("r", REPLY)]
+        scheduler, results = self.run_sends(channel, messages)
+        self.assertFalse(results[outbound.MAX_QUEUED - 1])
+        self.assertTrue(results[-1])
+        self.assertEqual(scheduler.dropped, 1)
+        self.assertTrue(channel.sent[0].startswith("r"))
+        self.assertNotIn(f"a{outbound.MAX_QUEUED - 1}", " | ".join(channel.sent))
+
+    def test_send_errors_resolve_false(self):
+        log_queue = Queue()
+        scheduler, results = self.run_sends(FakeChannel("elch", fail=True), [("hi", REPLY)], log_queue=log_queue)
+        self.assertEqual(results, [False])
+        self.assertEqual(scheduler.sent, 0)
+        self.assertIn("Sending to #elch failed", log_queue.get_nowait())
+
+
+if __name__ == "__main__":
+    unittest.main()
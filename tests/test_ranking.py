@@ -0,0 +1,78 @@
+import unittest
+from types import SimpleNamespace
+
+from modules.elchcoins import coinmanager, database, ranking
+from modules.elchcoins.ranking import DEFAULT_TIERS, RankEngine
+
+from support import DatabaseTestCase
+
+
+class RankEngineTest(unittest.TestCase):
+
+    def test_default_tier_bounds_are_inclusive(self):
+        engine = RankEngine()
+        cases = {0: "newbe", 100: "newbe", 101: "novice", 5000: "master", 7501: "Legend",
+                 10000: "Legend", 10001: "Jobless", 10 ** 9: "Jobless"}
+        for points, name in cases.items():
+            self.assertEqual(engine.resolve(points)["name"], name, points)
+
+    def test_custom_tiers_are_sorted(self):
+        engine = RankEngine([
+            {"name": "top", "up_to": None, "message": ""},
+            {"name": "mid", "up_to": 50, "message": ""},
+            {"name": "low", "up_to": 10, "message": ""},
+        ])
+        self.assertEqual(engine.names(), ["low", "mid", "top"])
+        self.assertEqual(engine.resolve(11)["name"], "mid")
+        self.assertEqual(engine.resolve(51)["name"], "top")
+
+    def test_exactly_one_unbounded_tier(self):
+        with self.assertRaises(ValueError):
+            RankEngine([{"name": "low", "up_to": 10}])
+        with self.assertRaises(ValueError):
+            RankEngine([{"name": "a", "up_to": None}, {"name": "b", "up_to": None}])
+
+    def test_load_tiers_from_config(self):
+        tiers = [{"name": "low", "up_to": 10, "message": ""}, {"name": "high", "up_to": None, "message": ""}]
+        try:
+            ranking.load_tiers(SimpleNamespace(custom_settings={"rank_tiers": tiers}))
+            self.assertEqual(ranking.engine.resolve(11)["name"], "high")
+            ranking.load_tiers(SimpleNamespace(custom_settings={}))
+            self.assertEqual(ranking.engine.names(), [t["name"] for t in DEFAULT_TIERS])
+        finally:
+            ranking.load_tiers(None)
+
+
+class RankManyTest(DatabaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.reset_coinmanager()
+        self.addCleanup(self.reset_coinmanager)
+
+    def reset_coinmanager(self):
+        coinmanager.cache.clear()
+        coinmanager._leaderboard_ready = False
+        coinmanager._data_version = None
+
+    def test_position_and_percentile(self):
+        database.apply_deltas({"low": 50, "mid": 200, "tied": 200, "legend": 10000, "crazy": 20000}, 0)
+
+        ranks = ranking.rank_many(["low", "mid", "tied", "legend", "crazy", "nobody"])
+        self.assertEqual(ranks["crazy"]["tier"]["name"], "Jobless")
+        self.assertEqual(ranks["legend"]["tier"]["name"], "Legend")
+        self.assertEqual((ranks["crazy"]["position"], ranks["crazy"]["percentile"]), (1, 80.0))
+        self.assertEqual((ranks["legend"]["position"], ranks["legend"]["percentile"]), (2, 60.0))
+        # Gleichstand teilt sich Platz und Perzentil
+        self.assertEqual(ranks["mid"]["position"], ranks["tied"]["position"])
+        self.assertEqual(ranks["mid"]["percentile"], 20.0)
+        self.assertEqual((ranks["low"]["position"], ranks["low"]["percentile"]), (5, 0.0))
+        # Unbekannter User: 0 Punkte, hinter allen anderen
+        self.assertEqual(ranks["nobody"]["points"], 0)
+        self.assertEqual(ranks["nobody"]["tier"]["name"], "newbe")
+        self.assertEqual(ranks["nobody"]["position"], 6)
+        self.assertEqual(ranks["nobody"]["total"], 6)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import unittest
+
+from modules.elchcoins.activity import ActivityTracker
+from modules.elchcoins.rewards import RewardScheduler
+
+
+class RewardSchedulerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.activity = ActivityTracker(bucket_seconds=60, max_window=3600)
+        self.scheduler = RewardScheduler(self.activity, base_reward=10, interval=600)
+        self.scheduler.start(now=0)
+
+    def chat(self, username, now):
+        self.activity.record("elch", username, now=now)
+
+    def test_not_due_yet(self):
+        self.assertIsNone(self.scheduler.collect(now=599))
+
+    def test_catch_up_pays_each_missed_tick_once(self):
+        self.chat("alice", 30)
+        self.chat("bob", 650)
+        self.chat("carol", 1300)
+        self.chat("carol", 1310)
+
+        batch = self.scheduler.collect(now=1900)
+        self.assertEqual((batch.ticks, batch.skipped), (3, 0))
+        self.assertEqual(batch.rewards, {"alice": 10, "bob": 10, "carol": 10})
+        self.scheduler.finish(batch, 0.0)
+
+        # Nächster Tick sieht nur neue Aktivität
+        self.chat("dave", 1950)
+        batch = self.scheduler.collect(now=2400)
+        self.assertEqual((batch.ticks, batch.rewards), (1, {"dave": 10}))
+
+    def test_ticks_older_than_the_window_are_skipped(self):
+        batch = self.scheduler.collect(now=600 * 10)
+        self.assertEqual(batch.ticks, 10)
+        self.assertEqual(batch.skipped, 10 - 6)
+
+    def test_failed_payout_is_retried_by_next_tick(self):
+        self.chat("alice", 30)
+        batch = self.scheduler.collect(now=700)
+        self.assertEqual(batch.rewards, {"alice": 10})
+        # Auszahlung schlägt fehl: finish wird nicht aufgerufen
+
+        self.chat("bob", 900)
+        batch = self.scheduler.collect(now=1200)
+        self.assertEqual(batch.rewards, {"alice": 10, "bob": 10})
+        self.scheduler.finish(batch, 0.0)
+
+        batch = self.scheduler.collect(now=1800)
+        self.assertEqual(batch.rewards, {})
+
+    def test_multiplier_event_and_disabled(self):
+        self.scheduler.configure(multiplier_events={"raid": 2.0})
+        self.scheduler.start_event("raid", duration=1000, now=0)
+        self.chat("alice", 30)
+        batch = self.scheduler.collect(now=600)
+        self.assertEqual((batch.rewards, batch.multiplier), ({"alice": 20}, 2.0))
+        self.scheduler.finish(batch, 0.0)
+
+        self.scheduler.configure(enabled=False)
+        self.chat("alice", 700)
+        batch = self.scheduler.collect(now=1200)
+        self.assertEqual(batch.rewards, {})
+        self.scheduler.finish(batch, 0.0)
+        # Deaktivierte Ticks werden nach dem Einschalten nicht nachbezahlt
+        self.scheduler.configure(enabled=True)
+        batch = self.scheduler.collect(now=1800)
+        self.assertEqual(batch.rewards, {})
+
+    def test_unknown_event(self):
+        with self.assertRaises(ValueError):
+            self.scheduler.start_event("unknown")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import asyncio
+import threading
+import unittest
+from multiprocessing import Pipe
+
+from rpc import RpcClient, RpcError, RpcServer
+
+
+class RpcClientTest(unittest.TestCase):
+
+    def setUp(self):
+        self.client_end, self.server_end = Pipe()
+        self.client = RpcClient(self.client_end)
+
+    def tearDown(self):
+        self.server_end.close()
+        self.client_end.close()
+
+    def test_responses_are_matched_by_id(self):
+        first = self.client.submit("a")
+        second = self.client.submit("b")
+        requests = [self.server_end.recv(), self.server_end.recv()]
+        self.assertEqual([r["command"] for r in requests], ["a", "b"])
+        # Antworten in umgekehrter Reihenfolge
+        self.server_end.send({"id": requests[1]["id"], "ok": True, "result": "B"})
+        self.server_end.send({"id": requests[0]["id"], "ok": False, "error": "boom"})
+        self.assertEqual(second.result(1), "B")
+        with self.assertRaisesRegex(RpcError, "boom"):
+            first.result(1)
+        self.assertEqual(self.client.pending, {})
+
+    def test_late_response_after_timeout_is_dropped(self):
+        with self.assertRaisesRegex(RpcError, "no response"):
+            self.client.call("slow", timeout=0.05)
+        request = self.server_end.recv()
+        self.server_end.send({"id": request["id"], "ok": True, "result": 1})
+
+        pending = self.client.submit("next")
+        request = self.server_end.recv()
+        self.server_end.send({"id": request["id"], "ok": True, "result": 2})
+        self.assertEqual(pending.result(1), 2)
+
+    def test_closed_peer_fails_pending_calls(self):
+        pending = self.client.submit("a")
+        self.server_end.close()
+        with self.assertRaisesRegex(RpcError, "not running"):
+            pending.result(1)
+
+
+class RpcServerTest(unittest.TestCase):
+
+    def test_round_trip(self):
+        client_end, server_end = Pipe()
+        server = RpcServer(server_end)
+
+        async def add(a, b):
+            return a + b
+
+        async def fail():
+            raise ValueError("bad input")
+
+        handlers = {"add": add, "fail": fail}
+        thread = threading.Thread(target=asyncio.run, args=(server.serve(handlers.get),), daemon=True)
+        thread.start()
+
+        client = RpcClient(client_end)
+        self.assertEqual(client.call("add", 2, 3, timeout=2), 5)
+        with self.assertRaisesRegex(RpcError, "bad input"):
+            client.call("fail", timeout=2)
+        with self.assertRaisesRegex(RpcError, "Unknown command"):
+            client.call("missing", timeout=2)
+
+        server_end.close()
+        client_end.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,193 @@
+import unittest
+from concurrent.futures import Future
+
+import sharding
+from rpc import RpcError
+from sharding import HashRing, ShardSupervisor, ShardedRpc, assign_channels
+
+CHANNELS = [f"channel{index}" for index in range(2000)]
+
+
+class FakeProcess:
+
+    def __init__(self, alive=True):
+        self.running = alive
+        self.exitcode = None if alive else 1
+
+    def is_alive(self):
+        return self.running
+
+    def terminate(self):
+        self.running = False
+
+    def join(self, timeout=None):
+        pass
+
+
+class FakeRpc:
+    """Antwortet sofort mit results[command] (Exception-Instanzen werden geworfen)"""
+
+    def __init__(self, results):
+        self.results = results
+        self.calls = []
+
+    def submit(self, command, *args):
+        self.calls.append((command, args))
+        future = Future()
+        result = self.results.get(command)
+        if isinstance(result, Exception):
+            future.set_exception(result)
+        else:
+            future.set_result(result)
+        return future
+
+    def call(self, command, *args, timeout=None):
+        return self.submit(command, *args).result()
+
+    def notify(self, command, *args):
+        self.submit(command, *args)
+
+
+class FakeLog:
+
+    def __init__(self):
+        self.lines = []
+
+    def put(self, line):
+        self.lines.append(line)
+
+
+def supervisor(channels, shard_count, results):
+    """ShardSupervisor ohne Prozesse, jeder Shard antwortet mit results[shard_id]"""
+    instance = ShardSupervisor(None, channels, shard_count, FakeLog())
+    instance.store.process = FakeProcess()
+    for shard in instance.shards:
+        shard.process = FakeProcess()
+        shard.rpc = FakeRpc(results.get(shard.id, {}))
+    return instance
+
+
+class HashRingTest(unittest.TestCase):
+
+    def test_assignment_is_stable_and_complete(self):
+        assignment = assign_channels(CHANNELS, 4)
+        self.assertEqual(assignment, assign_channels(CHANNELS, 4))
+        self.assertEqual(sorted(c for channels in assignment.values() for c in channels), sorted(CHANNELS))
+        self.assertEqual(set(assignment), {0, 1, 2, 3})
+        for channels in assignment.values():
+            self.assertGreater(len(channels), len(CHANNELS) / 4 / 2)
+
+    def test_channel_names_are_case_insensitive(self):
+        ring = HashRing(range(4))
+        self.assertEqual(assign_channels(["Elch"], 4), {ring.node_for("elch"): ["Elch"]})
+
+    def test_new_shard_moves_about_one_nth(self):
+        before, after = HashRing(range(4)), HashRing(range(5))
+        moved = [channel for channel in CHANNELS if before.node_for(channel) != after.node_for(channel)]
+        # Nur Kanäle des neuen Shards wandern, im Mittel 1/5
+        self.assertTrue(all(after.node_for(channel) == 4 for channel in moved))
+        self.assertLess(abs(len(moved) / len(CHANNELS) - 1 / 5), 0.07)
+
+
+class MergeTest(unittest.TestCase):
+
+    def test_merge_summaries_weights_average_by_count(self):
+        merged = sharding.merge_summaries([
+            {"count": 1, "avg_ms": 10.0, "p50_ms": 10.0, "p99_ms": 10.0, "max_ms": 10.0},
+            {"count": 3, "avg_ms": 2.0, "p50_ms": 2.0, "p99_ms": 30.0, "max_ms": 40.0},
+        ])
+        self.assertEqual(merged, {"count": 4, "avg_ms": 4.0, "p50_ms": 10.0, "p99_ms": 30.0, "max_ms": 40.0})
+        empty = {"count": 0, "avg_ms": 0.0, "p50_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+        self.assertEqual(sharding.merge_summaries([empty, empty])["avg_ms"], 0.0)
+
+    def test_merge_stats(self):
+        def stats(messages, lag, pending):
+            return {
+                "histograms": {"command_seconds": {"coins": {"count": 1, "avg_ms": 1.0, "p50_ms": 1.0,
+                                                             "p99_ms": 1.0, "max_ms": 1.0}}},
+                "counters": {"hook_errors": {"auto_points": 1}},
+                "rates": {"messages": {"elch": {"per_sec": messages, "total": messages * 10}}},
+                "gauges": {"loop_lag_seconds_last": lag, "db_queue_depth": pending, "note": "x"},
+            }
+        merged = sharding.merge_stats([stats(1.0, 0.5, 3), stats(2.0, 0.1, 4)])
+        self.assertEqual(merged["histograms"]["command_seconds"]["coins"]["count"], 2)
+        self.assertEqual(merged["counters"], {"hook_errors": {"auto_points": 2}})
+        self.assertEqual(merged["rates"]["messages"]["elch"], {"per_sec": 3.0, "total": 30.0})
+        self.assertEqual(merged["gauges"], {"loop_lag_seconds_last": 0.5, "db_queue_depth": 7, "note": "x"})
+
+    def test_merge_status(self):
+        def status(channels, uptime, pending):
+            return {"nick": "elchbot", "channels": channels, "uptime": uptime, "modules": 3,
+                    "db_pending": pending, "log": {"dropped": 1}}
+        merged = sharding.merge_status([status(["a"], 50, 1), status(["b", "c"], 20, 2)])
+        self.assertEqual(merged, {"nick": "elchbot", "channels": ["a", "b", "c"], "uptime": 20,
+                                  "modules": 3, "db_pending": 3, "log": {"dropped": 2}})
+
+    def test_merge_modules(self):
+        def modules(calls, avg, maximum):
+            return {"modules": ["points"], "hooks": {"auto_points": {"calls": calls, "avg_us": avg,
+                                                                     "max_us": maximum, "slow": 1, "errors": 0}}}
+        merged = sharding.merge_modules([modules(1, 40.0, 40), modules(3, 20.0, 90)])
+        self.assertEqual(merged["hooks"]["auto_points"],
+                         {"calls": 4, "avg_us": 25.0, "max_us": 90, "slow": 2, "errors": 0})
+
+
+class ShardedRpcTest(unittest.TestCase):
+
+    def test_points_go_to_one_shard(self):
+        instance = supervisor(CHANNELS[:8], 2, {0: {"points": {"points": 5}}, 1: {"points": {"points": 5}}})
+        self.assertEqual(ShardedRpc(instance).call("points", "see", "elch"), {"points": 5})
+        self.assertEqual(sum(len(shard.rpc.calls) for shard in instance.shards), 1)
+
+    def test_send_to_channel_uses_its_shard(self):
+        instance = supervisor(CHANNELS[:8], 2, {0: {"send": {"channels": ["x"]}}, 1: {"send": {"channels": ["x"]}}})
+        target = instance.shard_for(CHANNELS[3])
+        ShardedRpc(instance).call("send", "hi", CHANNELS[3])
+        self.assertEqual([shard.id for shard in instance.shards if shard.rpc.calls], [target.id])
+
+    def test_send_to_all_merges_channels(self):
+        instance = supervisor(CHANNELS[:8], 2, {0: {"send": {"channels": ["a"]}}, 1: {"send": {"channels": ["b"]}}})
+        self.assertEqual(sorted(ShardedRpc(instance).call("send", "hi")["channels"]), ["a", "b"])
+
+    def test_status_lists_failed_shards(self):
+        status = {"nick": "elchbot", "channels": ["a"], "uptime": 5, "modules": 1, "db_pending": 0, "log": {}}
+        instance = supervisor(CHANNELS[:8], 2, {0: {"status": status}, 1: {"status": RpcError("boom")}})
+        result = ShardedRpc(instance).call("status")
+        self.assertEqual(result["channels"], ["a"])
+        self.assertEqual(result["errors"], ["shard 1: boom"])
+        self.assertEqual(len(result["shards"]), 2)
+
+    def test_reload_fails_if_any_shard_fails(self):
+        instance = supervisor(CHANNELS[:8], 2, {0: {"reload": {"module": "points"}}, 1: {"reload": RpcError("boom")}})
+        with self.assertRaises(RpcError):
+            ShardedRpc(instance).call("reload", "points")
+
+    def test_no_live_shard(self):
+        instance = supervisor(CHANNELS[:8], 2, {})
+        for shard in instance.shards:
+            shard.process.running = False
+        with self.assertRaises(RpcError):
+            ShardedRpc(instance).call("status")
+
+
+class StoreRestartTest(unittest.TestCase):
+
+    def test_store_restart_reconnects_running_shards(self):
+        instance = supervisor(CHANNELS[:8], 2, {0: {"store": {}}, 1: {"store": RpcError("not ready")}})
+        started = []
+        instance._start_store = lambda: setattr(instance, "store_address", "new-address")
+        instance._start_shard = started.append
+        instance.store.process.running = False
+        instance.store.restart_at = 0.0
+
+        instance._check()
+        first, second = instance.shards
+        self.assertEqual(first.rpc.calls, [("store", ("new-address", instance.authkey))])
+        self.assertTrue(first.alive())
+        # Shard ohne Antwort wird wie bisher neu gestartet
+        self.assertEqual(started, [second])
+        self.assertIn("1 shards reconnected, 1 restarted", instance.log_queue.lines[-1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import unittest
+
+from modules.elchcoins.streaks import WINDOW_DAYS, StreakTracker, bonus_for
+
+
+# Echte Tage sind Ordinalzahlen (day_number), Tag 0 gilt als "noch nie da"
+BASE = 2000 * WINDOW_DAYS
+
+
+class StreakRingTest(unittest.TestCase):
+    """Die Bitmap ist ein Ring über WINDOW_DAYS Tage, alte Bits dürfen nie als neue Tage zählen"""
+
+    def setUp(self):
+        self.tracker = StreakTracker()
+
+    def mark_days(self, username, days):
+        for day in days:
+            self.tracker.mark(username, BASE + day)
+
+    def streak(self, username, day):
+        return self.tracker.streak(username, BASE + day)
+
+    def test_streak_across_ring_wrap(self):
+        start = WINDOW_DAYS - 5
+        self.mark_days("alice", range(start, start + 12))
+        self.assertEqual(self.streak("alice", start + 11), (12, 12))
+
+    def test_mark_once_per_day(self):
+        self.assertTrue(self.tracker.mark("alice", BASE))
+        self.assertFalse(self.tracker.mark("Alice", BASE))
+
+    def test_streak_lasts_until_end_of_next_day(self):
+        self.mark_days("alice", [10, 11, 12])
+        self.assertEqual(self.streak("alice", 13)[0], 3)
+        self.assertEqual(self.streak("alice", 14)[0], 0)
+
+    def test_full_lap_clears_old_bits(self):
+        self.mark_days("alice", range(0, 5))
+        self.tracker.rollover(BASE + 4)
+        # Tag 4 + WINDOW_DAYS liegt auf demselben Bit wie Tag 4
+        self.mark_days("alice", [4 + WINDOW_DAYS])
+        self.assertEqual(self.streak("alice", 4 + WINDOW_DAYS), (1, 5))
+
+    def test_stale_bits_ahead_of_last_visit_do_not_count(self):
+        self.mark_days("alice", [10, 11, 12])
+        # Die Bits von Tag 10-12 liegen auf den Tagen 378-380 und sind noch gesetzt
+        self.mark_days("alice", [9 + WINDOW_DAYS])
+        self.assertEqual(self.streak("alice", 9 + WINDOW_DAYS), (1, 3))
+        self.mark_days("alice", [10 + WINDOW_DAYS, 11 + WINDOW_DAYS])
+        self.assertEqual(self.streak("alice", 11 + WINDOW_DAYS)[0], 3)
+        self.assertEqual(self.streak("alice", 12 + WINDOW_DAYS)[0], 3)
+        self.assertEqual(self.streak("alice", 13 + WINDOW_DAYS)[0], 0)
+
+    def test_gap_clears_skipped_days(self):
+        self.mark_days("alice", range(0, 10))
+        self.mark_days("alice", [WINDOW_DAYS + 2, WINDOW_DAYS + 3])
+        # Tag 5 + WINDOW_DAYS wurde übersprungen, das alte Bit von Tag 5 muss weg sein
+        self.mark_days("alice", [WINDOW_DAYS + 6])
+        self.assertEqual(self.streak("alice", WINDOW_DAYS + 6)[0], 1)
+
+    def test_rollover_updates_longest(self):
+        self.mark_days("alice", range(100, 104))
+        self.mark_days("bob", [103])
+        self.assertEqual(self.tracker.rollover(BASE + 103), {"alice": 4, "bob": 1})
+        self.assertEqual(self.tracker.rollover(BASE + 104), {})
+        self.mark_days("alice", range(110, 112))
+        self.assertEqual(self.streak("alice", 111), (2, 4))
+
+    def test_save_and_load_round_trip(self):
+        self.mark_days("alice", range(WINDOW_DAYS - 3, WINDOW_DAYS + 3))
+        rows = self.tracker.take_dirty()
+        self.assertEqual(self.tracker.take_dirty(), [])
+
+        loaded = StreakTracker()
+        loaded.load(rows)
+        self.assertEqual(loaded.streak("alice", BASE + WINDOW_DAYS + 2), (6, 6))
+        self.assertFalse(loaded.mark("alice", BASE + WINDOW_DAYS + 2))
+
+    def test_bonus_for(self):
+        self.assertEqual(bonus_for(1, 100), 100)
+        self.assertEqual(bonus_for(1, 100, streak_bonus=False), 100)
+        self.assertGreater(bonus_for(5, 100), bonus_for(2, 100))
+        self.assertEqual(bonus_for(1000, 100), bonus_for(11, 100))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import os
+import unittest
+from unittest import mock
+
+from modules.elchcoins import database, transfer
+
+from support import DatabaseTestCase
+
+
+class TransferTest(DatabaseTestCase):
+
+    def write(self, name, text):
+        path = os.path.join(self.tmp, name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        return path
+
+    def test_import_modes(self):
+        database.apply_deltas({"alice": 10, "bob": 10}, 0)
+        path = self.write("in.csv", "username,points\nAlice,5\nbob,20\ncarol,x\n,3\n")
+
+        self.assertEqual(transfer.import_file(path, "max"), (2, 1, 2))
+        self.assertEqual(database.get_points_many(["alice", "bob"]), {"alice": 10, "bob": 20})
+        transfer.import_file(path, "add")
+        self.assertEqual(database.get_points("alice"), 15)
+        transfer.import_file(path, "overwrite")
+        self.assertEqual(database.get_points("alice"), 5)
+
+    def test_iter_import_yields_each_chunk(self):
+        lines = "".join(f'{{"username": "u{i}", "points": {i}}}\n' for i in range(5))
+        steps = transfer.iter_import(self.write("in.jsonl", lines), chunk_rows=2)
+
+        chunks = []
+        while True:
+            try:
+                chunks.append(next(steps))
+            except StopIteration as stop:
+                result = stop.value
+                break
+        self.assertEqual(chunks, [["u0", "u1"], ["u2", "u3"], ["u4"]])
+        self.assertEqual(result, (5, 4, 0))
+
+    def test_export_round_trip(self):
+        database.apply_deltas({"alice": 10, "bob": 3}, 0)
+        for fmt in transfer.FORMATS:
+            path = os.path.join(self.tmp, f"out.{fmt}")
+            self.assertEqual(transfer.export_file(path), 2)
+            self.assertFalse(os.path.exists(path + ".tmp"))
+            database.apply_deltas({"alice": -10, "bob": -3}, 0)
+            self.assertEqual(transfer.import_file(path), (2, 2, 0))
+            self.assertEqual(database.get_points_many(["alice", "bob"]), {"alice": 10, "bob": 3})
+
+    def test_aborted_export_removes_temp_file(self):
+        database.apply_deltas({f"u{i}": 1 for i in range(5)}, 0)
+        path = self.write("out.csv", "previous export\n")
+
+        steps = transfer.iter_export(path, chunk_rows=2)
+        self.assertEqual(next(steps), 2)
+        self.assertTrue(os.path.exists(path + ".tmp"))
+        steps.close()
+        self.assertFalse(os.path.exists(path + ".tmp"))
+
+        def failing_rows():
+            yield "u0", 1
+            raise OSError("disk full")
+        with mock.patch.object(database, "iter_all_points", failing_rows):
+            with self.assertRaises(OSError):
+                transfer.export_file(path)
+        self.assertFalse(os.path.exists(path + ".tmp"))
+        with open(path, encoding="utf-8") as f:
+            self.assertEqual(f.read(), "previous export\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import os
+import time
+import unittest
+
+from modules.elchcoins import database
+from modules.elchcoins.writebehind import WriteBehindBuffer
+
+from support import DatabaseTestCase
+
+
+class JournalReplayTest(DatabaseTestCase):
+    """Nach einem Absturz darf jedes Journal-Delta genau einmal in der Datenbank landen"""
+
+    def setUp(self):
+        super().setUp()
+        self.journal = os.path.join(self.tmp, "elchcoins.journal")
+        self.buffers = []
+
+    def tearDown(self):
+        for buffer in self.buffers:
+            buffer._stop.set()
+            if buffer._journal is not None:
+                buffer._journal.close()
+        super().tearDown()
+
+    def crashing_buffer(self):
+        """Buffer, dessen Flush-Thread nie von selbst schreibt, "Absturz" = einfach liegen lassen"""
+        buffer = WriteBehindBuffer(self.journal, flush_interval=3600)
+        self.buffers.append(buffer)
+        buffer.start()
+        return buffer
+
+    def restart(self):
+        buffer = WriteBehindBuffer(self.journal, flush_interval=3600)
+        replayed = buffer.start()
+        buffer.stop()
+        return replayed
+
+    def test_unflushed_deltas_are_replayed(self):
+        buffer = self.crashing_buffer()
+        buffer.add("Alice", 10)
+        buffer.add("bob", 5)
+        buffer.add("alice", -3)
+
+        self.assertEqual(self.restart(), 3)
+        self.assertEqual(database.get_points("alice"), 7)
+        self.assertEqual(database.get_points("bob"), 5)
+
+    def test_replay_twice_applies_once(self):
+        buffer = self.crashing_buffer()
+        buffer.add("alice", 10)
+
+        self.assertEqual(self.restart(), 1)
+        self.assertEqual(self.restart(), 0)
+        self.assertEqual(database.get_points("alice"), 10)
+
+    def test_flushed_entries_left_in_journal_are_skipped(self):
+        buffer = self.crashing_buffer()
+        buffer.add("alice", 10)
+        buffer.flush()
+        # Absturz nach dem Commit, aber bevor das Journal geleert wurde
+        ts = int(time.time())
+        buffer._journal.write(f"1\talice\t10\t{ts}\t0\n")
+        buffer._journal.flush()
+        buffer.add("alice", 4)
+
+        self.assertEqual(self.restart(), 1)
+        self.assertEqual(database.get_points("alice"), 14)
+
+    def test_torn_last_line_is_ignored(self):
+        buffer = self.crashing_buffer()
+        buffer.add("alice", 10)
+        buffer._journal.write("2\talice\t99")
+        buffer._journal.flush()
+
+        self.assertEqual(self.restart(), 1)
+        self.assertEqual(database.get_points("alice"), 10)
+
+    def test_remove_never_goes_below_zero(self):
+        buffer = self.crashing_buffer()
+        buffer.add("alice", 3)
+        self.assertEqual(buffer.remove("alice", 10), 3)
+        self.assertEqual(buffer.remove("alice", 1), 0)
+        self.assertEqual(buffer.get("alice"), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()